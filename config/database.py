@@ -4,10 +4,20 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_CONFIG = {
-    'host': os.getenv('localhost'),
+    'host': os.getenv('DB_HOST', 'pma.tikhomirova.net'),
     'port': int(os.getenv('DB_PORT', 3306)),
-    'database': os.getenv('antiviruss'),
-    'user': os.getenv('root'),
-    'password': os.getenv('123'),
-    'charset': os.getenv('utf8mb4')
+    'database': os.getenv('DB_NAME', 'antiviruss'),
+    'user': os.getenv('DB_USER', 'root'),
+    'password': os.getenv('DB_PASSWORD', '123'),
+    'charset': os.getenv('DB_CHARSET', 'utf8mb4')
+}
+
+# Пул подключений
+POOL_CONFIG = {
+    # Максимум одновременно открытых подключений (GUI и фоновые задачи)
+    'max_connections': int(os.getenv('DB_POOL_MAX_CONNECTIONS', 8)),
+    # Через сколько секунд простоя подключение считается устаревшим и закрывается
+    'stale_timeout': int(os.getenv('DB_POOL_STALE_TIMEOUT', 300)),
+    # Сколько секунд ждать свободного подключения, когда пул исчерпан
+    'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
 }
@@ -1,23 +1,44 @@
-import mysql.connector
-from mysql.connector import Error
+from playhouse.pool import PooledMySQLDatabase
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-from config.database import DATABASE_CONFIG
+from config.database import DATABASE_CONFIG, POOL_CONFIG
+
+def create_database():
+    """Создает базу данных с пулом подключений.
+
+    peewee держит отдельное подключение для каждого потока: поток берет его
+    из пула при connect() и возвращает при close(). Перед выдачей из пула
+    подключение проверяется ping-запросом, разорванные и простаивавшие
+    дольше stale_timeout подключения заменяются новыми.
+    """
+    return PooledMySQLDatabase(
+        DATABASE_CONFIG['database'],
+        host=DATABASE_CONFIG['host'],
+        port=DATABASE_CONFIG['port'],
+        user=DATABASE_CONFIG['user'],
+        password=DATABASE_CONFIG['password'],
+        charset=DATABASE_CONFIG['charset'],
+        max_connections=POOL_CONFIG['max_connections'],
+        stale_timeout=POOL_CONFIG['stale_timeout'],
+        timeout=POOL_CONFIG['timeout'],
+    )
+
+# Общая база данных приложения
+database = create_database()
 
 def get_connection():
-    """Создает и возвращает соединение с базой данных"""
+    """Возвращает подключение к базе данных из пула для текущего потока"""
     try:
-        connection = mysql.connector.connect(
-            host=DATABASE_CONFIG['localhost'],
-            port=DATABASE_CONFIG['3306'],
-            database=DATABASE_CONFIG['antiviruss'],
-            user=DATABASE_CONFIG['root'],
-            password=DATABASE_CONFIG['123']
-        )
-        return connection
-    except Error as e:
+        database.connect(reuse_if_open=True)
+        return database.connection()
+    except Exception as e:
         print(f"Ошибка подключения к базе данных: {e}")
         return None
+
+def release_connection():
+    """Возвращает подключение текущего потока в пул"""
+    if not database.is_closed():
+        database.close()
@@ -1,105 +1,55 @@
 import sys
 import random
 import os
-from datetime import datetime
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import struct
+import tempfile
+import threading
+import time
+import bisect
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import reduce
+import operator
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QStackedWidget, QLabel,
                              QComboBox, QLineEdit, QTextEdit, QDateEdit, 
                              QFileDialog, QMessageBox, QScrollArea, QGridLayout,
-                             QDialog, QDialogButtonBox)
-from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QIcon, QPixmap
+                             QDialog, QDialogButtonBox, QProgressDialog, QListView,
+                             QAbstractItemView, QStyledItemDelegate, QStyle)
+from PyQt6.QtCore import (Qt, QDate, QObject, QRunnable, QThreadPool, pyqtSignal,
+                          QAbstractListModel, QModelIndex, QSize, QRect, QRectF, QEvent, QTimer)
+from PyQt6.QtGui import (QIcon, QPixmap, QPixmapCache, QPainter, QPen, QColor, QFont,
+                         QFontMetrics)
 
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 from peewee import *
 import xlsxwriter
+from xlsxwriter.utility import xl_cell_to_rowcol
 
-# Настройки подключения
-DB_CONFIG = {
-    'host': 'pma.tikhomirova.net',
-    'user': 'root',
-    'password': '123',
-    'database': 'antiviruss'
-}
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-# База данных MySQL
-db = MySQLDatabase(
-    DB_CONFIG['database'],
-    host=DB_CONFIG['host'],
-    user=DB_CONFIG['user'],
-    password=DB_CONFIG['password'],
-)
+# База данных MySQL с пулом подключений; настройки берутся из config/database.py
+# (переменные окружения DB_HOST, DB_NAME, DB_POOL_MAX_CONNECTIONS и др.)
+from src.database.connection import database as db
 
-def fix_database_structure():
-    """Проверяет и исправляет структуру базы данных"""
-    try:
-        cursor = db.execute_sql("SHOW TABLES")
-        existing_tables = [row[0] for row in cursor.fetchall()]
-        print(f"Существующие таблицы: {existing_tables}")
-        
-        # Исправляем таблицу signatures
-        if 'signatures' in existing_tables:
-            cursor = db.execute_sql("DESCRIBE signatures")
-            columns = [row[0] for row in cursor.fetchall()]
-            print(f"Столбцы таблицы signatures: {columns}")
-            
-            if 'manufacturer_id' in columns:
-                cursor = db.execute_sql("SELECT DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = 'signatures' AND COLUMN_NAME = 'manufacturer_id'")
-                result = cursor.fetchone()
-                if result:
-                    current_type = result[0]
-                    
-                    if current_type.upper() != 'INT':
-                        print("Исправляем тип manufacturer_id на INT в таблице signatures...")
-                        try:
-                            # Сначала удаляем старый столбец
-                            db.execute_sql("ALTER TABLE signatures DROP COLUMN manufacturer_id")
-                            # Добавляем новый с правильным типом
-                            db.execute_sql("ALTER TABLE signatures ADD COLUMN manufacturer_id INT")
-                            # Добавляем внешний ключ
-                            db.execute_sql("ALTER TABLE signatures ADD FOREIGN KEY (manufacturer_id) REFERENCES manufacturers(id)")
-                            print("Столбец manufacturer_id исправлен на INT в таблице signatures")
-                        except Exception as e:
-                            print(f"Ошибка при исправлении столбца в signatures: {e}")
-        
-        # Исправляем таблицу products
-        if 'products' in existing_tables:
-            cursor = db.execute_sql("DESCRIBE products")
-            columns = [row[0] for row in cursor.fetchall()]
-            print(f"Столбцы таблицы products: {columns}")
-            
-            # Проверяем наличие manufacturer_id
-            if 'manufacturer_id' not in columns:
-                print("Добавляем столбец manufacturer_id в таблицу products...")
-                try:
-                    db.execute_sql("ALTER TABLE products ADD COLUMN manufacturer_id INT")
-                    # Добавляем внешний ключ
-                    db.execute_sql("ALTER TABLE products ADD FOREIGN KEY (manufacturer_id) REFERENCES manufacturers(id)")
-                    print("Столбец manufacturer_id добавлен в таблицу products")
-                    
-                    # Если есть существующие записи, устанавливаем значение по умолчанию
-                    try:
-                        first_manufacturer = Manufacturer.select().first()
-                        if first_manufacturer:
-                            db.execute_sql("UPDATE products SET manufacturer_id = %s", (first_manufacturer.id,))
-                            print("Установлен manufacturer_id для существующих записей")
-                    except Exception as e:
-                        print(f"Ошибка при обновлении существующих записей: {e}")
-                        
-                except Exception as e:
-                    print(f"Ошибка при добавлении столбца в products: {e}")
-        
-        return True
-    except Exception as e:
-        print(f"Ошибка при проверке структуры БД: {e}")
-        return False
+# Текст последней ошибки initialize_database, показывается в окне приложения
+db_init_error = None
 
 def initialize_database():
-    global db
+    global db, db_init_error
+    db_init_error = None
     
     try:
         # Закрываем существующее подключение, если есть
@@ -120,28 +70,20 @@ def initialize_database():
             print("Переподключение к MySQL успешно")
         except Exception as e2:
             print(f"Не удалось подключиться к базе данных: {e2}")
-            # Создаем QMessageBox, но только если QApplication уже создан
-            try:
-                from PyQt6.QtWidgets import QMessageBox, QApplication
-                app = QApplication.instance()
-                if app is not None:
-                    QMessageBox.critical(None, "Ошибка базы данных", 
-                                       f"Не удалось подключиться к базе данных:\n{e2}")
-            except:
-                pass
+            # Окно приложения покажет ошибку после завершения фоновой инициализации
+            db_init_error = f"Не удалось подключиться к базе данных:\n{e2}"
             return False
     
-    # Сначала проверяем и исправляем структуру базы данных
-    if not fix_database_structure():
-        print("Предупреждение: Не удалось проверить/исправить структуру БД")
-    
-    # Создаем таблицы, если они не существуют (без удаления существующих)
+    # Схема приводится к актуальной версии миграциями; если версия уже последняя, это один запрос
     try:
-        # Создаем таблицы только если они не существуют
-        db.create_tables([Manufacturer, Malware, Product, Signature], safe=True)
-        print("Таблицы успешно созданы или уже существуют")
+        applied = migrate()
+        if applied:
+            print(f"Применены миграции схемы БД: {applied}")
+        else:
+            print(f"Схема БД актуальна (версия {latest_schema_version()})")
     except Exception as e:
-        print(f"Ошибка создания таблиц: {e}")
+        print(f"Ошибка миграции схемы БД: {e}")
+        db_init_error = f"Ошибка миграции схемы БД:\n{e}"
         return False
     
     # Создаем тестовые данные только если таблицы пустые
@@ -157,13 +99,50 @@ def initialize_database():
     
     return True
 
+class RecordChange:
+    """Изменение одной записи: action - CREATED, UPDATED или DELETED"""
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    
+    def __init__(self, action, record):
+        self.action = action
+        self.record = record
+    
+    @property
+    def model(self):
+        return type(self.record)
+
+class RecordChangeNotifier(QObject):
+    """Рассылает изменения записей, сохраненных через save() и delete_instance() моделей.
+    
+    Сигнал из рабочего потока доставляется получателям в их потоке (очередью Qt).
+    Массовые запросы (insert_many, delete().where()) изменений не рассылают.
+    """
+    changed = pyqtSignal(object)   # RecordChange
+
+record_changes = RecordChangeNotifier()
+
 # Модели данных
 class BaseModel(Model):
+    def save(self, *args, **kwargs):
+        created = self._pk is None or kwargs.get('force_insert', False)
+        rows = super().save(*args, **kwargs)
+        if rows:
+            record_changes.changed.emit(RecordChange(RecordChange.CREATED if created else RecordChange.UPDATED, self))
+        return rows
+    
+    def delete_instance(self, *args, **kwargs):
+        rows = super().delete_instance(*args, **kwargs)
+        if rows:
+            record_changes.changed.emit(RecordChange(RecordChange.DELETED, self))
+        return rows
+    
     class Meta:
         database = db
 
 class Manufacturer(BaseModel):
-    name = CharField()
+    name = CharField(index=True)
     description = TextField()
     country = CharField()
     website = CharField()
@@ -173,41 +152,185 @@ class Manufacturer(BaseModel):
     
     class Meta:
         table_name = 'manufacturers'
+        # Фильтр по стране и году основания
+        indexes = ((('country', 'creation_date'), False),)
 
 class Product(BaseModel):
     product_id = CharField(unique=True)
-    name = CharField()
+    name = CharField(index=True)
     description = TextField()
     version = CharField()
-    release_date = DateField()
+    release_date = DateField(index=True)
     update_size = CharField()
     image_path = CharField(null=True)
     manufacturer = ForeignKeyField(Manufacturer, backref='products', on_delete='CASCADE')
     
     class Meta:
         table_name = 'products'
+        # Фильтр по производителю и году выпуска
+        indexes = ((('manufacturer', 'release_date'), False),)
 
 class Malware(BaseModel):
     malware_id = CharField(unique=True)
-    name = CharField()
+    name = CharField(index=True)
     description = TextField()
     threat_level = CharField()
-    discovery_date = DateField()
+    discovery_date = DateField(index=True)
     malware_type = CharField()
     
     class Meta:
         table_name = 'malware'
+        # Фильтры и группировки по уровню опасности и типу, в том числе вместе с годом;
+        # эти индексы покрывают и отбор по одному уровню или типу
+        indexes = (
+            (('threat_level', 'discovery_date'), False),
+            (('malware_type', 'discovery_date'), False),
+        )
 
 class Signature(BaseModel):
     signature_id = CharField(unique=True)
-    name = CharField()
-    data = TextField()
-    creation_date = DateField()
+    name = CharField(index=True)
+    # Текст сигнатуры, если она не записывается как hex; иначе байты хранятся в pattern
+    data = TextField(null=True)
+    pattern = BlobField(null=True)
+    pattern_length = IntegerField(null=True)
+    pattern_hash = CharField(max_length=64, null=True, index=True)   # SHA-256 байтов шаблона
+    creation_date = DateField(index=True)
     malware = ForeignKeyField(Malware, backref='signatures', on_delete='CASCADE')
     manufacturer = ForeignKeyField(Manufacturer, backref='signatures', on_delete='CASCADE', null=True)
     
+    def save(self, *args, **kwargs):
+        # Hex-текст, заданный через data (формы, тестовые данные), сохраняется байтами
+        if self.data is not None:
+            pattern = parse_signature_pattern(self.data)
+            if pattern is not None:
+                self.data = None
+                self.pattern, self.pattern_length, self.pattern_hash = pattern_columns(pattern)
+            else:
+                self.pattern = self.pattern_length = self.pattern_hash = None
+        return super().save(*args, **kwargs)
+    
+    @property
+    def pattern_view(self):
+        """Байты шаблона без копирования или None, если сигнатура хранится текстом"""
+        return memoryview(self.pattern) if self.pattern is not None else None
+    
+    @property
+    def hex_data(self):
+        """Сигнатура для показа и редактирования: hex строится из байтов только при обращении"""
+        return signature_text(self.data, self.pattern)
+    
     class Meta:
         table_name = 'signatures'
+        # Фильтр по ВП и году создания
+        indexes = ((('malware', 'creation_date'), False),)
+
+# МОДУЛЬ ИДЕНТИФИКАТОРОВ
+class IdSequence(BaseModel):
+    """Счетчик бизнес-идентификаторов: следующий еще не выданный номер для префикса"""
+    name = CharField(primary_key=True, max_length=16)
+    next_value = BigIntegerField()
+    
+    class Meta:
+        table_name = 'id_sequences'
+
+# Префикс идентификатора -> поле модели, в котором он хранится
+ID_FIELDS = {
+    'MAN': Manufacturer.manufacturer_id,
+    'PROD': Product.product_id,
+    'MAL': Malware.malware_id,
+    'SIG': Signature.signature_id,
+}
+
+# Сколько номеров клиент резервирует за одно обращение к БД
+ID_BLOCK_SIZE = 20
+
+def format_business_id(prefix, number):
+    return f"{prefix}-{number:04d}"
+
+def parse_business_id(business_id):
+    """Номер из идентификатора вида MAL-0042 или None, если формат другой"""
+    prefix, _, number = business_id.partition('-')
+    return int(number) if prefix in ID_FIELDS and number.isdigit() else None
+
+class IdAllocator:
+    """Выдает идентификаторы MAN/PROD/MAL/SIG из таблицы id_sequences.
+    
+    Клиент резервирует блок номеров одним атомарным UPDATE и раздает его из памяти,
+    поэтому одновременно работающие клиенты не получают одинаковых номеров.
+    Номера блока, не выданные до закрытия приложения, пропускаются.
+    """
+    
+    def __init__(self, block_size=ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._blocks = {}   # префикс -> (следующий номер, конец блока)
+        self._lock = threading.Lock()
+    
+    def next_id(self, prefix):
+        with self._lock:
+            number, end = self._blocks.get(prefix, (0, 0))
+            if number >= end:
+                number, end = self._reserve_block(prefix, self.block_size)
+            self._blocks[prefix] = (number + 1, end)
+        return format_business_id(prefix, number)
+    
+    def next_ids(self, prefix, count):
+        """count идентификаторов подряд: остаток блока и, если его мало, ровно недостающие номера одним UPDATE"""
+        with self._lock:
+            number, end = self._blocks.get(prefix, (0, 0))
+            numbers = list(range(number, min(end, number + count)))
+            if len(numbers) < count:
+                start, end = self._reserve_block(prefix, count - len(numbers))
+                numbers.extend(range(start, end))
+                number = end
+            else:
+                number += count
+            self._blocks[prefix] = (number, end)
+        return [format_business_id(prefix, number) for number in numbers]
+    
+    def _reserve_block(self, prefix, size):
+        """Резервирует size номеров; возвращает (первый номер, конец блока)"""
+        if isinstance(db, MySQLDatabase):
+            # LAST_INSERT_ID(expr) возвращает новое значение в ответе на сам UPDATE
+            cursor = db.execute_sql(
+                "UPDATE id_sequences SET next_value = LAST_INSERT_ID(next_value + %s) WHERE name = %s",
+                (size, prefix))
+            end = cursor.lastrowid if cursor.rowcount else None
+        else:
+            cursor = db.execute_sql(
+                f"UPDATE id_sequences SET next_value = next_value + {db.param} WHERE name = {db.param} "
+                f"RETURNING next_value", (size, prefix))
+            row = cursor.fetchone()
+            end = row[0] if row else None
+        if end is None:
+            raise KeyError(f"Нет счетчика идентификаторов {prefix} в таблице id_sequences")
+        return end - size, end
+    
+    def advance_past(self, business_id):
+        """Сдвигает счетчик и зарезервированный блок за номер идентификатора, созданного в обход выдачи (импорт)"""
+        number = parse_business_id(business_id)
+        if number is not None:
+            prefix = business_id.partition('-')[0]
+            greatest = fn.GREATEST if isinstance(db, MySQLDatabase) else fn.MAX
+            IdSequence.update(next_value=greatest(IdSequence.next_value, number + 1)).where(
+                IdSequence.name == prefix).execute()
+            # Номера блока до этого уже заняты
+            with self._lock:
+                start, end = self._blocks.get(prefix, (0, 0))
+                self._blocks[prefix] = (max(start, number + 1), end)
+
+# Общий экземпляр: блоки номеров кэшируются на все окна приложения
+id_allocator = IdAllocator()
+
+def pattern_columns(pattern):
+    """Значения pattern, pattern_length, pattern_hash для байтов шаблона"""
+    return pattern, len(pattern), hashlib.sha256(pattern).hexdigest()
+
+def signature_text(data, pattern):
+    """Текст сигнатуры по столбцам data и pattern"""
+    if data is not None:
+        return data
+    return bytes(pattern).hex().upper() if pattern is not None else ""
 
 def create_sample_data():
     """Создаем тестовые данные"""
@@ -219,7 +342,7 @@ def create_sample_data():
                 'description': 'Российская компания, специализирующаяся на разработке систем защиты от киберугроз',
                 'country': 'Россия',
                 'website': 'https://www.kaspersky.ru',
-                'manufacturer_id': 'MAN-0001',
+                'manufacturer_id': id_allocator.next_id('MAN'),
                 'creation_date': datetime.now().date()
             },
             {
@@ -227,7 +350,7 @@ def create_sample_data():
                 'description': 'Американская компания, один из пионеров антивирусной индустрии',
                 'country': 'США',
                 'website': 'https://www.norton.com',
-                'manufacturer_id': 'MAN-0002',
+                'manufacturer_id': id_allocator.next_id('MAN'),
                 'creation_date': datetime.now().date()
             },
             {
@@ -235,7 +358,7 @@ def create_sample_data():
                 'description': 'Румынская компания, известная своими технологиями машинного обучения',
                 'country': 'Румыния',
                 'website': 'https://www.bitdefender.com',
-                'manufacturer_id': 'MAN-0003',
+                'manufacturer_id': id_allocator.next_id('MAN'),
                 'creation_date': datetime.now().date()
             }
         ]
@@ -251,7 +374,7 @@ def create_sample_data():
     if Malware.select().count() == 0:
         malware_data = [
             {
-                'malware_id': 'MAL-0001',
+                'malware_id': id_allocator.next_id('MAL'),
                 'name': 'Trojan.Win32.Generic',
                 'description': 'Троянская программа, скрытно устанавливающая вредоносное ПО',
                 'threat_level': 'Высокий',
@@ -259,7 +382,7 @@ def create_sample_data():
                 'malware_type': 'Троян'
             },
             {
-                'malware_id': 'MAL-0002',
+                'malware_id': id_allocator.next_id('MAL'),
                 'name': 'WannaCry',
                 'description': 'Шифровальщик, атаковавший системы по всему миру в 2017 году',
                 'threat_level': 'Критический',
@@ -281,7 +404,7 @@ def create_sample_data():
         manufacturer = Manufacturer.select().first()
         signature_data = [
             {
-                'signature_id': 'SIG-0001',
+                'signature_id': id_allocator.next_id('SIG'),
                 'name': 'Trojan.Generic Signature',
                 'data': '4D5A90000300000004000000FFFF0000',
                 'creation_date': datetime.now().date(),
@@ -297,32 +420,569 @@ def create_sample_data():
             except Exception as e:
                 print(f"Ошибка создания сигнатуры {data['name']}: {e}")
 
-# Инициализируем базу данных при импорте
-db_initialized = initialize_database()
+# МОДУЛЬ МИГРАЦИЙ СХЕМЫ
+class SchemaMigration(BaseModel):
+    """Примененная миграция схемы; наибольший номер - текущая версия схемы"""
+    version = IntegerField(primary_key=True)
+    description = CharField()
+    applied_at = DateTimeField(default=datetime.now)
+    
+    class Meta:
+        table_name = 'schema_migrations'
+
+class ChangeCounter(BaseModel):
+    """Счетчик изменений таблицы: триггеры увеличивают его при каждой вставке, изменении и удалении строки"""
+    name = CharField(primary_key=True, max_length=32)
+    value = BigIntegerField(default=0)
+    
+    class Meta:
+        table_name = 'change_counters'
+
+# Зарегистрированные миграции: (номер, описание, функция, в транзакции ли)
+MIGRATIONS = []
+
+# Сколько строк обновляется за одну транзакцию при заполнении столбцов больших таблиц
+MIGRATION_BATCH_SIZE = 5000
+
+# Сколько секунд ждать, пока миграции применяет другой экземпляр приложения
+MIGRATION_LOCK_TIMEOUT = 60
+
+def migration(version, description, atomic=True):
+    """Регистрирует функцию как миграцию схемы с указанным номером.
+    
+    Миграция с atomic=True выполняется в одной транзакции с записью своей версии.
+    В MySQL DDL-команды фиксируются сразу, поэтому миграции, меняющие структуру
+    больших таблиц, объявляются с atomic=False и пишутся так, чтобы их можно было
+    безопасно перезапустить после сбоя: каждый шаг проверяет, не выполнен ли он уже.
+    """
+    def register(func):
+        if any(existing[0] == version for existing in MIGRATIONS):
+            raise ValueError(f"Миграция {version} уже зарегистрирована")
+        MIGRATIONS.append((version, description, func, atomic))
+        MIGRATIONS.sort(key=lambda existing: existing[0])
+        return func
+    return register
+
+def latest_schema_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def schema_version():
+    """Текущая версия схемы (один запрос) или None, если таблицы миграций еще нет"""
+    try:
+        return db.execute_sql("SELECT MAX(version) FROM schema_migrations").fetchone()[0] or 0
+    except DatabaseError:
+        return None
+
+def online_alter(table, clause):
+    """ALTER TABLE без блокировки записи в таблицу (ALGORITHM=INPLACE, LOCK=NONE).
+    
+    Если сервер не может выполнить изменение на месте (например, внешний ключ
+    при включенной проверке ключей), изменение выполняется обычным способом.
+    """
+    try:
+        db.execute_sql(f"ALTER TABLE {table} {clause}, ALGORITHM=INPLACE, LOCK=NONE")
+    except DatabaseError as e:
+        print(f"Изменение {table} без блокировки недоступно ({e}), выполняется с копированием таблицы")
+        db.execute_sql(f"ALTER TABLE {table} {clause}")
+
+def update_in_batches(table, assignment, params=(), condition=None, batch_size=None):
+    """UPDATE таблицы порциями по первичному ключу, каждая порция в своей транзакции,
+    чтобы не держать блокировки всех строк большой таблицы до конца обновления"""
+    batch_size = batch_size or MIGRATION_BATCH_SIZE
+    low, high = db.execute_sql(f"SELECT MIN(id), MAX(id) FROM {table}").fetchone()
+    if low is None:
+        return
+    where = f"id BETWEEN {db.param} AND {db.param}" + (f" AND ({condition})" if condition else "")
+    for start in range(low, high + 1, batch_size):
+        with db.atomic():
+            db.execute_sql(f"UPDATE {table} SET {assignment} WHERE {where}",
+                           tuple(params) + (start, start + batch_size - 1))
+
+def add_manufacturer_foreign_key(table):
+    """Добавляет внешний ключ manufacturer_id -> manufacturers.id, если его еще нет"""
+    if not any(key.column == 'manufacturer_id' for key in db.get_foreign_keys(table)):
+        online_alter(table, f"ADD CONSTRAINT fk_{table}_manufacturer FOREIGN KEY (manufacturer_id) "
+                            f"REFERENCES manufacturers(id) ON DELETE CASCADE")
+
+@migration(1, "Базовая схема: производители, товары, ВП, сигнатуры")
+def migrate_base_schema():
+    db.create_tables([Manufacturer, Malware, Product, Signature], safe=True)
+
+@migration(2, "products.manufacturer_id для баз, созданных до появления связи с производителем", atomic=False)
+def migrate_product_manufacturer():
+    columns = {column.name for column in db.get_columns('products')}
+    if 'manufacturer_id' not in columns:
+        online_alter('products', "ADD COLUMN manufacturer_id INT NULL")
+    
+    # Товарам без производителя назначаем первого, как делала прежняя проверка структуры
+    first_manufacturer = Manufacturer.select(Manufacturer.id).order_by(Manufacturer.id).first()
+    if first_manufacturer:
+        update_in_batches('products', f"manufacturer_id = {db.param}", (first_manufacturer.id,),
+                          condition="manufacturer_id IS NULL")
+    add_manufacturer_foreign_key('products')
+
+@migration(3, "signatures.manufacturer_id: тип INT без потери связей", atomic=False)
+def migrate_signature_manufacturer_type():
+    columns = {column.name: column for column in db.get_columns('signatures')}
+    column = columns.get('manufacturer_id')
+    if column is not None and column.data_type.upper() in ('INT', 'INTEGER'):
+        add_manufacturer_foreign_key('signatures')
+        return
+    
+    # Вместо DROP/ADD столбца (таблица перестраивается, связи теряются) заполняем
+    # новый столбец порциями и подменяем им старый
+    if 'manufacturer_ref' not in columns:
+        online_alter('signatures', "ADD COLUMN manufacturer_ref INT NULL")
+    if column is not None:
+        # Старый столбец мог хранить как id, так и код производителя (MAN-0001)
+        update_in_batches('signatures',
+                          "manufacturer_ref = (SELECT m.id FROM manufacturers m "
+                          "WHERE m.manufacturer_id = signatures.manufacturer_id "
+                          "OR CAST(m.id AS CHAR) = signatures.manufacturer_id LIMIT 1)")
+        online_alter('signatures', "DROP COLUMN manufacturer_id, CHANGE COLUMN manufacturer_ref manufacturer_id INT NULL")
+    else:
+        online_alter('signatures', "CHANGE COLUMN manufacturer_ref manufacturer_id INT NULL")
+    add_manufacturer_foreign_key('signatures')
+
+def create_missing_indexes(model):
+    """Добавляет объявленные в модели индексы, которых еще нет в таблице.
+    
+    Вторичный индекс InnoDB строит без блокировки записи, поэтому используется online_alter.
+    """
+    if not isinstance(db, MySQLDatabase):
+        # SQLite (замеры и проверки) поддерживает CREATE INDEX IF NOT EXISTS
+        model._schema.create_indexes(safe=True)
+        return
+    
+    table = model._meta.table_name
+    existing = {index.name for index in db.get_indexes(table)}
+    for index in model._meta.fields_to_index():
+        if index._name in existing:
+            continue
+        columns = ', '.join(field.column_name for field in index._expressions)
+        kind = 'UNIQUE INDEX' if index._unique else 'INDEX'
+        print(f"Создается индекс {index._name} ({columns}) в таблице {table}")
+        online_alter(table, f"ADD {kind} {index._name} ({columns})")
+
+@migration(4, "Индексы по столбцам фильтров и сортировки", atomic=False)
+def migrate_filter_indexes():
+    for model in (Manufacturer, Product, Malware, Signature):
+        create_missing_indexes(model)
+
+@migration(5, "Счетчики идентификаторов MAN/PROD/MAL/SIG")
+def migrate_id_sequences():
+    db.create_tables([IdSequence], safe=True)
+    for prefix, field in ID_FIELDS.items():
+        # Единственный раз номера берутся из существующих записей; числовой MAX, а не строковый,
+        # иначе MAL-9999 окажется больше MAL-10000
+        table, column = field.model._meta.table_name, field.column_name
+        last = db.execute_sql(
+            f"SELECT MAX(CAST(SUBSTR({column}, {len(prefix) + 2}) AS UNSIGNED)) FROM {table} "
+            f"WHERE {column} LIKE {db.param}", (f"{prefix}-%",)).fetchone()[0]
+        IdSequence.insert(name=prefix, next_value=int(last or 0) + 1).on_conflict_ignore().execute()
+
+def create_trigger(name, timing, event, table, statements):
+    """Создает (в MySQL - пересоздает) строчный триггер из нескольких SQL-команд"""
+    body = ' '.join(f"{statement};" for statement in statements)
+    if isinstance(db, MySQLDatabase):
+        db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+        db.execute_sql(f"CREATE TRIGGER {name} {timing} {event} ON {table} FOR EACH ROW BEGIN {body} END")
+    else:
+        db.execute_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {timing} {event} ON {table} BEGIN {body} END")
+
+def create_change_triggers(table):
+    """Триггеры, которые увеличивают счетчик изменений таблицы в change_counters"""
+    ChangeCounter.insert(name=table, value=0).on_conflict_ignore().execute()
+    body = f"UPDATE change_counters SET value = value + 1 WHERE name = '{table}'"
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        create_trigger(f"{table}_{event.lower()}_counter", 'AFTER', event, table, [body])
+
+@migration(6, "Счетчик изменений сигнатур для пересборки файла сигнатур", atomic=False)
+def migrate_signature_change_counter():
+    db.create_tables([ChangeCounter], safe=True)
+    create_change_triggers('signatures')
+
+@migration(7, "Шаблоны сигнатур в двоичном виде с длиной и хэшем", atomic=False)
+def migrate_signature_patterns():
+    columns = {column.name: column for column in db.get_columns('signatures')}
+    for name, definition in (('pattern', "BLOB NULL"), ('pattern_length', "INT NULL"),
+                             ('pattern_hash', "VARCHAR(64) NULL")):
+        if name not in columns:
+            online_alter('signatures', f"ADD COLUMN {name} {definition}")
+    if isinstance(db, MySQLDatabase) and not columns['data'].null:
+        online_alter('signatures', "MODIFY data TEXT NULL")
+    create_missing_indexes(Signature)
+
+    # Hex-текст переводится в байты на стороне приложения порциями по id;
+    # строки, которые не разбираются как hex, остаются текстовыми
+    low, high = db.execute_sql("SELECT MIN(id), MAX(id) FROM signatures").fetchone()
+    if low is None:
+        return
+    for start in range(low, high + 1, MIGRATION_BATCH_SIZE):
+        rows = db.execute_sql(
+            f"SELECT id, data FROM signatures WHERE id BETWEEN {db.param} AND {db.param} "
+            f"AND pattern IS NULL AND data IS NOT NULL", (start, start + MIGRATION_BATCH_SIZE - 1)).fetchall()
+        with db.atomic():
+            for signature_pk, data in rows:
+                pattern = parse_signature_pattern(data)
+                if pattern is None:
+                    continue
+                db.execute_sql(
+                    f"UPDATE signatures SET pattern = {db.param}, pattern_length = {db.param}, "
+                    f"pattern_hash = {db.param}, data = NULL WHERE id = {db.param}",
+                    (*pattern_columns(pattern), signature_pk))
+
+@migration(8, "Материализованная статистика: итоги и группы, триггеры и первичный пересчет", atomic=False)
+def migrate_statistics():
+    db.create_tables([StatsSummary, StatsGroup], safe=True)
+    create_stats_triggers()
+    reconcile_statistics()
+
+@migration(9, "Счетчики изменений производителей, товаров и ВП для проверки справочников", atomic=False)
+def migrate_reference_change_counters():
+    for table in ('manufacturers', 'products', 'malware'):
+        create_change_triggers(table)
+
+def apply_migration(version, description, func, atomic):
+    print(f"Применяется миграция {version}: {description}")
+    if atomic:
+        with db.atomic():
+            func()
+            SchemaMigration.create(version=version, description=description)
+    else:
+        func()
+        SchemaMigration.create(version=version, description=description)
+
+def migrate(target=None):
+    """Применяет недостающие миграции по порядку и возвращает номера примененных.
+    
+    При актуальной схеме выполняется один запрос. Иначе берется именованная
+    блокировка MySQL, чтобы одновременно запущенные экземпляры приложения
+    не применяли одну миграцию дважды.
+    """
+    target = latest_schema_version() if target is None else target
+    current = schema_version()
+    if current is not None and current >= target:
+        if current > latest_schema_version():
+            print(f"Версия схемы БД ({current}) новее версии приложения ({latest_schema_version()})")
+        return []
+    
+    use_lock = isinstance(db, MySQLDatabase)
+    if use_lock:
+        locked = db.execute_sql("SELECT GET_LOCK('schema_migrations', %s)", (MIGRATION_LOCK_TIMEOUT,)).fetchone()[0]
+        if not locked:
+            raise RuntimeError("Не дождались блокировки: миграции применяет другой экземпляр приложения")
+    try:
+        db.create_tables([SchemaMigration], safe=True)
+        current = schema_version() or 0
+        applied = []
+        for version, description, func, atomic in MIGRATIONS:
+            if current < version <= target:
+                apply_migration(version, description, func, atomic)
+                applied.append(version)
+        return applied
+    finally:
+        if use_lock:
+            db.execute_sql("SELECT RELEASE_LOCK('schema_migrations')")
+
+# Частые запросы страниц и отчетов: каждый должен выполняться по индексу
+HOT_QUERIES = [
+    ("ВП по уровню опасности и году",
+     lambda: ListFilter().equals(Malware.threat_level, 'Высокий').year(Malware.discovery_date, date.today().year)
+                         .apply(Malware.select())),
+    ("ВП по типу", lambda: ListFilter().equals(Malware.malware_type, 'Троян').apply(Malware.select())),
+    ("ВП по году обнаружения", lambda: ListFilter().year(Malware.discovery_date, date.today().year).apply(Malware.select())),
+    ("Сигнатуры ВП по году", lambda: ListFilter().equals(Signature.malware, 1).year(Signature.creation_date, date.today().year)
+                                                 .apply(Signature.select())),
+    ("Сигнатуры по году создания", lambda: ListFilter().year(Signature.creation_date, date.today().year).apply(Signature.select())),
+    ("Товары производителя по году", lambda: ListFilter().equals(Product.manufacturer, 1).year(Product.release_date, date.today().year)
+                                                         .apply(Product.select())),
+    ("Товары по году выпуска", lambda: ListFilter().year(Product.release_date, date.today().year).apply(Product.select())),
+    ("Производители по стране", lambda: Manufacturer.select().where(Manufacturer.country == 'Россия')),
+    ("Производитель по названию", lambda: Manufacturer.select(Manufacturer.id).where(Manufacturer.name == 'Kaspersky Lab')),
+]
+
+# Таблицы меньше этого размера оптимизатор MySQL читает целиком даже при наличии индекса
+EXPLAIN_MIN_ROWS = 1000
+
+def explain_full_scans(query):
+    """Таблицы, которые запрос читает полным сканированием, по плану EXPLAIN"""
+    sql, params = query.sql()
+    if isinstance(db, SqliteDatabase):
+        plan = db.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        return [row[-1] for row in plan if row[-1].startswith('SCAN ') and 'INDEX' not in row[-1]]
+    cursor = db.execute_sql(f"EXPLAIN {sql}", params)
+    names = [column[0] for column in cursor.description]
+    plan = [dict(zip(names, row)) for row in cursor.fetchall()]
+    return [row['table'] for row in plan if row['type'] == 'ALL' and (row['rows'] or 0) >= EXPLAIN_MIN_ROWS]
+
+def check_hot_queries():
+    """Проверяет планы HOT_QUERIES; возвращает список (описание запроса, таблицы с полным сканированием)"""
+    problems = []
+    for description, build_query in HOT_QUERIES:
+        scans = explain_full_scans(build_query())
+        if scans:
+            problems.append((description, scans))
+    return problems
+
+# База данных инициализируется в фоне после открытия главного окна (DatabaseInitJob)
+db_initialized = False
+
+class DatabaseInitSignals(QObject):
+    finished = pyqtSignal(bool, str)   # успех, текст ошибки
+
+class DatabaseInitJob(QRunnable):
+    """Подключение к БД и проверка схемы в пуле потоков, чтобы окно открывалось сразу"""
+    
+    def __init__(self):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = DatabaseInitSignals()
+    
+    def run(self):
+        global db_initialized
+        try:
+            db_initialized = initialize_database()
+        except Exception as e:
+            logger.error(f"Ошибка инициализации базы данных: {e}")
+            db_initialized = False
+        finally:
+            # Подключение рабочего потока возвращаем в пул
+            if not db.is_closed():
+                db.close()
+        self.signals.finished.emit(db_initialized, db_init_error or "")
+
+class QueryCounter:
+    """Подсчитывает SQL-запросы текущего потока, выполненные через базу данных внутри блока with.
+    
+    Обертка над execute_sql ставится на базу один раз и учитывает только счетчики
+    того потока, который выполняет запрос, поэтому параллельные экспорты не мешают друг другу.
+    """
+    
+    _active = threading.local()
+    _install_lock = threading.Lock()
+    
+    def __init__(self, database):
+        self.database = database
+        self.count = 0
+    
+    @classmethod
+    def _install(cls, database):
+        with cls._install_lock:
+            if getattr(database, '_query_counter_installed', False):
+                return
+            
+            original_execute_sql = database.execute_sql
+            
+            def counting_execute_sql(sql, params=None, *args, **kwargs):
+                for counter in getattr(cls._active, 'counters', ()):
+                    if counter.database is database:
+                        counter.count += 1
+                return original_execute_sql(sql, params, *args, **kwargs)
+            
+            database.execute_sql = counting_execute_sql
+            database._query_counter_installed = True
+    
+    def __enter__(self):
+        self._install(self.database)
+        self.count = 0
+        if not hasattr(self._active, 'counters'):
+            self._active.counters = []
+        self._active.counters.append(self)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._active.counters.remove(self)
+        return False
+
+class ExportCancelled(BaseException):
+    """Экспорт отменен пользователем.
+    
+    Наследуется от BaseException, чтобы общие обработчики except Exception
+    внутри генераторов отчетов не превращали отмену в обычную ошибку.
+    """
+
+class ExportProgress:
+    """Счетчик обработанных строк экспорта с поддержкой отмены.
+    
+    callback(done, total) вызывается не чаще чем раз в step строк; при установленном
+    cancel_event очередной вызов advance() прерывает экспорт исключением ExportCancelled.
+    """
+    
+    def __init__(self, callback=None, cancel_event=None, step=200):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.step = step
+        self.total = 0
+        self.done = 0
+        self._reported = 0
+    
+    def advance(self, rows=1):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ExportCancelled()
+        
+        self.done += rows
+        if self.callback and (self.done - self._reported >= self.step or self.done >= self.total):
+            self._reported = self.done
+            self.callback(self.done, self.total)
+
+def count_export_rows():
+    """Количество строк, которые выгружают табличные экспорты (все четыре таблицы)"""
+    return (Manufacturer.select().count() + Product.select().count() +
+            Malware.select().count() + Signature.select().count())
 
 # МОДУЛЬ ЭКСПОРТА В EXCEL
+
+# Начиная с этого количества записей GUI экспортирует в потоковом режиме
+STREAMING_EXPORT_THRESHOLD = 50000
+
+# Цвета ячеек уровня опасности; для неизвестных уровней используется THREAT_LEVEL_DEFAULT_COLOR
+THREAT_LEVEL_COLORS = {
+    'Критический': {'bg_color': '#FF0000', 'font_color': 'white'},
+    'Высокий': {'bg_color': '#FF6B6B'},
+    'Средний': {'bg_color': '#FFD966'},
+    'Низкий': {'bg_color': '#A9D08E'},
+}
+THREAT_LEVEL_DEFAULT_COLOR = {'bg_color': '#A9D08E'}
+
+class RowOrderedWorksheet:
+    """Буфер листа для режима constant_memory.
+    
+    В этом режиме xlsxwriter сбрасывает строку на диск, как только начата следующая,
+    и молча игнорирует запись в уже пройденные строки. Небольшие листы (аналитика,
+    визуализация) заполняются не по порядку, поэтому их ячейки копятся здесь и
+    выгружаются по возрастанию номера строки в flush().
+    """
+    
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self._rows = {}
+    
+    def __getattr__(self, name):
+        # set_column, freeze_panes, insert_chart и т.п. не зависят от порядка строк
+        return getattr(self.worksheet, name)
+    
+    def write(self, row, col, *args):
+        self._rows.setdefault(row, []).append(('write', (row, col) + args))
+    
+    def merge_range(self, first_row, *args):
+        if isinstance(first_row, str):
+            row = xl_cell_to_rowcol(first_row.split(':')[0])[0]
+        else:
+            row = first_row
+        self._rows.setdefault(row, []).append(('merge_range', (first_row,) + args))
+    
+    def flush(self):
+        for row in sorted(self._rows):
+            for method, args in self._rows[row]:
+                getattr(self.worksheet, method)(*args)
+        self._rows = {}
+
 class ExcelExporter:
-    def __init__(self, filename="antivirus_report.xlsx"):
+    def __init__(self, filename="antivirus_report.xlsx", streaming=False, chunk_size=5000):
         self.filename = filename
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.query_count = 0
+        self.progress = ExportProgress()
+        self._buffered_sheets = []
+        self._threat_palette = None
+    
+    def count_progress_rows(self):
+        return count_export_rows()
     
     def export_all_data(self):
         """Экспорт всех данных проекта в Excel"""
+        workbook = None
         try:
-            workbook = xlsxwriter.Workbook(self.filename)
+            # В потоковом режиме строки сразу уходят во временные файлы, а не копятся в памяти
+            options = {'constant_memory': True} if self.streaming else {}
+            workbook = xlsxwriter.Workbook(self.filename, options)
+            self._buffered_sheets = []
+            self._threat_palette = None
+            
+            with QueryCounter(Manufacturer._meta.database) as counter:
+                # Создаем обязательные листы в правильном порядке
+                self._create_project_data_sheet(workbook)
+                self._create_analytics_sheet(workbook)  # Аналитика должна быть второй
+                self._create_visualization_sheet(workbook)
             
-            # Создаем обязательные листы в правильном порядке
-            self._create_project_data_sheet(workbook)
-            self._create_analytics_sheet(workbook)  # Аналитика должна быть второй
-            self._create_visualization_sheet(workbook)
+            for sheet in self._buffered_sheets:
+                sheet.flush()
+            
+            self.query_count = counter.count
+            print(f"Экспорт выполнен за {self.query_count} SQL-запросов")
             
             workbook.close()
             return True, self.filename
+        except ExportCancelled:
+            # Закрываем книгу, чтобы удалить временные файлы, и убираем недописанный отчет
+            if workbook is not None:
+                try:
+                    workbook.close()
+                    os.remove(self.filename)
+                except Exception:
+                    pass
+            raise
         except Exception as e:
             print(f"Ошибка при экспорте: {e}")
             import traceback
             print(f"Подробности ошибки: {traceback.format_exc()}")
             return False, str(e)
     
+    def _add_worksheet(self, workbook, name):
+        """Лист, в который можно писать в любом порядке строк"""
+        worksheet = workbook.add_worksheet(name)
+        if not self.streaming:
+            return worksheet
+        
+        buffered = RowOrderedWorksheet(worksheet)
+        self._buffered_sheets.append(buffered)
+        return buffered
+    
+    def _threat_format(self, workbook, threat_level):
+        """Формат ячейки уровня опасности.
+        
+        Палитра создается один раз на книгу и общая для всех листов: каждый вызов
+        add_format добавляет стиль в книгу, поэтому создавать формат на строку нельзя.
+        """
+        if self._threat_palette is None:
+            self._threat_palette = {
+                level: workbook.add_format({'border': 1, **colors})
+                for level, colors in THREAT_LEVEL_COLORS.items()
+            }
+            self._threat_palette[None] = workbook.add_format({'border': 1, **THREAT_LEVEL_DEFAULT_COLOR})
+        
+        return self._threat_palette.get(threat_level, self._threat_palette[None])
+    
+    def _iter_rows(self, query, key_field):
+        """Строки запроса в виде кортежей, первым столбцом должен идти key_field.
+        
+        В обычном режиме - один запрос без кэширования результатов в объекте запроса.
+        В потоковом режиме строки читаются порциями по chunk_size с пагинацией по ключу,
+        поэтому в памяти одновременно находится не больше одной порции.
+        """
+        if not self.streaming:
+            yield from query.tuples().iterator()
+            return
+        
+        last_key = None
+        while True:
+            chunk_query = query.order_by(key_field).limit(self.chunk_size)
+            if last_key is not None:
+                chunk_query = chunk_query.where(key_field > last_key)
+            
+            rows = list(chunk_query.tuples())
+            yield from rows
+            
+            if len(rows) < self.chunk_size:
+                break
+            last_key = rows[-1][0]
+    
+    def _manufacturers_with_product_counts(self):
+        """Производители с количеством продуктов из материализованной статистики"""
+        return manufacturers_with_product_counts()
+    
     def _create_project_data_sheet(self, workbook):
         """Лист 1: Данные проекта"""
         worksheet = workbook.add_worksheet('Данные проекта')
@@ -392,20 +1052,25 @@ class ExcelExporter:
         for col, header in enumerate(headers):
             worksheet.write(start_row + 1, col, header, header_format)
         
-        manufacturers = Manufacturer.select()
+        manufacturers = (Manufacturer
+                         .select(Manufacturer.id, Manufacturer.manufacturer_id, Manufacturer.name,
+                                 Manufacturer.country, Manufacturer.website, Manufacturer.creation_date,
+                                 fn.COUNT(Product.id), Manufacturer.description)
+                         .join(Product, JOIN.LEFT_OUTER, on=(Product.manufacturer == Manufacturer.id))
+                         .group_by(Manufacturer.id))
         current_row = start_row + 2
         
-        for manufacturer in manufacturers:
-            products_count = Product.select().where(Product.manufacturer == manufacturer).count()
-            
-            worksheet.write(current_row, 0, manufacturer.manufacturer_id, center_format)
-            worksheet.write(current_row, 1, manufacturer.name, cell_format)
-            worksheet.write(current_row, 2, manufacturer.country, cell_format)
-            worksheet.write(current_row, 3, manufacturer.website, cell_format)
-            worksheet.write(current_row, 4, manufacturer.creation_date, date_format)
+        for (_, manufacturer_id, name, country, website, creation_date,
+             products_count, description) in self._iter_rows(manufacturers, Manufacturer.id):
+            worksheet.write(current_row, 0, manufacturer_id, center_format)
+            worksheet.write(current_row, 1, name, cell_format)
+            worksheet.write(current_row, 2, country, cell_format)
+            worksheet.write(current_row, 3, website, cell_format)
+            worksheet.write(current_row, 4, creation_date, date_format)
             worksheet.write(current_row, 5, products_count, center_format)
-            worksheet.write(current_row, 6, manufacturer.description, cell_format)
+            worksheet.write(current_row, 6, description, cell_format)
             current_row += 1
+            self.progress.advance()
         
         return current_row
 
@@ -417,18 +1082,25 @@ class ExcelExporter:
         for col, header in enumerate(headers):
             worksheet.write(start_row + 1, col, header, header_format)
         
-        products = Product.select()
+        # Производитель подгружается тем же запросом, без обращения к БД на каждую строку
+        products = (Product
+                    .select(Product.id, Product.product_id, Product.name, Manufacturer.name,
+                            Product.version, Product.update_size, Product.release_date,
+                            Product.description)
+                    .join(Manufacturer, on=(Product.manufacturer == Manufacturer.id)))
         current_row = start_row + 2
         
-        for product in products:
-            worksheet.write(current_row, 0, product.product_id, center_format)
-            worksheet.write(current_row, 1, product.name, cell_format)
-            worksheet.write(current_row, 2, product.manufacturer.name, cell_format)
-            worksheet.write(current_row, 3, product.version, center_format)
-            worksheet.write(current_row, 4, product.update_size, center_format)
-            worksheet.write(current_row, 5, product.release_date, date_format)
-            worksheet.write(current_row, 6, product.description, cell_format)
+        for (_, product_id, name, manufacturer_name, version, update_size,
+             release_date, description) in self._iter_rows(products, Product.id):
+            worksheet.write(current_row, 0, product_id, center_format)
+            worksheet.write(current_row, 1, name, cell_format)
+            worksheet.write(current_row, 2, manufacturer_name, cell_format)
+            worksheet.write(current_row, 3, version, center_format)
+            worksheet.write(current_row, 4, update_size, center_format)
+            worksheet.write(current_row, 5, release_date, date_format)
+            worksheet.write(current_row, 6, description, cell_format)
             current_row += 1
+            self.progress.advance()
         
         return current_row
 
@@ -440,31 +1112,29 @@ class ExcelExporter:
         for col, header in enumerate(headers):
             worksheet.write(start_row + 1, col, header, header_format)
         
-        malware_list = Malware.select()
+        # Количество сигнатур считается в том же запросе через GROUP BY
+        malware_list = (Malware
+                        .select(Malware.id, Malware.malware_id, Malware.name, Malware.malware_type,
+                                Malware.threat_level, Malware.discovery_date,
+                                fn.COUNT(Signature.id), Malware.description)
+                        .join(Signature, JOIN.LEFT_OUTER, on=(Signature.malware == Malware.id))
+                        .group_by(Malware.id))
         current_row = start_row + 2
         
-        for malware in malware_list:
-            signatures_count = Signature.select().where(Signature.malware == malware).count()
-            
+        for (_, malware_id, name, malware_type, threat_level, discovery_date,
+             signatures_count, description) in self._iter_rows(malware_list, Malware.id):
             # Условное форматирование для уровня опасности
-            threat_format = cell_format
-            if malware.threat_level == 'Критический':
-                threat_format = workbook.add_format({'border': 1, 'bg_color': '#FF0000', 'font_color': 'white'})
-            elif malware.threat_level == 'Высокий':
-                threat_format = workbook.add_format({'border': 1, 'bg_color': '#FF6B6B'})
-            elif malware.threat_level == 'Средний':
-                threat_format = workbook.add_format({'border': 1, 'bg_color': '#FFD966'})
-            else:
-                threat_format = workbook.add_format({'border': 1, 'bg_color': '#A9D08E'})
+            threat_format = self._threat_format(workbook, threat_level)
             
-            worksheet.write(current_row, 0, malware.malware_id, center_format)
-            worksheet.write(current_row, 1, malware.name, cell_format)
-            worksheet.write(current_row, 2, malware.malware_type, cell_format)
-            worksheet.write(current_row, 3, malware.threat_level, threat_format)
-            worksheet.write(current_row, 4, malware.discovery_date, date_format)
+            worksheet.write(current_row, 0, malware_id, center_format)
+            worksheet.write(current_row, 1, name, cell_format)
+            worksheet.write(current_row, 2, malware_type, cell_format)
+            worksheet.write(current_row, 3, threat_level, threat_format)
+            worksheet.write(current_row, 4, discovery_date, date_format)
             worksheet.write(current_row, 5, signatures_count, center_format)
-            worksheet.write(current_row, 6, malware.description, cell_format)
+            worksheet.write(current_row, 6, description, cell_format)
             current_row += 1
+            self.progress.advance()
         
         return current_row
 
@@ -476,24 +1146,32 @@ class ExcelExporter:
         for col, header in enumerate(headers):
             worksheet.write(start_row + 1, col, header, header_format)
         
-        signatures = Signature.select()
+        # Связанные ВП и производители подгружаются тем же запросом
+        signatures = (Signature
+                      .select(Signature.id, Signature.signature_id, Signature.name,
+                              Malware.malware_id, Malware.name, Manufacturer.name,
+                              Signature.creation_date, Signature.data, Signature.pattern)
+                      .join(Malware, on=(Signature.malware == Malware.id))
+                      .switch(Signature)
+                      .join(Manufacturer, JOIN.LEFT_OUTER, on=(Signature.manufacturer == Manufacturer.id)))
         current_row = start_row + 2
         
-        for signature in signatures:
-            manufacturer_name = signature.manufacturer.name if signature.manufacturer else "Не указан"
-            worksheet.write(current_row, 0, signature.signature_id, center_format)
-            worksheet.write(current_row, 1, signature.name, cell_format)
-            worksheet.write(current_row, 2, f"{signature.malware.malware_id} - {signature.malware.name}", cell_format)
-            worksheet.write(current_row, 3, manufacturer_name, cell_format)
-            worksheet.write(current_row, 4, signature.creation_date, date_format)
-            worksheet.write(current_row, 5, signature.data, cell_format)
+        for (_, signature_id, name, malware_id, malware_name, manufacturer_name,
+             creation_date, data, pattern) in self._iter_rows(signatures, Signature.id):
+            worksheet.write(current_row, 0, signature_id, center_format)
+            worksheet.write(current_row, 1, name, cell_format)
+            worksheet.write(current_row, 2, f"{malware_id} - {malware_name}", cell_format)
+            worksheet.write(current_row, 3, manufacturer_name or "Не указан", cell_format)
+            worksheet.write(current_row, 4, creation_date, date_format)
+            worksheet.write(current_row, 5, signature_text(data, pattern), cell_format)
             current_row += 1
+            self.progress.advance()
         
         return current_row
     
     def _create_analytics_sheet(self, workbook):
         """Лист 2: Аналитика - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
-        worksheet = workbook.add_worksheet('Аналитика')
+        worksheet = self._add_worksheet(workbook, 'Аналитика')
 
         # Устанавливаем ширину колонок
         worksheet.set_column('A:A', 25)  # Производитель/Тип ВП
@@ -538,8 +1216,8 @@ class ExcelExporter:
         for col, header in enumerate(headers):
             worksheet.write(start_row + 1, col, header, header_format)
         
-        manufacturers = Manufacturer.select()
-        total_products = Product.select().count()
+        manufacturers = list(self._manufacturers_with_product_counts())
+        total_products = sum(manufacturer.products_count for manufacturer in manufacturers)
         
         # Форматы
         int_format = workbook.add_format({'border': 1, 'align': 'center', 'num_format': '0'})
@@ -548,7 +1226,7 @@ class ExcelExporter:
         
         current_row = start_row + 2
         for manufacturer in manufacturers:
-            products_count = Product.select().where(Product.manufacturer == manufacturer).count()
+            products_count = manufacturer.products_count
             market_share = (products_count / total_products) if total_products > 0 else 0
             
             worksheet.write(current_row, 0, manufacturer.name, text_format)
@@ -572,51 +1250,51 @@ class ExcelExporter:
         int_format = workbook.add_format({'border': 1, 'align': 'center', 'num_format': '0'})
         text_format = workbook.add_format({'border': 1, 'align': 'left'})
         
-        # Группировка по типам
-        from peewee import fn
-        malware_stats = (Malware
-                        .select(Malware.malware_type, fn.COUNT(Malware.id).alias('count'))
-                        .group_by(Malware.malware_type))
-        
-        today = datetime.now().date()
-        
         current_row = start_row + 2
-        for stat in malware_stats:
-            # Находим самый распространенный уровень опасности для этого типа
-            common_threat = (Malware
-                        .select(Malware.threat_level)
-                        .where(Malware.malware_type == stat.malware_type)
-                        .group_by(Malware.threat_level)
-                        .order_by(fn.COUNT(Malware.id).desc())
-                        .first())
-            
-            # Вычисляем средний возраст
-            try:
-                discovery_dates = (Malware
-                                .select(Malware.discovery_date)
-                                .where(Malware.malware_type == stat.malware_type))
-                
-                total_days = 0
-                count = 0
-                
-                for malware in discovery_dates:
-                    if malware.discovery_date:
-                        days_diff = (today - malware.discovery_date).days
-                        total_days += days_diff
-                        count += 1
-                
-                avg_age = total_days / count if count > 0 else 0
-            except Exception as e:
-                print(f"Ошибка расчета среднего возраста: {e}")
-                avg_age = 0
-            
-            worksheet.write(current_row, 0, stat.malware_type, text_format)
-            worksheet.write(current_row, 1, stat.count, int_format)
-            worksheet.write(current_row, 2, common_threat.threat_level if common_threat else 'Н/Д', text_format)
-            worksheet.write(current_row, 3, int(avg_age), int_format)
+        for (malware_type, count, common_threat, avg_age,
+             first_discovered, last_discovered) in self._malware_type_stats(datetime.now().date()):
+            worksheet.write(current_row, 0, malware_type, text_format)
+            if first_discovered:
+                worksheet.write_comment(current_row, 0, f"Обнаружены с {first_discovered} по {last_discovered}")
+            worksheet.write(current_row, 1, count, int_format)
+            if common_threat:
+                worksheet.write(current_row, 2, common_threat, self._threat_format(workbook, common_threat))
+            else:
+                worksheet.write(current_row, 2, 'Н/Д', text_format)
+            worksheet.write(current_row, 3, int(avg_age or 0), int_format)
             current_row += 1
         
         return current_row
+    
+    def _malware_type_stats(self, today):
+        """Статистика по типам ВП одним запросом: (тип, количество, самый частый уровень опасности,
+        средний возраст в днях, первая и последняя дата обнаружения).
+        
+        Группы (тип, уровень) сворачиваются оконными функциями по типу, поэтому стоимость
+        запроса не зависит от того, сколько ВП каждого типа нужно было бы читать в Python.
+        """
+        by_type = [Malware.malware_type]
+        level_count = fn.COUNT(Malware.id)
+        ranked = (Malware
+                  .select(Malware.malware_type, Malware.threat_level,
+                          fn.SUM(level_count).over(partition_by=by_type).alias('type_count'),
+                          fn.ROW_NUMBER().over(partition_by=by_type,
+                                               order_by=[level_count.desc(), Malware.threat_level])
+                          .alias('threat_rank'),
+                          # Средний возраст - по ВП с датой обнаружения, как AVG по строкам
+                          (fn.SUM(fn.SUM(days_between(Malware.discovery_date, today))).over(partition_by=by_type) /
+                           fn.SUM(fn.COUNT(Malware.discovery_date)).over(partition_by=by_type)).alias('avg_age'),
+                          fn.MIN(fn.MIN(Malware.discovery_date)).over(partition_by=by_type).alias('first_discovered'),
+                          fn.MAX(fn.MAX(Malware.discovery_date)).over(partition_by=by_type).alias('last_discovered'))
+                  .group_by(Malware.malware_type, Malware.threat_level)
+                  .alias('ranked'))
+        return (Malware
+                .select(ranked.c.malware_type, ranked.c.type_count, ranked.c.threat_level, ranked.c.avg_age,
+                        ranked.c.first_discovered, ranked.c.last_discovered)
+                .from_(ranked)
+                .where(ranked.c.threat_rank == 1)
+                .order_by(ranked.c.malware_type)
+                .tuples())
 
     def _add_summary_table(self, worksheet, workbook, start_row, header_format):
         """Сводная таблица - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
@@ -627,29 +1305,19 @@ class ExcelExporter:
         for col, header in enumerate(headers):
             worksheet.write(start_row + 1, col, header, header_format)
         
-        # Получаем актуальные данные
-        total_manufacturers = Manufacturer.select().count()
-        total_products = Product.select().count()
-        total_malware = Malware.select().count()
-        total_signatures = Signature.select().count()
-        countries_count = len(set(m.country for m in Manufacturer.select()))
-        malware_types = len(set(m.malware_type for m in Malware.select()))
-        
-        # Получаем распределение по уровням опасности
-        threat_levels = {
-            'Критический': Malware.select().where(Malware.threat_level == 'Критический').count(),
-            'Высокий': Malware.select().where(Malware.threat_level == 'Высокий').count(),
-            'Средний': Malware.select().where(Malware.threat_level == 'Средний').count(),
-            'Низкий': Malware.select().where(Malware.threat_level == 'Низкий').count()
-        }
+        # Итоги и распределение по уровням опасности из материализованной статистики
+        summary = read_statistics()
+        threat_counts = statistics_group('threat_level')
+        threat_levels = {level: threat_counts.get(level, 0)
+                         for level in ('Критический', 'Высокий', 'Средний', 'Низкий')}
         
         stats = [
-            ('Всего производителей', total_manufacturers, 'Уникальных компаний'),
-            ('Всего антивирусов', total_products, 'Записей в каталоге'),
-            ('Всего вредоносных программ', total_malware, 'Известных ВП'),
-            ('Всего сигнатур', total_signatures, 'Шаблонов обнаружения'),
-            ('Страны производителей', countries_count, 'Уникальных стран'),
-            ('Типы вредоносных программ', malware_types, 'Категорий ВП'),
+            ('Всего производителей', summary.manufacturers, 'Уникальных компаний'),
+            ('Всего антивирусов', summary.products, 'Записей в каталоге'),
+            ('Всего вредоносных программ', summary.malware, 'Известных ВП'),
+            ('Всего сигнатур', summary.signatures, 'Шаблонов обнаружения'),
+            ('Страны производителей', summary.countries, 'Уникальных стран'),
+            ('Типы вредоносных программ', summary.malware_types, 'Категорий ВП'),
             ('', '', ''),  # Пустая строка для разделения
             ('Уровни опасности:', '', ''),
             ('• Критический', threat_levels['Критический'], ''),
@@ -688,12 +1356,12 @@ class ExcelExporter:
             chart1 = workbook.add_chart({'type': 'column'})
             
             # Данные для диаграммы
-            manufacturers = Manufacturer.select()
+            manufacturers = list(self._manufacturers_with_product_counts())
             
             # Записываем данные для диаграммы
             data_start_row = 4
             for i, manufacturer in enumerate(manufacturers, start=data_start_row):
-                products_count = Product.select().where(Product.manufacturer == manufacturer).count()
+                products_count = manufacturer.products_count
                 worksheet.write(i, 5, manufacturer.name)  # Колонка F
                 worksheet.write(i, 6, products_count)     # Колонка G
             
@@ -716,9 +1384,11 @@ class ExcelExporter:
             # Получаем данные по уровням опасности
             threat_levels = ['Критический', 'Высокий', 'Средний', 'Низкий']
             
+            threat_counts = statistics_group('threat_level')
+            
             threat_start_row = start_row + 5
             for i, level in enumerate(threat_levels, start=threat_start_row):
-                count = Malware.select().where(Malware.threat_level == level).count()
+                count = threat_counts.get(level, 0)
                 worksheet.write(i, 5, level)   # Колонка F
                 worksheet.write(i, 6, count)   # Колонка G
             
@@ -739,7 +1409,7 @@ class ExcelExporter:
     
     def _create_visualization_sheet(self, workbook):
         """Лист 3: Визуализация"""
-        worksheet = workbook.add_worksheet('Визуализация')
+        worksheet = self._add_worksheet(workbook, 'Визуализация')
         
         title_format = workbook.add_format({
             'bold': True, 'font_size': 14, 'align': 'center', 'valign': 'vcenter',
@@ -756,25 +1426,26 @@ class ExcelExporter:
     
     def _add_infographics(self, worksheet, workbook):
         """Добавляем инфографику"""
-        # Ключевые показатели в стиле инфографики
+        # Ключевые показатели в стиле инфографики - из строки итогов stats_summary
+        summary = read_statistics()
         indicators = [
             ('Всего записей в базе', 
-             f"{Product.select().count() + Malware.select().count() + Signature.select().count()}",
+             f"{summary.products + summary.malware + summary.signatures}",
              "Общее количество объектов"),
             ('Антивирусных программ', 
-             f"{Product.select().count()}",
+             f"{summary.products}",
              "Записей в каталоге"),
             ('Вредоносных программ', 
-             f"{Malware.select().count()}",
+             f"{summary.malware}",
              "Известных угроз"),
             ('Сигнатуры обнаружения', 
-             f"{Signature.select().count()}",
+             f"{summary.signatures}",
              "Шаблонов для защиты"),
             ('Производителей', 
-             f"{Manufacturer.select().count()}",
+             f"{summary.manufacturers}",
              "Компаний из разных стран"),
             ('Критических угроз', 
-             f"{Malware.select().where(Malware.threat_level == 'Критический').count()}",
+             f"{summary.critical_malware}",
              "Высокоприоритетных ВП")
         ]
         
@@ -852,6 +1523,449 @@ class ExcelExporter:
             # Если нет данных, создаем заглушку
             worksheet.write(data_start_row, 0, "Нет данных для построения графика")
 
+def _populate_benchmark_data(row_count):
+    """Заполняет пустую базу синтетическими записями: row_count ВП и столько же сигнатур"""
+    today = datetime.now().date()
+    threat_levels = list(THREAT_LEVEL_COLORS)
+    
+    Manufacturer.insert_many([
+        {'name': f'Производитель {i}', 'description': 'Тестовый производитель', 'country': f'Страна {i % 5}',
+         'website': 'https://example.com', 'creation_date': today, 'manufacturer_id': f'MAN-{i:04d}'}
+        for i in range(1, 11)
+    ]).execute()
+    Product.insert_many([
+        {'product_id': f'PROD-{i:04d}', 'name': f'Антивирус {i}', 'description': 'Тестовый продукт',
+         'version': '1.0', 'release_date': today - timedelta(days=365 * (i % 5)), 'update_size': '10 МБ',
+         'manufacturer': i % 10 + 1}
+        for i in range(1, 51)
+    ]).execute()
+    
+    for batch in chunked(range(1, row_count + 1), 500):
+        Malware.insert_many([
+            {'malware_id': f'MAL-{i:04d}', 'name': f'Malware.{i}', 'description': 'Тестовая ВП',
+             'threat_level': threat_levels[i % len(threat_levels)],
+             'discovery_date': today - timedelta(days=i % 3650), 'malware_type': f'Тип {i % 7}'}
+            for i in batch
+        ]).execute()
+    for batch in chunked(range(1, row_count + 1), 500):
+        Signature.insert_many([
+            (f'SIG-{i:04d}', f'Signature.{i}', *pattern_columns(b'MZ\x90\x00' + i.to_bytes(4, 'big')),
+             today, i, i % 10 + 1)
+            for i in batch
+        ], fields=[Signature.signature_id, Signature.name, Signature.pattern, Signature.pattern_length,
+                   Signature.pattern_hash, Signature.creation_date, Signature.malware,
+                   Signature.manufacturer]).execute()
+
+def benchmark_export(row_counts, streaming=False):
+    """Замеряет время экспорта и размер файла в зависимости от количества записей.
+    
+    Данные генерируются во временной базе SQLite в памяти, рабочая база не затрагивается.
+    """
+    models = [Manufacturer, Product, Malware, Signature, StatsSummary, StatsGroup]
+    results = []
+    
+    print(f"{'Записей':>10} {'Время, с':>10} {'Размер, КБ':>12} {'Запросов':>10}")
+    for row_count in row_counts:
+        bench_db = SqliteDatabase(':memory:')
+        
+        # В SQLite нет функции YEAR, которую использует лист визуализации
+        @bench_db.func('YEAR')
+        def sqlite_year(value):
+            return int(str(value)[:4]) if value else None
+        
+        with bench_db.bind_ctx(models), tempfile.TemporaryDirectory() as temp_dir:
+            bench_db.create_tables(models)
+            with bench_db.atomic():
+                _populate_benchmark_data(row_count)
+            reconcile_statistics()
+            
+            filename = os.path.join(temp_dir, 'benchmark.xlsx')
+            exporter = ExcelExporter(filename, streaming=streaming)
+            
+            started = time.perf_counter()
+            success, result = exporter.export_all_data()
+            elapsed = time.perf_counter() - started
+            
+            if not success:
+                print(f"Ошибка экспорта для {row_count} записей: {result}")
+                continue
+            
+            file_size = os.path.getsize(filename)
+            results.append((row_count, elapsed, file_size, exporter.query_count))
+            print(f"{row_count:>10} {elapsed:>10.2f} {file_size / 1024:>12.1f} {exporter.query_count:>10}")
+        
+        bench_db.close()
+    
+    return results
+
+# МОДУЛЬ СТАТИСТИКИ
+class StatsSummary(BaseModel):
+    """Итоговые показатели базы одной строкой (id = STATS_SUMMARY_ID); их поддерживают триггеры"""
+    manufacturers = BigIntegerField(default=0)
+    products = BigIntegerField(default=0)
+    malware = BigIntegerField(default=0)
+    signatures = BigIntegerField(default=0)
+    countries = BigIntegerField(default=0)
+    malware_types = BigIntegerField(default=0)
+    critical_malware = BigIntegerField(default=0)
+    reconciled_at = DateTimeField(null=True)   # последняя полная сверка с таблицами
+    
+    class Meta:
+        table_name = 'stats_summary'
+
+class StatsGroup(BaseModel):
+    """Число записей по значению измерения: страна производителя, уровень опасности
+    и тип ВП, число продуктов производителя (item - id производителя)"""
+    dimension = CharField(max_length=32)
+    item = CharField()
+    total = BigIntegerField(default=0)
+    
+    class Meta:
+        table_name = 'stats_groups'
+        primary_key = CompositeKey('dimension', 'item')
+
+STATS_SUMMARY_ID = 1
+
+# Модель -> столбец итогов с числом ее записей и измерения, по которым считаются группы
+STATS_MODELS = (
+    (Manufacturer, 'manufacturers', (('country', Manufacturer.country),)),
+    (Product, 'products', (('manufacturer_products', Product.manufacturer),)),
+    (Malware, 'malware', (('threat_level', Malware.threat_level), ('malware_type', Malware.malware_type))),
+    (Signature, 'signatures', ()),
+)
+
+# Столбцы итогов, которые выводятся из групп измерения: (столбец, выражение над stats_groups)
+STATS_DERIVED = {
+    'country': (('countries', "SELECT COUNT(*) FROM stats_groups WHERE dimension = 'country' AND total > 0"),),
+    'malware_type': (('malware_types',
+                      "SELECT COUNT(*) FROM stats_groups WHERE dimension = 'malware_type' AND total > 0"),),
+    'threat_level': (('critical_malware', "SELECT COALESCE(SUM(total), 0) FROM stats_groups "
+                                          "WHERE dimension = 'threat_level' AND item = 'Критический'"),),
+}
+
+# Как часто приложение сверяет статистику с таблицами (поправляет то, что прошло мимо триггеров)
+STATS_RECONCILE_INTERVAL_MS = 6 * 60 * 60 * 1000
+
+def stats_group_change(dimension, value, delta):
+    """SQL изменения числа записей группы на delta (группа создается при первом обращении)"""
+    insert = (f"INSERT INTO stats_groups (dimension, item, total) "
+              f"VALUES ('{dimension}', COALESCE({value}, ''), {delta})")
+    if isinstance(db, MySQLDatabase):
+        return f"{insert} ON DUPLICATE KEY UPDATE total = total + ({delta})"
+    return f"{insert} ON CONFLICT (dimension, item) DO UPDATE SET total = total + ({delta})"
+
+def create_stats_triggers():
+    """Триггеры, которые на каждой вставке, изменении и удалении строки поправляют итоги и группы"""
+    for model, total_column, dimensions in STATS_MODELS:
+        table = model._meta.table_name
+        derived = [f"{column} = ({query})"
+                   for dimension, _ in dimensions for column, query in STATS_DERIVED.get(dimension, ())]
+        for event, changes in (('INSERT', (('NEW', 1),)), ('DELETE', (('OLD', -1),)),
+                               ('UPDATE', (('OLD', -1), ('NEW', 1)))):
+            if event == 'UPDATE' and not dimensions:
+                continue
+            statements = [stats_group_change(dimension, f"{row}.{field.column_name}", delta)
+                          for row, delta in changes for dimension, field in dimensions]
+            assignments = list(derived)
+            if event != 'UPDATE':
+                assignments.insert(0, f"{total_column} = {total_column} + ({changes[0][1]})")
+            if assignments:
+                statements.append(f"UPDATE stats_summary SET {', '.join(assignments)} WHERE id = {STATS_SUMMARY_ID}")
+            create_trigger(f"{table}_{event.lower()}_stats", 'AFTER', event, table, statements)
+    
+    if isinstance(db, MySQLDatabase):
+        # Строки, удаленные каскадом по внешнему ключу, триггеров в MySQL не вызывают,
+        # поэтому их вычитает триггер родительской таблицы
+        create_trigger('manufacturers_delete_cascade_stats', 'BEFORE', 'DELETE', 'manufacturers', [
+            f"UPDATE stats_summary SET "
+            f"products = products - (SELECT COUNT(*) FROM products WHERE manufacturer_id = OLD.id), "
+            f"signatures = signatures - (SELECT COUNT(*) FROM signatures WHERE manufacturer_id = OLD.id) "
+            f"WHERE id = {STATS_SUMMARY_ID}",
+            "DELETE FROM stats_groups WHERE dimension = 'manufacturer_products' AND item = CAST(OLD.id AS CHAR)",
+        ])
+        create_trigger('malware_delete_cascade_stats', 'BEFORE', 'DELETE', 'malware', [
+            f"UPDATE stats_summary SET "
+            f"signatures = signatures - (SELECT COUNT(*) FROM signatures WHERE malware_id = OLD.id) "
+            f"WHERE id = {STATS_SUMMARY_ID}",
+        ])
+
+def reconcile_statistics():
+    """Сверяет итоги и группы с таблицами и возвращает расхождения [(столбец, было, стало)].
+    
+    Таблицы и статистика читаются без блокировок в одном снимке транзакции, а
+    расхождения добавляются приращениями отдельными короткими запросами в том же
+    порядке, что и в триггерах: сначала группы, затем строка итогов. Пересчет
+    не держит блокировок одновременно на группах и итогах, поэтому не может
+    взаимоблокироваться с изменениями данных, а их поправки, сделанные после
+    снимка, сохраняются.
+    """
+    # База берется из модели: замер экспорта пересчитывает статистику во временной базе
+    database = StatsSummary._meta.database
+    with database.atomic():
+        before = StatsSummary.get_or_none(StatsSummary.id == STATS_SUMMARY_ID)
+        stored = {(dimension, item): total for dimension, item, total in
+                  StatsGroup.select(StatsGroup.dimension, StatsGroup.item, StatsGroup.total).tuples()}
+        totals = {}
+        groups = {}
+        for model, total_column, dimensions in STATS_MODELS:
+            totals[total_column] = model.select().count()
+            for dimension, field in dimensions:
+                rows = field.model.select(field, fn.COUNT(SQL('*'))).group_by(field).tuples()
+                groups.update(((dimension, '' if item is None else str(item)), total) for item, total in rows)
+    
+    # Каждая поправка - отдельный запрос, который держит блокировку одной строки
+    for dimension, item in groups.keys() | stored.keys():
+        delta = groups.get((dimension, item), 0) - stored.get((dimension, item), 0)
+        if not delta:
+            continue
+        update = {StatsGroup.total: StatsGroup.total + delta}
+        query = StatsGroup.insert(dimension=dimension, item=item, total=delta)
+        if isinstance(database, MySQLDatabase):
+            query = query.on_conflict(update=update)
+        else:
+            query = query.on_conflict(conflict_target=[StatsGroup.dimension, StatsGroup.item], update=update)
+        query.execute()
+    
+    if before is None:
+        StatsSummary.insert(id=STATS_SUMMARY_ID).on_conflict_ignore().execute()
+    assignments = {getattr(StatsSummary, column): getattr(StatsSummary, column) + (total - getattr(before, column, 0))
+                   for column, total in totals.items()}
+    for derived in STATS_DERIVED.values():
+        assignments.update((getattr(StatsSummary, column), SQL(f"({query})")) for column, query in derived)
+    assignments[StatsSummary.reconciled_at] = datetime.now()
+    StatsSummary.update(assignments).where(StatsSummary.id == STATS_SUMMARY_ID).execute()
+    
+    after = {**totals,
+             'countries': sum(1 for (dimension, _), total in groups.items() if dimension == 'country' and total > 0),
+             'malware_types': sum(1 for (dimension, _), total in groups.items()
+                                  if dimension == 'malware_type' and total > 0),
+             'critical_malware': groups.get(('threat_level', 'Критический'), 0)}
+    if before is None:
+        return []
+    return [(column, getattr(before, column), value) for column, value in after.items()
+            if getattr(before, column) != value]
+
+def days_between(field, day):
+    """SQL-выражение: сколько дней от даты в поле до day"""
+    if isinstance(field.model._meta.database, MySQLDatabase):
+        return fn.DATEDIFF(day, field)
+    return fn.julianday(day) - fn.julianday(field)
+
+def read_statistics():
+    """Итоговые показатели - один запрос по первичному ключу"""
+    return StatsSummary.get_by_id(STATS_SUMMARY_ID)
+
+def statistics_group(dimension):
+    """{значение измерения: число записей} из stats_groups"""
+    return dict(StatsGroup
+                .select(StatsGroup.item, StatsGroup.total)
+                .where(StatsGroup.dimension == dimension)
+                .tuples())
+
+def manufacturers_with_product_counts():
+    """Производители с числом продуктов (products_count) без чтения таблицы продуктов"""
+    return (Manufacturer
+            .select(Manufacturer, fn.COALESCE(StatsGroup.total, 0).alias('products_count'))
+            .join(StatsGroup, JOIN.LEFT_OUTER,
+                  on=((StatsGroup.dimension == 'manufacturer_products') &
+                      (StatsGroup.item == Manufacturer.id.cast('CHAR'))))
+            .order_by(Manufacturer.id))
+
+class DashboardStats:
+    """Показатели дашборда: итоги - одна строка stats_summary, диаграммы - производители
+    с числом продуктов из stats_groups.
+    
+    Один экземпляр передается всем виджетам дашборда (карточкам, диаграммам,
+    итоговой строке), поэтому обновление дашборда не зависит от числа записей.
+    """
+    
+    def __init__(self):
+        self.products_by_manufacturer = []   # (название производителя, число продуктов) в порядке id
+        self.manufacturers = 0
+        self.products = 0
+        self.countries = 0
+        self.malware = 0
+        self.critical_malware = 0
+        self.malware_types = 0
+        self.signatures = 0
+    
+    @property
+    def average_products(self):
+        return self.products / self.manufacturers if self.manufacturers else 0
+    
+    @classmethod
+    def load(cls):
+        stats = cls()
+        summary = read_statistics()
+        for name in ('manufacturers', 'products', 'countries', 'malware', 'critical_malware',
+                     'malware_types', 'signatures'):
+            setattr(stats, name, getattr(summary, name))
+        stats.products_by_manufacturer = [(manufacturer.name, manufacturer.products_count)
+                                          for manufacturer in manufacturers_with_product_counts()]
+        return stats
+
+class StatisticsReconcileJob(QRunnable):
+    """Сверка материализованной статистики с таблицами в пуле потоков"""
+    
+    def run(self):
+        try:
+            with db.connection_context():
+                drift = reconcile_statistics()
+            for column, stored, actual in drift:
+                logger.warning(f"Статистика {column}: было {stored}, по таблицам {actual}")
+        except Exception as e:
+            logger.error(f"Ошибка сверки статистики: {e}")
+
+# МОДУЛЬ СПРАВОЧНИКОВ
+def record_years(field, values=None):
+    """Годы дат поля по убыванию; values - уже прочитанные даты, иначе выбираются различные даты из БД"""
+    if values is None:
+        values = (date for date, in field.model.select(field).distinct().tuples())
+    return sorted({date.year for date in values if date}, reverse=True)
+
+def load_manufacturer_references():
+    rows = list(Manufacturer
+                .select(Manufacturer.id, Manufacturer.name, Manufacturer.country, Manufacturer.creation_date)
+                .order_by(Manufacturer.name)
+                .tuples())
+    return {
+        'names': [(manufacturer_id, name) for manufacturer_id, name, _, _ in rows],
+        'countries': sorted({country for _, _, country, _ in rows if country}),
+        'years': record_years(Manufacturer.creation_date, [date for _, _, _, date in rows]),
+    }
+
+def load_malware_references():
+    rows = list(Malware
+                .select(Malware.id, Malware.malware_id, Malware.name, Malware.malware_type, Malware.discovery_date)
+                .order_by(Malware.name)
+                .tuples())
+    return {
+        'names': [(malware_id, f"{business_id} - {name}") for malware_id, business_id, name, _, _ in rows],
+        'types': sorted({malware_type for _, _, _, malware_type, _ in rows if malware_type}),
+        'years': record_years(Malware.discovery_date, [date for _, _, _, _, date in rows]),
+    }
+
+def load_product_references():
+    return {'years': record_years(Product.release_date)}
+
+def load_signature_references():
+    return {'years': record_years(Signature.creation_date)}
+
+# Модель -> загрузка ее раздела справочника (один запрос)
+REFERENCE_LOADERS = {
+    Manufacturer: load_manufacturer_references,
+    Malware: load_malware_references,
+    Product: load_product_references,
+    Signature: load_signature_references,
+}
+
+# Изменение записи модели -> разделы, которые оно затрагивает (удаление - с каскадом по внешним ключам)
+REFERENCE_DEPENDENCIES = {
+    (Manufacturer, RecordChange.DELETED): (Manufacturer, Product, Signature),
+    (Malware, RecordChange.DELETED): (Malware, Signature),
+}
+
+class ReferenceData(QObject):
+    """Справочники для выпадающих списков и фильтров, общие для всех страниц и диалогов.
+    
+    Раздел модели (названия по id, страны, типы, годы) читается одним запросом
+    при первом обращении после изменения версии модели. Версию увеличивает
+    сохранение или удаление записи (record_changes), invalidate() после
+    изменений в обход моделей и check_freshness(), если счетчик изменений
+    таблицы сдвинули другие клиенты или импорт. Работает в потоке GUI.
+    """
+    changed = pyqtSignal(object)   # кортеж моделей, разделы которых устарели
+    
+    def __init__(self):
+        super().__init__()
+        self.versions = {model: 0 for model in REFERENCE_LOADERS}
+        self._sections = {}   # модель -> (версия, данные раздела)
+        self._counters = {}   # таблица -> последнее прочитанное значение change_counters
+        record_changes.changed.connect(self._on_record_changed)
+    
+    def _on_record_changed(self, change):
+        if change.model in REFERENCE_LOADERS:
+            self.invalidate(*REFERENCE_DEPENDENCIES.get((change.model, change.action), (change.model,)))
+    
+    def invalidate(self, *models):
+        """Помечает разделы моделей устаревшими (без аргументов - все разделы)"""
+        models = models or tuple(REFERENCE_LOADERS)
+        for model in models:
+            self.versions[model] += 1
+        self.changed.emit(models)
+    
+    def check_freshness(self):
+        """Сверяет счетчики изменений таблиц (один запрос) и сбрасывает разделы тех, что изменились.
+        
+        Счетчик не различает вставку и удаление, поэтому для родительских таблиц
+        сбрасываются и разделы, которые затрагивает каскадное удаление.
+        """
+        tables = {model._meta.table_name: model for model in REFERENCE_LOADERS}
+        try:
+            counters = dict(ChangeCounter
+                            .select(ChangeCounter.name, ChangeCounter.value)
+                            .where(ChangeCounter.name.in_(list(tables)))
+                            .tuples())
+        except Exception as e:
+            logger.warning(f"Не удалось проверить счетчики изменений справочников: {e}")
+            return
+        stale = []
+        for table, value in counters.items():
+            if table in self._counters and self._counters[table] != value:
+                model = tables[table]
+                stale.extend(REFERENCE_DEPENDENCIES.get((model, RecordChange.DELETED), (model,)))
+        self._counters.update(counters)
+        if stale:
+            self.invalidate(*dict.fromkeys(stale))
+    
+    def section(self, model):
+        version, data = self._sections.get(model, (None, None))
+        if version != self.versions[model]:
+            data = REFERENCE_LOADERS[model]()
+            self._sections[model] = (self.versions[model], data)
+        return data
+    
+    def manufacturers(self):
+        """[(id, название)] по названию"""
+        return self.section(Manufacturer)['names']
+    
+    def malware(self):
+        """[(id, "MAL-0001 - название")] по названию"""
+        return self.section(Malware)['names']
+    
+    def countries(self):
+        return self.section(Manufacturer)['countries']
+    
+    def malware_types(self):
+        return self.section(Malware)['types']
+    
+    def years(self, model):
+        return self.section(model)['years']
+
+reference_data = ReferenceData()
+
+def fill_combo(combo, items, first_item=None):
+    """Заполняет список из справочника: items - значения или пары (данные, текст).
+    
+    Выбранный пункт сохраняется, если он остался в списке; сигнал
+    currentTextChanged выдается, только если выбор пришлось сменить.
+    """
+    current_text = combo.currentText()
+    current_data = combo.currentData()
+    combo.blockSignals(True)
+    combo.clear()
+    if first_item is not None:
+        combo.addItem(first_item)
+    for item in items:
+        if isinstance(item, tuple):
+            combo.addItem(item[1], item[0])
+        else:
+            combo.addItem(str(item))
+    index = combo.findData(current_data) if current_data is not None else combo.findText(current_text)
+    combo.setCurrentIndex(max(index, 0))
+    combo.blockSignals(False)
+    if combo.currentText() != current_text:
+        combo.currentTextChanged.emit(combo.currentText())
 
 class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -1032,9 +2146,6 @@ class EditMalwareDialog(QDialog):
             QMessageBox.information(self, "Успех", "Вредоносная программа успешно обновлена")
             self.accept()
             
-            if self.parent:
-                self.parent.load_malware()
-            
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось обновить вредоносную программу: {str(e)}")
 
@@ -1085,7 +2196,7 @@ class EditSignatureDialog(QDialog):
         
         # Данные
         form_layout.addWidget(QLabel("Данные:"), 2, 0)
-        self.data_input = QTextEdit(self.signature.data)
+        self.data_input = QTextEdit(self.signature.hex_data)
         self.data_input.setMaximumHeight(100)
         self.data_input.setStyleSheet("""
             QTextEdit {
@@ -1199,20 +2310,14 @@ class EditSignatureDialog(QDialog):
         layout.addWidget(button_widget)
     
     def load_malware_combo(self):
-        self.malware_combo.clear()
         try:
-            malware_list = Malware.select()
-            for malware in malware_list:
-                self.malware_combo.addItem(f"{malware.malware_id} - {malware.name}", malware.id)
+            fill_combo(self.malware_combo, reference_data.malware())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить вредоносные программы: {str(e)}")
     
     def load_manufacturers_combo(self):
-        self.manufacturer_combo.clear()
         try:
-            manufacturers = Manufacturer.select()
-            for manufacturer in manufacturers:
-                self.manufacturer_combo.addItem(manufacturer.name, manufacturer.id)
+            fill_combo(self.manufacturer_combo, reference_data.manufacturers())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить производителей: {str(e)}")
     
@@ -1233,516 +2338,684 @@ class EditSignatureDialog(QDialog):
             QMessageBox.information(self, "Успех", "Сигнатура успешно обновлена")
             self.accept()
             
-            if self.parent:
-                self.parent.load_signatures()
-            
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось обновить сигнатуру: {str(e)}")
 
-# Виджеты карточек для ВП и сигнатур
-class MalwareCard(QWidget):
-    def __init__(self, malware, parent=None):
+# Модель и делегаты карточек для ВП, сигнатур и товаров
+# Карточки рисуются делегатом только для видимых строк списка, а записи
+# подгружаются из БД страницами, поэтому время открытия страницы и расход
+# памяти не зависят от размера таблицы.
+RECORD_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# Размер страницы подгрузки списков и число страниц, одновременно хранимых в памяти
+LIST_PAGE_SIZE = 200
+LIST_RESIDENT_PAGES = 10
+
+# Пауза в наборе текста (мс), после которой запускается поиск по списку
+SEARCH_DEBOUNCE_MS = 250
+
+def fetch_keyset_page(query, key_field, after_key=None, last_key=None, page_size=None):
+    """Выбирает одну страницу записей по ключу (keyset-пагинация).
+    
+    Страница - записи с ключом в интервале (after_key, last_key], либо первые
+    page_size записей после after_key. Возвращает (записи, ключ последней
+    прочитанной записи, признак конца таблицы).
+    """
+    if after_key is not None:
+        query = query.where(key_field > after_key)
+    if last_key is not None:
+        query = query.where(key_field <= last_key)
+    query = query.order_by(key_field)
+    if page_size is not None:
+        query = query.limit(page_size)
+    
+    rows = list(query)
+    if rows:
+        last_key = getattr(rows[-1], key_field.name)
+    exhausted = page_size is not None and len(rows) < page_size
+    return rows, last_key, exhausted
+
+class ListFilter:
+    """Собирает фильтры страницы списка в одно параметризованное условие WHERE.
+    
+    Незаданные фильтры (пустая строка поиска, "Все ...") условий не добавляют.
+    Фильтрация выполняется на сервере БД, а ограничение LIMIT добавляет
+    постраничная загрузка модели.
+    """
+    
+    def __init__(self):
+        self.conditions = []
+        self.search_text = ""
+        self.search_fields = ()
+        # Описание условий кроме поиска, по нему сравниваются два фильтра
+        self.params = []
+    
+    def search(self, text, *fields):
+        """Подстрока text без учета регистра хотя бы в одном из полей"""
+        self.search_text = text
+        self.search_fields = fields
+        if text:
+            # Двоичные поля ищутся по hex-представлению, которое строится только для поиска
+            self.conditions.append(reduce(operator.or_, [
+                (fn.HEX(field) if isinstance(field, BlobField) else field).contains(text) for field in fields]))
+        return self
+    
+    def equals(self, field, value):
+        if value is not None:
+            self.conditions.append(field == value)
+            self.params.append(('equals', field.model._meta.table_name, field.name, value))
+        return self
+    
+    def year(self, field, year):
+        # Диапазон дат вместо YEAR(поле), чтобы работал индекс по полю
+        if year is not None:
+            self.conditions.append(field.between(date(year, 1, 1), date(year, 12, 31)))
+            self.params.append(('year', field.model._meta.table_name, field.name, year))
+        return self
+    
+    def where(self, condition, key):
+        """Произвольное условие; key - его описание для сравнения фильтров"""
+        self.conditions.append(condition)
+        self.params.append(key)
+        return self
+    
+    def narrows(self, previous):
+        """Результат фильтра - подмножество результата previous: условия те же, а строка поиска дополнена"""
+        return (previous is not None and
+                self.params == previous.params and
+                self.search_fields == previous.search_fields and
+                previous.search_text in self.search_text)
+    
+    def matches_search(self, record):
+        """Проверка строки поиска для уже загруженной записи, как LIKE без учета регистра"""
+        if not self.search_text:
+            return True
+        text = self.search_text.lower()
+        for field in self.search_fields:
+            value = getattr(record, field.name)
+            if isinstance(value, (bytes, memoryview)):
+                value = value.hex()
+            if text in str(value or "").lower():
+                return True
+        return False
+    
+    def apply(self, query):
+        if not self.conditions:
+            return query
+        return query.where(*self.conditions)
+
+class SearchDebouncer(QObject):
+    """Откладывает поиск до паузы в наборе: callback вызывается через delay_ms после последнего изменения текста"""
+    
+    def __init__(self, callback, delay_ms=SEARCH_DEBOUNCE_MS, parent=None):
         super().__init__(parent)
-        self.malware = malware
-        self.parent = parent
-        self.initUI()
+        self.callback = callback
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.callback)
+    
+    def trigger(self, *args):
+        self.timer.start()
+
+class PageFetchSignals(QObject):
+    """Сигналы фоновой подгрузки страницы списка"""
+    loaded = pyqtSignal(int, object, object, bool)   # поколение запроса, записи, последний ключ, конец таблицы
+    reloaded = pyqtSignal(int, int, object)          # поколение запроса, номер вытесненной страницы, записи
+
+class PageFetchJob(QRunnable):
+    """Подгружает страницу списка в пуле потоков: следующую после after_key или,
+    если указан page, вытесненную страницу с ключами в интервале (after_key, last_key].
     
-    def initUI(self):
-        main_layout = QVBoxLayout()
-        main_layout.setSpacing(8)
-        main_layout.setContentsMargins(12, 12, 12, 12)
-        
-        self.setLayout(main_layout)
-        self.setFixedWidth(320)
-        self.setFixedHeight(400)
-        
-        self.setObjectName("MalwareCard")
-        self.setStyleSheet("""
-            QWidget#MalwareCard {
-                background-color: #000000;
-                border: 2px solid #f4f4bd;
-                border-radius: 12px;
-            }
-            QWidget#MalwareCard:hover {
-                border: 2px solid #ffffff;
-                background-color: #000000;
-            }
-        """)
-        
-        # Заголовок
-        header_widget = QWidget()
-        header_layout = QVBoxLayout(header_widget)
-        header_layout.setContentsMargins(0, 0, 0, 0)
-        header_layout.setSpacing(4)
-        
-        id_label = QLabel(f"ID: {self.malware.malware_id}")
-        id_label.setStyleSheet("""
-            QLabel {
-                font-size: 11px;
-                font-weight: 400;
-                color: #a7d8de;
-                background-color: rgba(0, 0, 0, 0.3);
-                padding: 2px 6px;
-                border-radius: 8px;
-            }
-        """)
-        id_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        name_label = QLabel(self.malware.name)
-        name_label.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                font-weight: 400;
-                color: #f4f4bd;
-                padding: 4px 0px;
-                background: transparent;
-            }
-        """)
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        name_label.setWordWrap(True)
-        
-        header_layout.addWidget(id_label)
-        header_layout.addWidget(name_label)
-        main_layout.addWidget(header_widget)
-        
-        # Информация
-        info_widget = QWidget()
-        info_layout = QGridLayout(info_widget)
-        info_layout.setContentsMargins(8, 8, 8, 8)
-        info_layout.setSpacing(6)
-        
-        info_widget.setStyleSheet("""
-            QWidget {
-                background-color: rgba(0, 0, 0, 0.2);
-                border-radius: 8px;
-            }
-        """)
-        
-        info_style = """
-            QLabel {
-                color: #e8e8c8;
-                font-size: 12px;
-                padding: 2px 4px;
-                background: transparent;
-            }
-        """
-        
-        threat_label = QLabel("Уровень опасности:")
-        threat_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        threat_value = QLabel(self.malware.threat_level)
-        threat_value.setStyleSheet(info_style)
-        
-        date_label = QLabel("Дата открытия:")
-        date_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        date_value = QLabel(str(self.malware.discovery_date))
-        date_value.setStyleSheet(info_style)
-        
-        type_label = QLabel("Тип:")
-        type_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        type_value = QLabel(self.malware.malware_type)
-        type_value.setStyleSheet(info_style)
-        
-        info_layout.addWidget(threat_label, 0, 0)
-        info_layout.addWidget(threat_value, 0, 1)
-        info_layout.addWidget(date_label, 1, 0)
-        info_layout.addWidget(date_value, 1, 1)
-        info_layout.addWidget(type_label, 2, 0)
-        info_layout.addWidget(type_value, 2, 1)
-        
-        main_layout.addWidget(info_widget)
-        
-        # Описание
-        desc_widget = QWidget()
-        desc_layout = QVBoxLayout(desc_widget)
-        desc_layout.setContentsMargins(8, 8, 8, 8)
-        
-        desc_widget.setStyleSheet("""
-            QWidget {
-                background-color: rgba(0, 0, 0, 0.15);
-                border-radius: 8px;
-            }
-        """)
-        
-        desc_label = QLabel("Описание:")
-        desc_label.setStyleSheet("font-weight: 400; color: #a7d8de; font-size: 12px; background: transparent;")
-        
-        desc_text = QLabel(self.malware.description)
-        desc_text.setStyleSheet("""
-            QLabel {
-                color: #e8e8c8;
-                font-size: 11px;
-                background: transparent;
-                padding: 6px;
-            }
-        """)
-        desc_text.setWordWrap(True)
-        desc_text.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        
-        desc_layout.addWidget(desc_label)
-        desc_layout.addWidget(desc_text)
-        main_layout.addWidget(desc_widget)
-        
-        # Кнопки
-        footer_widget = QWidget()
-        footer_layout = QHBoxLayout(footer_widget)
-        footer_layout.setContentsMargins(0, 0, 0, 0)
-        
-        edit_btn = QPushButton("Редактировать")
-        edit_btn.setFixedHeight(32)
-        edit_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6c5868;
-                color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 11px;
-            }
-            QPushButton:hover {
-                background-color: #5a8e9c;
-            }
-        """)
-        edit_btn.clicked.connect(self.edit_malware)
-
-        delete_btn = QPushButton("Удалить")
-        delete_btn.setFixedHeight(32)
-        delete_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #8c4a4a;
-                color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 11px;
-            }
-            QPushButton:hover {
-                background-color: #9c5a5a;
-            }
-        """)
-        delete_btn.clicked.connect(self.delete_malware)
-        
-        footer_layout.addWidget(edit_btn)
-        footer_layout.addWidget(delete_btn)
-        main_layout.addWidget(footer_widget)
+    Как и у задачи экспорта, у нее собственное подключение к БД на время работы.
+    Задачей владеет модель (autoDelete выключен), чтобы еще не начатую задачу
+    можно было безопасно снять с очереди пула.
+    """
     
-    def edit_malware(self):
+    def __init__(self, signals, generation, query, key_field, after_key, page_size, last_key=None, page=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.done = False
+        self.signals = signals
+        self.generation = generation
+        self.query = query
+        self.key_field = key_field
+        self.after_key = after_key
+        self.page_size = page_size
+        self.last_key = last_key
+        self.page = page
+    
+    def run(self):
         try:
-            dialog = EditMalwareDialog(self.malware, self.parent)
-            result = dialog.exec()
+            with self.query.model._meta.database.connection_context():
+                rows, last_key, exhausted = fetch_keyset_page(self.query, self.key_field, self.after_key,
+                                                              self.last_key, page_size=self.page_size)
         except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть диалог редактирования: {str(e)}")
-    
-    def delete_malware(self):
-        reply = QMessageBox.question(self, "Удаление", 
-                                   f"Вы точно хотите удалить ВП '{self.malware.name}'?",
-                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes:
-            try:
-                # Проверяем, есть ли связанные сигнатуры
-                signatures_count = Signature.select().where(Signature.malware == self.malware).count()
-                if signatures_count > 0:
-                    QMessageBox.warning(self, "Ошибка", 
-                                      f"Невозможно удалить ВП. У нее есть {signatures_count} связанных сигнатур.")
-                    return
-                
-                self.malware.delete_instance()
-                if self.parent:
-                    self.parent.load_malware()
-                QMessageBox.information(self, "Успех", "Вредоносная программа успешно удалена")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить вредоносную программу: {str(e)}")
+            logger.error(f"Ошибка подгрузки страницы списка: {e}")
+            rows, last_key, exhausted = [], self.after_key, True
+        try:
+            if self.page is None:
+                self.signals.loaded.emit(self.generation, rows, last_key, exhausted)
+            else:
+                self.signals.reloaded.emit(self.generation, self.page, rows)
+        except RuntimeError:
+            # Приложение уже завершается, и объект сигналов удален
+            pass
+        self.done = True
 
-class SignatureCard(QWidget):
-    def __init__(self, signature, parent=None):
+class RecordListModel(QAbstractListModel):
+    """Модель списка записей БД для представлений с карточками.
+    
+    Все запросы выполняются в фоновом потоке (PageFetchJob), а не в потоке GUI:
+    первая страница показывается, когда придет, следующая запрашивается заранее,
+    и представление забирает ее через fetchMore() при прокрутке к концу списка.
+    В памяти держится не больше resident_pages страниц; когда вытесненная
+    страница снова становится видимой, на ее месте показываются пустые строки,
+    пока она перечитывается по сохраненным границам ключей, а затем
+    представлению сообщается dataChanged.
+    """
+    
+    def __init__(self, parent=None, page_size=LIST_PAGE_SIZE, resident_pages=LIST_RESIDENT_PAGES):
         super().__init__(parent)
-        self.signature = signature
-        self.parent = parent
-        self.initUI()
+        self.page_size = page_size
+        self.resident_pages = resident_pages
+        self.base_query = None
+        self.key_field = None
+        self.list_filter = None
+        # Без родителя: объект сигналов живет, пока на него ссылаются незавершенные задачи подгрузки
+        self._signals = PageFetchSignals()
+        self._signals.loaded.connect(self._on_page_loaded)
+        self._signals.reloaded.connect(self._on_page_reloaded)
+        self._generation = 0
+        self._jobs = []   # задачи подгрузки, которые еще могут выполняться в пуле
+        self._pending_job = None
+        self._reloading = {}
+        self._clear()
+    
+    def _clear(self):
+        # Еще не начатую подгрузку по устаревшему запросу снимаем с очереди пула,
+        # результат уже выполняющейся отбросится по номеру поколения
+        for job in [self._pending_job, *self._reloading.values()]:
+            if job is not None and QThreadPool.globalInstance().tryTake(job):
+                self._jobs.remove(job)
+        self._pages = []                  # границы страниц: (after_key, last_key, число записей)
+        self._offsets = []                # номер первой строки каждой страницы
+        self._resident = OrderedDict()    # номер страницы -> записи, в порядке последнего обращения
+        self._row_count = 0
+        self._tail_key = None
+        self._exhausted = True
+        self._prefetched = None
+        self._pending_job = None
+        self._reloading = {}              # номер вытесненной страницы -> задача, которая ее перечитывает
+        self._waiting = False
+    
+    @property
+    def query(self):
+        if self.base_query is None or self.list_filter is None:
+            return self.base_query
+        return self.list_filter.apply(self.base_query)
+    
+    def set_query(self, query, key_field, list_filter=None):
+        """Загружает список заново: query - выборка без сортировки, key_field - уникальный ключ сортировки"""
+        self.base_query = query
+        self.key_field = key_field
+        self.list_filter = list_filter
+        self.reload()
+    
+    def set_filter(self, list_filter):
+        previous, self.list_filter = self.list_filter, list_filter
+        if list_filter is not None and list_filter.narrows(previous) and self._fully_loaded():
+            self._narrow(list_filter.matches_search)
+        else:
+            self.reload()
+    
+    def _fully_loaded(self):
+        return self._exhausted and len(self._resident) == len(self._pages)
+    
+    def _narrow(self, predicate):
+        """Сужает полностью загруженный результат в памяти, без запросов к БД"""
+        pages = [(bounds, [row for row in self._resident[page] if row is not None and predicate(row)])
+                 for page, bounds in enumerate(self._pages)]
+        tail_key = self._tail_key
+        self.beginResetModel()
+        self._generation += 1
+        self._clear()
+        for (after_key, last_key, _), rows in pages:
+            if rows:
+                # Границы ключей страницы сохраняются, так что вытесненная страница перечитается верно
+                self._tail_key = after_key
+                self._add_page(rows, last_key, True)
+        self._tail_key = tail_key
+        self._exhausted = True
+        self.endResetModel()
+    
+    def reload(self):
+        self.beginResetModel()
+        self._generation += 1
+        self._clear()
+        self._exhausted = self.query is None
+        self.endResetModel()
+        # Первая страница показывается сразу, как придет из фонового потока
+        self._waiting = True
+        self._prefetch()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._row_count
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != RECORD_ROLE:
+            return None
+        page = bisect.bisect_right(self._offsets, index.row()) - 1
+        return self._page_rows(page)[index.row() - self._offsets[page]]
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        if self._prefetched is not None:
+            page, self._prefetched = self._prefetched, None
+            self._append_page(*page)
+        else:
+            self._waiting = True
+            self._prefetch()
+    
+    def _add_page(self, rows, last_key, exhausted):
+        if rows:
+            self._pages.append((self._tail_key, last_key, len(rows)))
+            self._offsets.append(self._row_count)
+            self._row_count += len(rows)
+            self._remember_page(len(self._pages) - 1, rows)
+        self._tail_key = last_key
+        self._exhausted = exhausted
+    
+    def _append_page(self, rows, last_key, exhausted):
+        if rows:
+            self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(rows) - 1)
+            self._add_page(rows, last_key, exhausted)
+            self.endInsertRows()
+        else:
+            self._add_page(rows, last_key, exhausted)
+        self._prefetch()
     
-    def initUI(self):
-        main_layout = QVBoxLayout()
-        main_layout.setSpacing(8)
-        main_layout.setContentsMargins(12, 12, 12, 12)
-        
-        self.setLayout(main_layout)
-        self.setFixedWidth(320)
-        self.setFixedHeight(400)  # Увеличил высоту для дополнительных кнопок
-        
-        self.setObjectName("SignatureCard")
-        self.setStyleSheet("""
-            QWidget#SignatureCard {
-                background-color: #000000;
-                border: 2px solid #f4f4bd;
-                border-radius: 12px;
-            }
-            QWidget#SignatureCard:hover {
-                border: 2px solid #ffffff;
-                background-color: #000000;
-            }
-        """)
-        
-        # Заголовок
-        header_widget = QWidget()
-        header_layout = QVBoxLayout(header_widget)
-        header_layout.setContentsMargins(0, 0, 0, 0)
-        header_layout.setSpacing(4)
-        
-        id_label = QLabel(f"ID: {self.signature.signature_id}")
-        id_label.setStyleSheet("""
-            QLabel {
-                font-size: 11px;
-                font-weight: 400;
-                color: #a7d8de;
-                background-color: rgba(0, 0, 0, 0.3);
-                padding: 2px 6px;
-                border-radius: 8px;
-            }
-        """)
-        id_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        name_label = QLabel(self.signature.name)
-        name_label.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                font-weight: 400;
-                color: #f4f4bd;
-                padding: 4px 0px;
-                background: transparent;
-            }
-        """)
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        name_label.setWordWrap(True)
-        
-        header_layout.addWidget(id_label)
-        header_layout.addWidget(name_label)
-        main_layout.addWidget(header_widget)
-        
-        # Информация
-        info_widget = QWidget()
-        info_layout = QGridLayout(info_widget)
-        info_layout.setContentsMargins(8, 8, 8, 8)
-        info_layout.setSpacing(6)
-        
-        info_widget.setStyleSheet("""
-            QWidget {
-                background-color: rgba(0, 0, 0, 0.2);
-                border-radius: 8px;
-            }
-        """)
-        
-        info_style = """
-            QLabel {
-                color: #e8e8c8;
-                font-size: 12px;
-                padding: 2px 4px;
-                background: transparent;
-            }
+    def _prefetch(self):
+        """Заранее запрашивает следующую страницу в фоновом потоке"""
+        if self.query is None or self._exhausted or self._pending_job is not None or self._prefetched is not None:
+            return
+        self._pending_job = self._start_job(self._tail_key, self.page_size)
+    
+    def _start_job(self, after_key, page_size, last_key=None, page=None):
+        self._jobs = [job for job in self._jobs if not job.done]
+        job = PageFetchJob(self._signals, self._generation, self.query, self.key_field, after_key, page_size,
+                           last_key=last_key, page=page)
+        self._jobs.append(job)
+        QThreadPool.globalInstance().start(job)
+        return job
+    
+    def _on_page_loaded(self, generation, rows, last_key, exhausted):
+        if generation != self._generation:
+            return
+        self._pending_job = None
+        if self._waiting or not rows:
+            self._waiting = False
+            self._append_page(rows, last_key, exhausted)
+        else:
+            self._prefetched = (rows, last_key, exhausted)
+    
+    def _page_rows(self, page):
+        rows = self._resident.get(page)
+        if rows is not None:
+            self._resident.move_to_end(page)
+            return rows
+        
+        # Страница была вытеснена: те же границы ключей перечитываются в фоне, пока - пустые строки
+        after_key, last_key, length = self._pages[page]
+        if page not in self._reloading:
+            self._reloading[page] = self._start_job(after_key, None, last_key=last_key, page=page)
+        return [None] * length
+    
+    def _on_page_reloaded(self, generation, page, rows):
+        if generation != self._generation or self._reloading.pop(page, None) is None or page in self._resident:
+            return
+        length = self._pages[page][2]
+        # Если таблица успела измениться, сохраняем прежнее число строк
+        self._remember_page(page, (rows + [None] * length)[:length])
+        self.dataChanged.emit(self.index(self._offsets[page]), self.index(self._offsets[page] + length - 1))
+    
+    def _remember_page(self, page, rows):
+        self._resident[page] = rows
+        self._resident.move_to_end(page)
+        while len(self._resident) > self.resident_pages:
+            self._resident.popitem(last=False)
+    
+    def _page_for_key(self, key):
+        """Номер загруженной страницы, в интервал ключей которой попадает key, или None"""
+        for page, (_, last_key, _) in enumerate(self._pages):
+            if key <= last_key:
+                return page
+        return None
+    
+    def apply_change(self, change):
+        """Применяет изменение одной записи без перезагрузки списка.
+        
+        Перечитывается только страница, в интервал ключей которой попадает запись
+        (один запрос с текущими фильтрами), и представлению сообщается о вставке,
+        удалении или изменении одной строки.
         """
+        if self.query is None:
+            return
+        key = getattr(change.record, self.key_field.name)
+        page = self._page_for_key(key)
+        if page is None:
+            if not self._exhausted:
+                # Запись дальше загруженной части: придет со следующими страницами
+                self._prefetched = None
+                self._prefetch()
+                return
+            if not self._pages:
+                self.reload()
+                return
+            # Новая запись в конце полностью загруженного списка: расширяем последнюю страницу
+            page = len(self._pages) - 1
+            after_key, _, length = self._pages[page]
+            self._pages[page] = (after_key, key, length)
+            self._tail_key = key
+        
+        after_key, last_key, length = self._pages[page]
+        old_rows = self._resident.get(page)
+        rows, _, _ = fetch_keyset_page(self.query, self.key_field, after_key, last_key)
+        keys = [getattr(row, self.key_field.name) for row in rows]
+        present = key in keys
+        if old_rows is not None:
+            old_keys = [getattr(row, self.key_field.name) if row is not None else None for row in old_rows]
+            was_present = key in old_keys
+            old_index = old_keys.index(key) if was_present else None
+        else:
+            # Вытесненная страница: было ли запись видно, понятно по изменению числа строк
+            was_present = present - (len(rows) - length)
+            old_index = sum(1 for other in keys if other < key)
+            if was_present not in (0, 1):
+                self.reload()
+                return
         
-        date_label = QLabel("Дата создания:")
-        date_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        date_value = QLabel(str(self.signature.creation_date))
-        date_value.setStyleSheet(info_style)
-        
-        malware_label = QLabel("Вредоносная программа:")
-        malware_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        malware_value = QLabel(f"{self.signature.malware.malware_id} - {self.signature.malware.name}")
-        malware_value.setStyleSheet(info_style)
-        malware_value.setWordWrap(True)
-        
-        manufacturer_label = QLabel("Производитель:")
-        manufacturer_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        manufacturer_value = QLabel(self.signature.manufacturer.name if self.signature.manufacturer else "Не указан")
-        manufacturer_value.setStyleSheet(info_style)
-        manufacturer_value.setWordWrap(True)
-        
-        info_layout.addWidget(date_label, 0, 0)
-        info_layout.addWidget(date_value, 0, 1)
-        info_layout.addWidget(malware_label, 1, 0)
-        info_layout.addWidget(malware_value, 1, 1)
-        info_layout.addWidget(manufacturer_label, 2, 0)
-        info_layout.addWidget(manufacturer_value, 2, 1)
-        
-        main_layout.addWidget(info_widget)
-        
-        # Данные
-        data_widget = QWidget()
-        data_layout = QVBoxLayout(data_widget)
-        data_layout.setContentsMargins(8, 8, 8, 8)
-        
-        data_widget.setStyleSheet("""
-            QWidget {
-                background-color: rgba(0, 0, 0, 0.15);
-                border-radius: 8px;
-            }
-        """)
-        
-        data_label = QLabel("Данные:")
-        data_label.setStyleSheet("font-weight: 400; color: #a7d8de; font-size: 12px; background: transparent;")
-        
-        data_text = QLabel(self.signature.data)
-        data_text.setStyleSheet("""
-            QLabel {
-                color: #e8e8c8;
-                font-size: 11px;
-                background: transparent;
-                padding: 6px;
-                font-family: monospace;
-            }
-        """)
-        data_text.setWordWrap(True)
-        data_text.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        
-        data_layout.addWidget(data_label)
-        data_layout.addWidget(data_text)
-        main_layout.addWidget(data_widget)
-        
-        # Кнопки
-        footer_widget = QWidget()
-        footer_layout = QVBoxLayout(footer_widget)
-        footer_layout.setContentsMargins(0, 0, 0, 0)
-        footer_layout.setSpacing(8)
-        
-        # Верхний ряд кнопок
-        top_row_widget = QWidget()
-        top_row_layout = QHBoxLayout(top_row_widget)
-        top_row_layout.setContentsMargins(0, 0, 0, 0)
-        
-        malware_btn = QPushButton("С какими ВП борется")
-        malware_btn.setToolTip("Показать вредоносную программу")
-        malware_btn.setFixedHeight(32)
-        malware_btn.setStyleSheet("""
-            QPushButton {
-                background-color: none;
-                color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 11px;
-                border: 1px solid #f4f4bd;
-            }
-            QPushButton:hover {
-                border: 3px solid #f4f4bd;
-            }
-            QPushButton:pressed {
-                background-color: #5c4858;
-            }
-        """)
-        malware_btn.clicked.connect(self.show_malware)
-        
-        manufacturer_btn = QPushButton("Производитель")
-        manufacturer_btn.setToolTip("Информация о производителе")
-        manufacturer_btn.setFixedHeight(32)
-        manufacturer_btn.setStyleSheet("""
-            QPushButton {
-                background-color: none;
-                color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 11px;
-                border: 1px solid #f4f4bd;
-            }
-            QPushButton:hover {
-                border: 3px solid #f4f4bd;
-            }
-            QPushButton:pressed {
-                background-color: #5c4858;
-            }
-        """)
-        manufacturer_btn.clicked.connect(self.show_manufacturer)
-        
-        top_row_layout.addWidget(malware_btn)
-        top_row_layout.addWidget(manufacturer_btn)
-        
-        # Нижний ряд кнопок
-        bottom_row_widget = QWidget()
-        bottom_row_layout = QHBoxLayout(bottom_row_widget)
-        bottom_row_layout.setContentsMargins(0, 0, 0, 0)
-        bottom_row_layout.setSpacing(10)
-        
-        edit_btn = QPushButton("Редактировать")
-        edit_btn.setToolTip("Редактировать сигнатуру")
-        edit_btn.setFixedHeight(32)
-        edit_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6c5868;
-                color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 11px;
-            }
-            QPushButton:hover {
-                background-color: #5a8e9c;
-            }
-            QPushButton:pressed {
-                background-color: #3a6e7c;
-            }
-        """)
-        edit_btn.clicked.connect(self.edit_signature)
-
-        delete_btn = QPushButton("Удалить")
-        delete_btn.setToolTip("Удалить сигнатуру")
-        delete_btn.setFixedHeight(32)
-        delete_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #8c4a4a;
-                color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 11px;
-            }
-            QPushButton:hover {
-                background-color: #9c5a5a;
-            }
-            QPushButton:pressed {
-                background-color: #7c3a3a;
-            }
-        """)
-        delete_btn.clicked.connect(self.delete_signature)
-        
-        bottom_row_layout.addWidget(edit_btn)
-        bottom_row_layout.addWidget(delete_btn)
+        offset = self._offsets[page]
+        delta = len(rows) - length
+        if delta not in (-1, 0, 1) or (delta != 0 and was_present == present):
+            # Страницу успели изменить и другие: ее строки перечитываются целиком
+            self.reload()
+            return
         
-        footer_layout.addWidget(top_row_widget)
-        footer_layout.addWidget(bottom_row_widget)
-        main_layout.addWidget(footer_widget)
-    
-    def show_malware(self):
-        """Показать страницу с вредоносной программой"""
-        try:
-            # Создаем страницу для отображения ВП
-            malware_page = MalwareDetailPage(self.signature.malware, self.parent)
-            self.parent.stacked_widget.addWidget(malware_page)
-            self.parent.stacked_widget.setCurrentWidget(malware_page)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть страницу ВП: {str(e)}")
-    
-    def show_manufacturer(self):
-        """Показать страницу с производителем"""
-        try:
-            if self.signature.manufacturer:
-                self.parent.show_manufacturer_detail(self.signature.manufacturer)
+        if was_present and not present:
+            self.beginRemoveRows(QModelIndex(), offset + old_index, offset + old_index)
+        elif present and not was_present:
+            new_index = keys.index(key)
+            self.beginInsertRows(QModelIndex(), offset + new_index, offset + new_index)
+        self._pages[page] = (after_key, last_key, len(rows))
+        self._remember_page(page, rows)
+        if delta:
+            self._row_count += delta
+            for following in range(page + 1, len(self._offsets)):
+                self._offsets[following] += delta
+        if was_present and not present:
+            self.endRemoveRows()
+        elif present and not was_present:
+            self.endInsertRows()
+        elif present:
+            index = self.index(offset + keys.index(key))
+            self.dataChanged.emit(index, index)
+    
+    def refresh_related(self, field, record):
+        """Подставляет измененную связанную запись (например, переименованную ВП) в загруженные строки"""
+        for page, rows in self._resident.items():
+            for position, row in enumerate(rows):
+                if row is not None and row.__data__.get(field.name) == record.get_id():
+                    setattr(row, field.name, record)
+                    index = self.index(self._offsets[page] + position)
+                    self.dataChanged.emit(index, index)
+
+class CardDelegate(QStyledItemDelegate):
+    """Базовый делегат, рисующий запись в виде карточки с кнопками.
+
+    Наследники описывают содержимое карточки в card_content() и набор
+    кнопок в BUTTON_ROWS; нажатие кнопки выдаётся сигналом
+    action_triggered(действие, запись).
+    """
+
+    action_triggered = pyqtSignal(str, object)
+
+    CARD_WIDTH = 320
+    CARD_HEIGHT = 400
+    PADDING = 12
+    BUTTON_HEIGHT = 32
+    BUTTON_SPACING = 8
+    # Ряды кнопок сверху вниз: (действие, текст, вид)
+    BUTTON_ROWS = [[('edit', 'Редактировать', 'primary'), ('delete', 'Удалить', 'danger')]]
+
+    BUTTON_COLORS = {
+        'primary': ('#6c5868', '#5a8e9c'),
+        'danger': ('#8c4a4a', '#9c5a5a'),
+    }
+
+    def __init__(self, view):
+        super().__init__(view)
+        self._hover_pos = None
+        # Подсветка кнопок под курсором: отслеживаем движение мыши по области представления
+        view.setMouseTracking(True)
+        view.viewport().installEventFilter(self)
+
+    def card_content(self, record):
+        """Возвращает словарь с полями карточки: id, title, image, fields, body_title, body, monospace"""
+        raise NotImplementedError
+
+    def sizeHint(self, option, index):
+        return QSize(self.CARD_WIDTH, self.CARD_HEIGHT)
+
+    def _font(self, base, pixel_size, monospace=False):
+        font = QFont(base)
+        if monospace:
+            font.setFamily("monospace")
+            font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPixelSize(pixel_size)
+        font.setWeight(QFont.Weight.Normal)
+        return font
+
+    def _card_rect(self, option):
+        return QRect(option.rect.x(), option.rect.y(), self.CARD_WIDTH, self.CARD_HEIGHT).adjusted(1, 1, -1, -1)
+
+    def _button_rects(self, option):
+        """Прямоугольники кнопок карточки: список (действие, текст, вид, QRect)"""
+        inner = self._card_rect(option).adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        rects = []
+        top = inner.bottom() + 1 - len(self.BUTTON_ROWS) * (self.BUTTON_HEIGHT + self.BUTTON_SPACING) + self.BUTTON_SPACING
+        for row in self.BUTTON_ROWS:
+            spacing = 10
+            width = (inner.width() - spacing * (len(row) - 1)) // len(row)
+            for i, (action, text, kind) in enumerate(row):
+                rect = QRect(inner.x() + i * (width + spacing), top, width, self.BUTTON_HEIGHT)
+                rects.append((action, text, kind, rect))
+            top += self.BUTTON_HEIGHT + self.BUTTON_SPACING
+        return rects
+
+    def _load_image(self, path):
+        """Загружает уменьшенное изображение товара через общий кэш QPixmapCache"""
+        if not path:
+            return None
+        key = f"card:{path}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            if not os.path.exists(path):
+                return None
+            pixmap = QPixmap(path)
+            if pixmap.isNull():
+                return None
+            pixmap = pixmap.scaled(260, 140, Qt.AspectRatioMode.KeepAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def paint(self, painter, option, index):
+        record = index.data(RECORD_ROLE)
+        if record is None:
+            return
+        content = self.card_content(record)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        card = self._card_rect(option)
+        painter.setPen(QPen(QColor("#ffffff" if hovered else "#f4f4bd"), 2))
+        painter.setBrush(QColor("#000000"))
+        painter.drawRoundedRect(card, 12, 12)
+
+        inner = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        buttons = self._button_rects(option)
+        footer_top = buttons[0][3].top() - self.BUTTON_SPACING if buttons else inner.bottom()
+        y = inner.top()
+
+        # Заголовок
+        painter.setFont(self._font(option.font, 11))
+        painter.setPen(QColor("#a7d8de"))
+        painter.drawText(QRect(inner.x(), y, inner.width(), 18), Qt.AlignmentFlag.AlignCenter, f"ID: {content['id']}")
+        y += 22
+
+        title_font = self._font(option.font, 16)
+        painter.setFont(title_font)
+        painter.setPen(QColor("#f4f4bd"))
+        title_rect = QRect(inner.x(), y, inner.width(), QFontMetrics(title_font).lineSpacing() * 2 + 4)
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, content['title'] or "")
+        y = title_rect.bottom() + 8
+
+        # Изображение
+        pixmap = self._load_image(content.get('image'))
+        if pixmap is not None:
+            painter.drawPixmap(inner.x() + (inner.width() - pixmap.width()) // 2, y, pixmap)
+            y += pixmap.height() + 10
+
+        # Информация
+        label_font = self._font(option.font, 12)
+        metrics = QFontMetrics(label_font)
+        painter.setFont(label_font)
+        label_width = max((metrics.horizontalAdvance(label) for label, _ in content['fields']), default=0)
+        value_x = inner.x() + 8 + label_width + 10
+        value_width = inner.right() - 8 - value_x
+        for label, value in content['fields']:
+            painter.setPen(QColor("#a7d8de"))
+            painter.drawText(QRect(inner.x() + 8, y, label_width, 22),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, label)
+            painter.setPen(QColor("#e8e8c8"))
+            text = metrics.elidedText(str(value if value is not None else ""), Qt.TextElideMode.ElideRight, value_width)
+            painter.drawText(QRect(value_x, y, value_width, 22),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+            y += 24
+        y += 8
+
+        # Описание / данные
+        painter.setPen(QColor("#a7d8de"))
+        painter.drawText(QRect(inner.x() + 8, y, inner.width() - 16, 18),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, content['body_title'])
+        y += 22
+        body_rect = QRect(inner.x() + 14, y, inner.width() - 28, max(0, footer_top - y - 4))
+        monospace = content.get('monospace', False)
+        wrap = Qt.TextFlag.TextWrapAnywhere if monospace else Qt.TextFlag.TextWordWrap
+        painter.save()
+        painter.setFont(self._font(option.font, 11, monospace))
+        painter.setPen(QColor("#e8e8c8"))
+        painter.setClipRect(body_rect, Qt.ClipOperation.IntersectClip)
+        painter.drawText(body_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | wrap, content['body'] or "")
+        painter.restore()
+
+        # Кнопки
+        painter.setFont(self._font(option.font, 11))
+        for action, text, kind, rect in buttons:
+            button_hovered = hovered and self._hover_pos is not None and rect.contains(self._hover_pos)
+            if kind == 'outline':
+                painter.setPen(QPen(QColor("#f4f4bd"), 3 if button_hovered else 1))
+                painter.setBrush(Qt.BrushStyle.NoBrush)
             else:
-                QMessageBox.information(self, "Информация", "Производитель не указан для этой сигнатуры")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть страницу производителя: {str(e)}")
-    
-    def edit_signature(self):
-        try:
-            dialog = EditSignatureDialog(self.signature, self.parent)
-            result = dialog.exec()
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть диалог редактирования: {str(e)}")
-    
-    def delete_signature(self):
-        reply = QMessageBox.question(self, "Удаление", 
-                                   f"Вы точно хотите удалить сигнатуру '{self.signature.name}'?",
-                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.signature.delete_instance()
-                if self.parent:
-                    self.parent.load_signatures()
-                QMessageBox.information(self, "Успех", "Сигнатура успешно удалена")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить сигнатуру: {str(e)}")
+                normal, hover = self.BUTTON_COLORS[kind]
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(QColor(hover if button_hovered else normal))
+            painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 15, 15)
+            painter.setPen(QColor("#f4f4bd"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text)
+
+        painter.restore()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.MouseMove:
+            self._hover_pos = event.position().toPoint()
+            obj.update()
+        elif event.type() == QEvent.Type.Leave:
+            self._hover_pos = None
+            obj.update()
+        return False
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.Type.MouseButtonRelease or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        pos = event.position().toPoint()
+        for action, _, _, rect in self._button_rects(option):
+            if rect.contains(pos):
+                record = index.data(RECORD_ROLE)
+                if record is None:
+                    # Страница еще перечитывается
+                    return True
+                # Откладываем обработку до выхода из обработчика события представления:
+                # действие может перезагрузить модель
+                QTimer.singleShot(0, lambda: self.action_triggered.emit(action, record))
+                return True
+        return False
+
+class MalwareCardDelegate(CardDelegate):
+    def card_content(self, malware):
+        return {
+            'id': malware.malware_id,
+            'title': malware.name,
+            'fields': [("Уровень опасности:", malware.threat_level),
+                       ("Дата открытия:", malware.discovery_date),
+                       ("Тип:", malware.malware_type)],
+            'body_title': "Описание:",
+            'body': malware.description,
+        }
+
+class SignatureCardDelegate(CardDelegate):
+    BUTTON_ROWS = [[('show_malware', 'С какими ВП борется', 'outline'), ('show_manufacturer', 'Производитель', 'outline')],
+                   [('edit', 'Редактировать', 'primary'), ('delete', 'Удалить', 'danger')]]
+
+    def card_content(self, signature):
+        malware = signature.malware
+        return {
+            'id': signature.signature_id,
+            'title': signature.name,
+            'fields': [("Дата создания:", signature.creation_date),
+                       ("Вредоносная программа:", f"{malware.malware_id} - {malware.name}" if malware else "Не указана"),
+                       ("Производитель:", signature.manufacturer.name if signature.manufacturer else "Не указан")],
+            'body_title': "Данные:",
+            'body': signature.hex_data,
+            'monospace': True,
+        }
+
+class ProductCardDelegate(CardDelegate):
+    CARD_HEIGHT = 550
+    BUTTON_ROWS = [[('show_manufacturer', 'Производитель', 'outline')],
+                   [('edit', 'Редактировать', 'primary'), ('delete', 'Удалить', 'danger')]]
+
+    def card_content(self, product):
+        return {
+            'id': product.product_id,
+            'title': product.name,
+            'image': product.image_path,
+            'fields': [("Цена:", product.version),
+                       ("Дата выпуска:", product.release_date),
+                       ("Рейтинг:", product.update_size),
+                       ("Производитель:", product.manufacturer.name)],
+            'body_title': "Описание:",
+            'body': product.description,
+        }
 
 # Страница деталей вредоносной программы
 class MalwareDetailPage(QWidget):
@@ -1941,7 +3214,6 @@ class MalwareDetailPage(QWidget):
             
             try:
                 self.malware.delete_instance()
-                self.parent.load_malware()
                 self.parent.stacked_widget.setCurrentIndex(5)
                 QMessageBox.information(self, "Успех", "Вредоносная программа успешно удалена")
             except Exception as e:
@@ -2163,11 +3435,8 @@ class EditProductDialog(QDialog):
         self.image_path = self.product.image_path
     
     def load_manufacturers_combo(self):
-        self.manufacturer_combo.clear()
         try:
-            manufacturers = Manufacturer.select()
-            for manufacturer in manufacturers:
-                self.manufacturer_combo.addItem(manufacturer.name, manufacturer.id)
+            fill_combo(self.manufacturer_combo, reference_data.manufacturers())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить производителей: {str(e)}")
     
@@ -2200,9 +3469,6 @@ class EditProductDialog(QDialog):
             QMessageBox.information(self, "Успех", "Товар успешно обновлен")
             self.accept()
             
-            if self.parent:
-                self.parent.load_products()
-            
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось обновить товар: {str(e)}")
 
@@ -2348,387 +3614,70 @@ class EditManufacturerDialog(QDialog):
         save_btn.setStyleSheet("""
             QPushButton {
                 background-color: #f4f4bd;
-                color: #3e6775;
-                padding: 12px 25px;
-                border-radius: 18px;
-                font-size: 16px;
-                font-weight: 400;
-            }
-            QPushButton:hover {
-                background-color: #bdbda0;
-            }
-        """)
-        save_btn.clicked.connect(self.save_changes)
-        
-        cancel_btn = QPushButton("Отмена")
-        cancel_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6c5868;
-                color: #f4f4bd;
-                padding: 12px 25px;
-                border-radius: 18px;
-                font-size: 16px;
-            }
-            QPushButton:hover {
-                background-color: #5a8e9c;
-            }
-        """)
-        cancel_btn.clicked.connect(self.reject)
-        
-        button_layout.addWidget(save_btn)
-        button_layout.addWidget(cancel_btn)
-        
-        layout.addWidget(button_widget)
-        
-        self.image_path = self.manufacturer.image_path
-    
-    def select_image(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Выберите изображение", "", 
-                                                 "Images (*.png *.jpg *.jpeg *.bmp)")
-        if file_path:
-            self.image_path = file_path
-            self.image_label.setText(os.path.basename(file_path))
-    
-    def save_changes(self):
-        if not all([self.name_input.text(), self.website_input.text(), 
-                   self.country_input.text(), self.description_input.toPlainText()]):
-            QMessageBox.warning(self, "Ошибка", "Все поля должны быть заполнены")
-            return
-        
-        try:
-            self.manufacturer.name = self.name_input.text()
-            self.manufacturer.website = self.website_input.text()
-            self.manufacturer.country = self.country_input.text()
-            self.manufacturer.creation_date = self.date_input.date().toPyDate()
-            self.manufacturer.description = self.description_input.toPlainText()
-            
-            if self.image_path:
-                self.manufacturer.image_path = self.image_path
-            
-            self.manufacturer.save()
-            
-            QMessageBox.information(self, "Успех", "Производитель успешно обновлен")
-            self.accept()
-            
-            if self.parent:
-                self.parent.load_manufacturers()
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось обновить производителя: {str(e)}")
-
-class ProductCard(QWidget):
-    def __init__(self, product, parent=None):
-        super().__init__(parent)
-        self.product = product
-        self.parent = parent
-        self.initUI()
-    
-    def initUI(self):
-        main_layout = QVBoxLayout()
-        main_layout.setSpacing(8)
-        main_layout.setContentsMargins(12, 12, 12, 12)
-        
-        header_widget = self.create_header()
-        main_layout.addWidget(header_widget)
-        
-        content_widget = self.create_content()
-        main_layout.addWidget(content_widget)
-        
-        footer_widget = self.create_footer()
-        main_layout.addWidget(footer_widget)
-        
-        self.setLayout(main_layout)
-        self.setFixedWidth(320)
-        self.setFixedHeight(550)
-        
-        self.setObjectName("ProductCard")
-        self.setStyleSheet("""
-            QWidget#ProductCard {
-                background-color: #000000;
-                border: 2px solid #f4f4bd;
-                border-radius: 12px;
-            }
-            QWidget#ProductCard:hover {
-                border: 2px solid #ffffff;
-                background-color: #000000;
-            }
-        """)
-    
-    def create_header(self):
-        header_widget = QWidget()
-        header_layout = QVBoxLayout(header_widget)
-        header_layout.setContentsMargins(0, 0, 0, 0)
-        header_layout.setSpacing(4)
-        
-        header_widget.setStyleSheet("background: transparent;")
-        
-        id_label = QLabel(f"ID: {self.product.product_id}")
-        id_label.setStyleSheet("""
-            QLabel {
-                font-size: 11px;
-                font-weight: 400;
-                color: #a7d8de;
-                background-color: rgba(0, 0, 0, 0.3);
-                padding: 2px 6px;
-                border-radius: 8px;
-            }
-        """)
-        id_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        name_label = QLabel(self.product.name)
-        name_label.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                font-weight: 400;
-                color: #f4f4bd;
-                padding: 4px 0px;
-                background: transparent;
-            }
-        """)
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        name_label.setWordWrap(True)
-        
-        header_layout.addWidget(id_label)
-        header_layout.addWidget(name_label)
-        
-        return header_widget
-    
-    def create_content(self):
-        content_widget = QWidget()
-        content_layout = QVBoxLayout(content_widget)
-        content_layout.setContentsMargins(0, 0, 0, 0)
-        content_layout.setSpacing(10)
-        
-        content_widget.setStyleSheet("background: transparent;")
-        
-        if self.product.image_path and os.path.exists(self.product.image_path):
-            image_container = QWidget()
-            image_layout = QVBoxLayout(image_container)
-            image_layout.setContentsMargins(0, 0, 0, 0)
-            image_container.setStyleSheet("background: transparent;")
-            
-            image_label = QLabel()
-            pixmap = QPixmap(self.product.image_path)
-            pixmap = pixmap.scaled(260, 140, Qt.AspectRatioMode.KeepAspectRatio, 
-                                 Qt.TransformationMode.SmoothTransformation)
-            image_label.setPixmap(pixmap)
-            image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            image_label.setStyleSheet("""
-                QLabel {
-                    background-color: rgba(255, 255, 255, 0.1);
-                    border-radius: 6px;
-                    padding: 4px;
-                }
-            """)
-            
-            image_layout.addWidget(image_label)
-            content_layout.addWidget(image_container)
-        
-        info_widget = self.create_info_section()
-        content_layout.addWidget(info_widget)
-        
-        desc_widget = self.create_description_section()
-        content_layout.addWidget(desc_widget)
-        
-        return content_widget
-    
-    def create_info_section(self):
-        info_widget = QWidget()
-        info_layout = QGridLayout(info_widget)
-        info_layout.setContentsMargins(8, 8, 8, 8)
-        info_layout.setSpacing(6)
-        
-        info_widget.setStyleSheet("""
-            QWidget {
-                background-color: rgba(0, 0, 0, 0.2);
-                border-radius: 8px;
-            }
-        """)
-        
-        info_style = """
-            QLabel {
-                color: #e8e8c8;
-                font-size: 12px;
-                padding: 2px 4px;
-                background: transparent;
-            }
-        """
-        
-        version_label = QLabel("Цена:")
-        version_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        version_value = QLabel(self.product.version)
-        version_value.setStyleSheet(info_style)
-        
-        date_label = QLabel("Дата выпуска:")
-        date_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        date_value = QLabel(str(self.product.release_date))
-        date_value.setStyleSheet(info_style)
-        
-        size_label = QLabel("Рейтинг:")
-        size_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        size_value = QLabel(self.product.update_size)
-        size_value.setStyleSheet(info_style)
-        
-        manufacturer_label = QLabel("Производитель:")
-        manufacturer_label.setStyleSheet("font-weight: 400; color: #a7d8de; background: transparent;")
-        manufacturer_value = QLabel(self.product.manufacturer.name)
-        manufacturer_value.setStyleSheet(info_style)
-        manufacturer_value.setWordWrap(True)
-        
-        info_layout.addWidget(version_label, 0, 0)
-        info_layout.addWidget(version_value, 0, 1)
-        info_layout.addWidget(date_label, 1, 0)
-        info_layout.addWidget(date_value, 1, 1)
-        info_layout.addWidget(size_label, 2, 0)
-        info_layout.addWidget(size_value, 2, 1)
-        info_layout.addWidget(manufacturer_label, 3, 0)
-        info_layout.addWidget(manufacturer_value, 3, 1)
-        
-        return info_widget
-    
-    def create_description_section(self):
-        desc_widget = QWidget()
-        desc_layout = QVBoxLayout(desc_widget)
-        desc_layout.setContentsMargins(8, 8, 8, 8)
-        
-        desc_widget.setStyleSheet("""
-            QWidget {
-                background-color: rgba(0, 0, 0, 0.15);
-                border-radius: 8px;
-            }
-        """)
-        
-        desc_label = QLabel("Описание:")
-        desc_label.setStyleSheet("font-weight: 400; color: #a7d8de; font-size: 12px; background: transparent;")
-        
-        desc_text = QLabel(self.product.description)
-        desc_text.setStyleSheet("""
-            QLabel {
-                color: #e8e8c8;
-                font-size: 11px;
-                background: transparent;
-                padding: 6px;
-            }
-        """)
-        desc_text.setWordWrap(True)
-        desc_text.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        
-        desc_layout.addWidget(desc_label)
-        desc_layout.addWidget(desc_text)
-        
-        return desc_widget
-    
-    def create_footer(self):
-        footer_widget = QWidget()
-        footer_layout = QVBoxLayout(footer_widget)
-        footer_layout.setContentsMargins(0, 0, 0, 0)
-        footer_layout.setSpacing(8)
-        
-        footer_widget.setStyleSheet("background: transparent;")
-        
-        top_row_widget = QWidget()
-        top_row_layout = QHBoxLayout(top_row_widget)
-        top_row_layout.setContentsMargins(0, 0, 0, 0)
-        top_row_widget.setStyleSheet("background: transparent;")
-        
-        manufacturer_btn = QPushButton("Производитель")
-        manufacturer_btn.setToolTip("Информация о производителе")
-        manufacturer_btn.setFixedHeight(32)
-        manufacturer_btn.setStyleSheet("""
-            QPushButton {
-                background-color: none;
-                color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 12px;
-                border: 1px solid #f4f4bd;
-            }
-            QPushButton:hover {
-                border: 3px solid #f4f4bd;
-            }
-            QPushButton:pressed {
-                background-color: #5c4858;
-            }
-        """)
-        manufacturer_btn.clicked.connect(lambda: self.parent.show_manufacturer_detail(self.product.manufacturer))
-        
-        top_row_layout.addWidget(manufacturer_btn)
-        
-        bottom_row_widget = QWidget()
-        bottom_row_layout = QHBoxLayout(bottom_row_widget)
-        bottom_row_layout.setContentsMargins(0, 0, 0, 0)
-        bottom_row_layout.setSpacing(10)
-        bottom_row_widget.setStyleSheet("background: transparent;")
-        
-        edit_btn = QPushButton("Редактировать")
-        edit_btn.setToolTip("Редактировать товар")
-        edit_btn.setFixedHeight(32)
-        edit_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6c5868;
-                color: #f4f4bd;
-                border-radius: 15px;
+                color: #3e6775;
+                padding: 12px 25px;
+                border-radius: 18px;
+                font-size: 16px;
                 font-weight: 400;
-                font-size: 11px;
             }
             QPushButton:hover {
-                background-color: #5a8e9c;
-            }
-            QPushButton:pressed {
-                background-color: #3a6e7c;
+                background-color: #bdbda0;
             }
         """)
-        edit_btn.clicked.connect(self.edit_product)
-
-        delete_btn = QPushButton("Удалить")
-        delete_btn.setToolTip("Удалить товар")
-        delete_btn.setFixedHeight(32)
-        delete_btn.setStyleSheet("""
+        save_btn.clicked.connect(self.save_changes)
+        
+        cancel_btn = QPushButton("Отмена")
+        cancel_btn.setStyleSheet("""
             QPushButton {
-                background-color: #8c4a4a;
+                background-color: #6c5868;
                 color: #f4f4bd;
-                border-radius: 15px;
-                font-weight: 400;
-                font-size: 11px;
+                padding: 12px 25px;
+                border-radius: 18px;
+                font-size: 16px;
             }
             QPushButton:hover {
-                background-color: #9c5a5a;
-            }
-            QPushButton:pressed {
-                background-color: #7c3a3a;
+                background-color: #5a8e9c;
             }
         """)
-        delete_btn.clicked.connect(self.delete_product)
+        cancel_btn.clicked.connect(self.reject)
         
-        bottom_row_layout.addWidget(edit_btn)
-        bottom_row_layout.addWidget(delete_btn)
+        button_layout.addWidget(save_btn)
+        button_layout.addWidget(cancel_btn)
         
-        footer_layout.addWidget(top_row_widget)
-        footer_layout.addWidget(bottom_row_widget)
+        layout.addWidget(button_widget)
         
-        return footer_widget
+        self.image_path = self.manufacturer.image_path
+    
+    def select_image(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Выберите изображение", "", 
+                                                 "Images (*.png *.jpg *.jpeg *.bmp)")
+        if file_path:
+            self.image_path = file_path
+            self.image_label.setText(os.path.basename(file_path))
     
-    def edit_product(self):
+    def save_changes(self):
+        if not all([self.name_input.text(), self.website_input.text(), 
+                   self.country_input.text(), self.description_input.toPlainText()]):
+            QMessageBox.warning(self, "Ошибка", "Все поля должны быть заполнены")
+            return
+        
         try:
-            dialog = EditProductDialog(self.product, self.parent)
-            result = dialog.exec()
-            if result == QDialog.DialogCode.Accepted:
-                pass
+            self.manufacturer.name = self.name_input.text()
+            self.manufacturer.website = self.website_input.text()
+            self.manufacturer.country = self.country_input.text()
+            self.manufacturer.creation_date = self.date_input.date().toPyDate()
+            self.manufacturer.description = self.description_input.toPlainText()
+            
+            if self.image_path:
+                self.manufacturer.image_path = self.image_path
+            
+            self.manufacturer.save()
+            
+            QMessageBox.information(self, "Успех", "Производитель успешно обновлен")
+            self.accept()
+            
         except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть диалог редактирования: {str(e)}")
-    
-    def delete_product(self):
-        reply = QMessageBox.question(self, "Удаление", 
-                                   f"Вы точно хотите удалить товар '{self.product.name}'?",
-                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.product.delete_instance()
-                if self.parent:
-                    self.parent.load_products()
-                QMessageBox.information(self, "Успех", "Товар успешно удален")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить товар: {str(e)}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось обновить производителя: {str(e)}")
 
 class ManufacturerDetailPage(QWidget):
     def __init__(self, manufacturer, parent=None):
@@ -2944,7 +3893,6 @@ class ManufacturerDetailPage(QWidget):
             
             try:
                 self.manufacturer.delete_instance()
-                self.parent.load_manufacturers()
                 self.parent.stacked_widget.setCurrentIndex(4)
                 QMessageBox.information(self, "Успех", "Производитель успешно удален")
             except Exception as e:
@@ -2970,6 +3918,9 @@ class ManufacturerDetailPage(QWidget):
         self.parent.show_manufacturer_detail(next_manufacturer)
 
 class MainWindow(QMainWindow):
+    # Задержка поиска по спискам после ввода текста, мс
+    search_debounce_ms = SEARCH_DEBOUNCE_MS
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Антивирусы - MySQL")
@@ -2998,23 +3949,72 @@ class MainWindow(QMainWindow):
         
         self.stacked_widget = QStackedWidget()
         
-        self.create_pages()
+        # Экспорты выполняются в фоновых потоках, чтобы не блокировать интерфейс
+        self.export_runner = ExportJobRunner(self)
+        self.export_runner.progress.connect(self.on_export_progress)
+        self.export_runner.finished.connect(self.on_export_finished)
+        self.export_runner.cancelled.connect(self.on_export_cancelled)
+        self.export_dialogs = {}
+        
         self.create_menu_buttons(menu_layout)
         
+        # Пока база данных подключается в фоне, вместо страниц показываем заглушку
+        self.loading_label = QLabel("Подключение к базе данных...")
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.setStyleSheet("font-size: 18px; color: #f4f4bd;")
+        self.stacked_widget.hide()
+        menu_widget.setEnabled(False)
+        self.menu_widget = menu_widget
+        
         main_layout.addWidget(menu_widget)
+        main_layout.addWidget(self.loading_label)
         main_layout.addWidget(self.stacked_widget)
         
-        # Загружаем данные только если база данных инициализирована
         if db_initialized:
+            self.on_database_ready(True, "")
+        else:
+            self.db_init_job = DatabaseInitJob()
+            self.db_init_job.signals.finished.connect(self.on_database_ready)
+            QThreadPool.globalInstance().start(self.db_init_job)
+    
+    def on_database_ready(self, success, error):
+        """Создает страницы после фоновой инициализации БД (страницы при создании читают данные)"""
+        self.create_pages()
+        self.loading_label.hide()
+        self.stacked_widget.show()
+        self.menu_widget.setEnabled(True)
+        
+        # Загружаем данные только если база данных инициализирована
+        if success:
+            # Начальные значения счетчиков изменений, с которыми сверяется справочник
+            reference_data.check_freshness()
             self.load_products()
             self.load_manufacturers()
             self.load_malware()
             self.load_signatures()
+            
+            # Дальше списки обновляются точечно по изменениям записей
+            record_changes.changed.connect(self.on_record_changed)
+            reference_data.changed.connect(self.on_reference_data_changed)
+            
+            # Периодическая сверка статистики, которую поддерживают триггеры
+            self.stats_reconcile_timer = QTimer(self)
+            self.stats_reconcile_timer.setInterval(STATS_RECONCILE_INTERVAL_MS)
+            self.stats_reconcile_timer.timeout.connect(
+                lambda: QThreadPool.globalInstance().start(StatisticsReconcileJob()))
+            # Заодно перечитываются справочники: их могли изменить импорт фидов и другие клиенты
+            self.stats_reconcile_timer.timeout.connect(reference_data.invalidate)
+            self.stats_reconcile_timer.start()
         else:
-            QMessageBox.warning(self, "Предупреждение", 
-                              "База данных не инициализирована. Приложение будет работать в ограниченном режиме.")
+            message = "База данных не инициализирована. Приложение будет работать в ограниченном режиме."
+            if error:
+                message += f"\n\n{error}"
+            QMessageBox.warning(self, "Предупреждение", message)
     
     def closeEvent(self, event):
+        # Отменяем незавершенные экспорты и ждем освобождения их подключений
+        self.export_runner.cancel_all()
+        
         try:
             if db.is_connection_usable():
                 db.close()
@@ -3028,85 +4028,24 @@ class MainWindow(QMainWindow):
         self.stacked_widget.addWidget(manufacturer_page)
         self.stacked_widget.setCurrentWidget(manufacturer_page)
     
-    def get_next_manufacturer_id(self):
+    def get_next_business_id(self, prefix, description):
         try:
-            max_id = Manufacturer.select(fn.MAX(Manufacturer.manufacturer_id)).scalar()
-            if not max_id:
-                return "MAN-0001"
-            
-            if max_id.startswith("MAN-"):
-                try:
-                    current_id = int(max_id.split("-")[1])
-                    next_id = current_id + 1
-                    return f"MAN-{next_id:04d}"
-                except (ValueError, IndexError):
-                    return "MAN-0001"
-            else:
-                return "MAN-0001"
-                
+            return id_allocator.next_id(prefix)
         except Exception as e:
-            print(f"Ошибка при генерации ID производителя: {e}")
-            return "MAN-0001"
+            print(f"Ошибка при генерации ID {description}: {e}")
+            return ""
+    
+    def get_next_manufacturer_id(self):
+        return self.get_next_business_id('MAN', "производителя")
     
     def get_next_product_id(self):
-        try:
-            max_id = Product.select(fn.MAX(Product.product_id)).scalar()
-            if not max_id:
-                return "PROD-0001"
-            
-            if max_id.startswith("PROD-"):
-                try:
-                    current_id = int(max_id.split("-")[1])
-                    next_id = current_id + 1
-                    return f"PROD-{next_id:04d}"
-                except (ValueError, IndexError):
-                    return "PROD-0001"
-            else:
-                return "PROD-0001"
-                
-        except Exception as e:
-            print(f"Ошибка при генерации ID товара: {e}")
-            return "PROD-0001"
+        return self.get_next_business_id('PROD', "товара")
     
     def get_next_malware_id(self):
-        try:
-            max_id = Malware.select(fn.MAX(Malware.malware_id)).scalar()
-            if not max_id:
-                return "MAL-0001"
-            
-            if max_id.startswith("MAL-"):
-                try:
-                    current_id = int(max_id.split("-")[1])
-                    next_id = current_id + 1
-                    return f"MAL-{next_id:04d}"
-                except (ValueError, IndexError):
-                    return "MAL-0001"
-            else:
-                return "MAL-0001"
-                
-        except Exception as e:
-            print(f"Ошибка при генерации ID ВП: {e}")
-            return "MAL-0001"
+        return self.get_next_business_id('MAL', "ВП")
     
     def get_next_signature_id(self):
-        try:
-            max_id = Signature.select(fn.MAX(Signature.signature_id)).scalar()
-            if not max_id:
-                return "SIG-0001"
-            
-            if max_id.startswith("SIG-"):
-                try:
-                    current_id = int(max_id.split("-")[1])
-                    next_id = current_id + 1
-                    return f"SIG-{next_id:04d}"
-                except (ValueError, IndexError):
-                    return "SIG-0001"
-            else:
-                return "SIG-0001"
-                
-        except Exception as e:
-            print(f"Ошибка при генерации ID сигнатуры: {e}")
-            return "SIG-0001"
+        return self.get_next_business_id('SIG', "сигнатуры")
     
     def create_pages(self):
         self.new_product_page = self.create_new_product_page()
@@ -3155,7 +4094,12 @@ class MainWindow(QMainWindow):
         
         layout.addStretch()
         return page
-    
+
+    def show_page(self, index):
+        """Переключает страницу меню, перед этим перечитывая справочники, если их изменили другие клиенты"""
+        reference_data.check_freshness()
+        self.stacked_widget.setCurrentIndex(index)
+
     def create_menu_buttons(self, layout):
         buttons_main = [
             ("Создать новый товар", 0),
@@ -3262,7 +4206,7 @@ class MainWindow(QMainWindow):
                         border: 3px solid #f4f4bd;
                     }
                 """)
-            btn.clicked.connect(lambda checked, idx=index: self.stacked_widget.setCurrentIndex(idx))
+            btn.clicked.connect(lambda checked, idx=index: self.show_page(idx))
             layout.addWidget(btn)
         
         # ДОБАВЛЯЕМ КНОПКУ ЭКСПОРТА
@@ -3296,16 +4240,53 @@ class MainWindow(QMainWindow):
             )
             
             if filename:
-                exporter = ExcelExporter(filename)
-                success, result = exporter.export_all_data()
-                
-                if success:
-                    QMessageBox.information(self, "Успех", f"Отчет успешно сохранен:\n{result}")
-                else:
-                    QMessageBox.critical(self, "Ошибка", f"Не удалось создать отчет:\n{result}")
+                self.start_export_job('excel', filename, "Экспорт в Excel...")
                     
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при экспорте:\n{str(e)}")
+    
+    def start_export_job(self, kind, filename, title):
+        """Запускает экспорт в фоне и показывает немодальное окно прогресса с кнопкой отмены"""
+        job = self.export_runner.start(kind, filename)
+        
+        dialog = QProgressDialog(title, "Отмена", 0, 0, self)
+        dialog.setWindowTitle(os.path.basename(filename))
+        dialog.setWindowModality(Qt.WindowModality.NonModal)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.setMinimumDuration(0)
+        dialog.canceled.connect(job.cancel)
+        dialog.show()
+        
+        self.export_dialogs[job.job_id] = dialog
+    
+    def on_export_progress(self, job_id, done, total):
+        dialog = self.export_dialogs.get(job_id)
+        if dialog:
+            dialog.setMaximum(max(total, 1))
+            dialog.setValue(min(done, max(total, 1)))
+    
+    def on_export_finished(self, job_id, success, result):
+        dialog = self.export_dialogs.pop(job_id, None)
+        if dialog:
+            dialog.close()
+        
+        if not success:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось создать отчет:\n{result}")
+            return
+        
+        QMessageBox.information(self, "Успех", f"Отчет успешно сохранен:\n{result}")
+        if result.lower().endswith('.pdf'):
+            # Открываем файл (доступно только в Windows)
+            try:
+                os.startfile(result)
+            except Exception:
+                pass
+    
+    def on_export_cancelled(self, job_id):
+        dialog = self.export_dialogs.pop(job_id, None)
+        if dialog:
+            dialog.close()
 
 
     
@@ -3651,31 +4632,15 @@ class MainWindow(QMainWindow):
         self.manufacturer_id_input.setText(next_id)
     
     def load_malware_combo(self):
-        self.signature_malware_combo.clear()
         try:
-            malware_list = Malware.select()
-            for malware in malware_list:
-                self.signature_malware_combo.addItem(f"{malware.malware_id} - {malware.name}", malware.id)
+            fill_combo(self.signature_malware_combo, reference_data.malware())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить вредоносные программы: {str(e)}")
     
     def load_manufacturers_combo_signature(self):
         """Загрузка производителей для создания сигнатур - используем те же производители, что и для антивирусных программ"""
-        self.signature_manufacturer_combo.clear()
-        try:
-            manufacturers = Manufacturer.select()
-            for manufacturer in manufacturers:
-                self.signature_manufacturer_combo.addItem(manufacturer.name, manufacturer.id)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить производителей: {str(e)}")
-    
-    def load_manufacturers_combo(self):
-        """Загрузка производителей для создания продуктов"""
-        self.manufacturer_combo.clear()
         try:
-            manufacturers = Manufacturer.select()
-            for manufacturer in manufacturers:
-                self.manufacturer_combo.addItem(manufacturer.name, manufacturer.id)
+            fill_combo(self.signature_manufacturer_combo, reference_data.manufacturers())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить производителей: {str(e)}")
     
@@ -3705,7 +4670,6 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Успех", "Вредоносная программа успешно создана")
             self.clear_malware_form()
             self.stacked_widget.setCurrentIndex(6)
-            self.load_malware()
             
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось создать вредоносную программу: {str(e)}")
@@ -3744,7 +4708,6 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Успех", "Сигнатура успешно создана")
             self.clear_signature_form()
             self.stacked_widget.setCurrentIndex(5)
-            self.load_signatures()
             
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось создать сигнатуру: {str(e)}")
@@ -3817,7 +4780,8 @@ class MainWindow(QMainWindow):
                 font-size: 14px;
             }
         """)
-        self.malware_search_input.textChanged.connect(self.filter_malware)
+        self.malware_search_debouncer = SearchDebouncer(self.filter_malware, self.search_debounce_ms, self)
+        self.malware_search_input.textChanged.connect(self.malware_search_debouncer.trigger)
         filters_layout.addWidget(self.malware_search_input)
         
         # Фильтр по уровню опасности
@@ -3886,27 +4850,9 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(filters_widget)
         
-        scroll_area = QScrollArea()
-        scroll_widget = QWidget()
-        self.malware_layout = QVBoxLayout(scroll_widget)
-        
-        self.malware_container = QWidget()
-        self.malware_grid = QHBoxLayout(self.malware_container)
-        self.malware_grid.addStretch()
-        
-        self.malware_layout.addWidget(self.malware_container)
-        self.malware_layout.addStretch()
-        
-        scroll_area.setWidget(scroll_widget)
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background-color: transparent;
-            }
-        """)
-        
-        layout.addWidget(scroll_area)
+        self.malware_model = RecordListModel(self)
+        self.malware_view = self.create_card_list_view(self.malware_model, MalwareCardDelegate, self.on_malware_card_action)
+        layout.addWidget(self.malware_view)
         
         return page
     
@@ -3948,7 +4894,8 @@ class MainWindow(QMainWindow):
                 font-size: 14px;
             }
         """)
-        self.signature_search_input.textChanged.connect(self.filter_signatures)
+        self.signature_search_debouncer = SearchDebouncer(self.filter_signatures, self.search_debounce_ms, self)
+        self.signature_search_input.textChanged.connect(self.signature_search_debouncer.trigger)
         filters_layout.addWidget(self.signature_search_input)
         
         # Фильтр по вредоносным программам
@@ -4016,170 +4963,152 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(filters_widget)
         
-        scroll_area = QScrollArea()
-        scroll_widget = QWidget()
-        self.signatures_layout = QVBoxLayout(scroll_widget)
-        
-        self.signatures_container = QWidget()
-        self.signatures_grid = QHBoxLayout(self.signatures_container)
-        self.signatures_grid.addStretch()
-        
-        self.signatures_layout.addWidget(self.signatures_container)
-        self.signatures_layout.addStretch()
+        self.signatures_model = RecordListModel(self)
+        self.signatures_view = self.create_card_list_view(self.signatures_model, SignatureCardDelegate, self.on_signature_card_action)
+        layout.addWidget(self.signatures_view)
         
-        scroll_area.setWidget(scroll_widget)
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
+        return page
+    
+    def create_card_list_view(self, model, delegate_class, action_handler):
+        """Создает список карточек: виджеты не создаются, делегат рисует только видимые записи"""
+        view = QListView()
+        view.setModel(model)
+        delegate = delegate_class(view)
+        delegate.action_triggered.connect(action_handler)
+        view.setItemDelegate(delegate)
+        view.setFlow(QListView.Flow.LeftToRight)
+        view.setWrapping(False)
+        view.setUniformItemSizes(True)
+        view.setSpacing(5)
+        view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        view.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        view.setStyleSheet("""
+            QListView {
                 border: none;
                 background-color: transparent;
             }
         """)
-        
-        layout.addWidget(scroll_area)
-        
-        return page
-    
+        return view
+
     def load_malware(self):
-        if hasattr(self, 'malware_grid'):
-            for i in reversed(range(self.malware_grid.count())):
-                widget = self.malware_grid.itemAt(i).widget()
-                if widget is not None:
-                    widget.setParent(None)
-        
         try:
-            malware_list = Malware.select().order_by(Malware.malware_id)
-            for malware in malware_list:
-                card = MalwareCard(malware, self)
-                self.malware_grid.insertWidget(self.malware_grid.count() - 1, card)
-            
+            self.malware_model.set_query(Malware.select(), Malware.malware_id)
+
             # Загружаем фильтры после загрузки данных
             self.load_malware_filters()
-            
+
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить вредоносные программы: {str(e)}")
-    
-    def load_signatures(self):
-        if hasattr(self, 'signatures_grid'):
-            for i in reversed(range(self.signatures_grid.count())):
-                widget = self.signatures_grid.itemAt(i).widget()
-                if widget is not None:
-                    widget.setParent(None)
-        
-        try:
-            # Используем правильный запрос с JOIN
-            signatures = (Signature
-                        .select(Signature, Manufacturer, Malware)
-                        .join(Malware, on=(Signature.malware_id == Malware.id))
-                        .join(Manufacturer, JOIN.LEFT_OUTER, on=(Signature.manufacturer_id == Manufacturer.id))
-                        .order_by(Signature.signature_id))
-            
-            for signature in signatures:
-                card = SignatureCard(signature, self)
-                self.signatures_grid.insertWidget(self.signatures_grid.count() - 1, card)
-            
-            # Загружаем фильтры после загрузки данных
-            self.load_signature_filters()
-            
-        except Exception as e:
-            print(f"Ошибка загрузки сигнатур: {e}")
-            # Пробуем альтернативный способ загрузки
-            try:
-                print("Пробуем альтернативный способ загрузки...")
-                signatures = Signature.select().order_by(Signature.signature_id)
-                for signature in signatures:
-                    # Вручную загружаем связанные объекты
-                    try:
-                        signature.malware = Malware.get_by_id(signature.malware_id)
-                    except:
-                        signature.malware = None
-                    
-                    try:
-                        if signature.manufacturer_id:
-                            signature.manufacturer = Manufacturer.get_by_id(signature.manufacturer_id)
-                        else:
-                            signature.manufacturer = None
-                    except:
-                        signature.manufacturer = None
-                    
-                    card = SignatureCard(signature, self)
-                    self.signatures_grid.insertWidget(self.signatures_grid.count() - 1, card)
-                
-                self.load_signature_filters()
-                
-            except Exception as e2:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить сигнатуры: {str(e2)}")
-    
+
+    def selected_year(self, combo):
+        """Год, выбранный в фильтре, или None для "Все годы" """
+        text = combo.currentText()
+        return int(text) if text.isdigit() else None
+
     def filter_malware(self):
-        search_text = self.malware_search_input.text().lower()
         threat_filter = self.malware_threat_filter.currentText()
         type_filter = self.malware_type_filter.currentText()
-        year_filter = self.malware_year_filter.currentText()
-        
-        for i in range(self.malware_grid.count()):
-            widget = self.malware_grid.itemAt(i).widget()
-            if widget and isinstance(widget, MalwareCard):
-                malware = widget.malware
-                
-                # Проверка текстового поиска
-                text_match = (search_text in malware.name.lower() or 
-                             search_text in malware.malware_type.lower() or 
-                             search_text in malware.threat_level.lower() or
-                             search_text in malware.description.lower() or
-                             search_text in malware.malware_id.lower())
-                
-                # Проверка фильтра по уровню опасности
-                threat_match = (threat_filter == "Все уровни" or 
-                               threat_filter == malware.threat_level)
-                
-                # Проверка фильтра по типу
-                type_match = (type_filter == "Все типы" or 
-                             type_filter == malware.malware_type)
-                
-                # Проверка фильтра по году
-                year_match = True
-                if year_filter != "Все годы" and malware.discovery_date:
-                    year_match = str(malware.discovery_date.year) == year_filter
-                
-                if text_match and threat_match and type_match and year_match:
-                    widget.show()
-                else:
-                    widget.hide()
-    
+
+        list_filter = (ListFilter()
+                       .search(self.malware_search_input.text(),
+                               Malware.name, Malware.malware_type, Malware.threat_level,
+                               Malware.description, Malware.malware_id)
+                       .equals(Malware.threat_level, None if threat_filter == "Все уровни" else threat_filter)
+                       .equals(Malware.malware_type, None if type_filter == "Все типы" else type_filter)
+                       .year(Malware.discovery_date, self.selected_year(self.malware_year_filter)))
+        try:
+            self.malware_model.set_filter(list_filter)
+        except Exception as e:
+            print(f"Ошибка фильтрации ВП: {e}")
+
     def filter_signatures(self):
-        search_text = self.signature_search_input.text().lower()
-        malware_filter = self.signature_malware_filter.currentText()
         manufacturer_filter = self.signature_manufacturer_filter.currentText()
-        year_filter = self.signature_year_filter.currentText()
-        
-        for i in range(self.signatures_grid.count()):
-            widget = self.signatures_grid.itemAt(i).widget()
-            if widget and isinstance(widget, SignatureCard):
-                signature = widget.signature
-                
-                # Проверка текстового поиска
-                text_match = (search_text in signature.name.lower() or 
-                             search_text in signature.data.lower() or 
-                             search_text in signature.signature_id.lower())
-                
-                # Проверка фильтра по вредоносной программе
-                malware_match = (malware_filter == "Все ВП" or 
-                               malware_filter == f"{signature.malware.malware_id} - {signature.malware.name}")
-                
-                # Проверка фильтра по производителю
-                manufacturer_match = True
-                if manufacturer_filter != "Все производители" and signature.manufacturer:
-                    manufacturer_match = manufacturer_filter == signature.manufacturer.name
-                
-                # Проверка фильтра по году
-                year_match = True
-                if year_filter != "Все годы" and signature.creation_date:
-                    year_match = str(signature.creation_date.year) == year_filter
-                
-                if text_match and malware_match and manufacturer_match and year_match:
-                    widget.show()
-                else:
-                    widget.hide()
+
+        list_filter = (ListFilter()
+                       .search(self.signature_search_input.text(),
+                               Signature.name, Signature.data, Signature.pattern, Signature.signature_id)
+                       .equals(Signature.malware, self.signature_malware_filter.currentData())
+                       .year(Signature.creation_date, self.selected_year(self.signature_year_filter)))
+        if manufacturer_filter != "Все производители":
+            # Сигнатуры без производителя проходят фильтр по производителю
+            manufacturer_ids = Manufacturer.select(Manufacturer.id).where(Manufacturer.name == manufacturer_filter)
+            list_filter.where(Signature.manufacturer.in_(manufacturer_ids) | Signature.manufacturer.is_null(),
+                              ('manufacturer', manufacturer_filter))
+        try:
+            self.signatures_model.set_filter(list_filter)
+        except Exception as e:
+            print(f"Ошибка фильтрации сигнатур: {e}")
+
+    def on_malware_card_action(self, action, malware):
+        if action == 'edit':
+            self.edit_malware(malware)
+        elif action == 'delete':
+            self.delete_malware(malware)
+
+    def edit_malware(self, malware):
+        try:
+            dialog = EditMalwareDialog(malware, self)
+            dialog.exec()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть диалог редактирования: {str(e)}")
+
+    def delete_malware(self, malware):
+        reply = QMessageBox.question(self, "Удаление",
+                                   f"Вы точно хотите удалить ВП '{malware.name}'?",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            try:
+                # Проверяем, есть ли связанные сигнатуры
+                signatures_count = Signature.select().where(Signature.malware == malware).count()
+                if signatures_count > 0:
+                    QMessageBox.warning(self, "Ошибка",
+                                      f"Невозможно удалить ВП. У нее есть {signatures_count} связанных сигнатур.")
+                    return
+
+                malware.delete_instance()
+                QMessageBox.information(self, "Успех", "Вредоносная программа успешно удалена")
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить вредоносную программу: {str(e)}")
+
+    def on_signature_card_action(self, action, signature):
+        if action == 'show_malware':
+            self.show_malware_detail(signature.malware)
+        elif action == 'show_manufacturer':
+            if signature.manufacturer:
+                self.show_manufacturer_detail(signature.manufacturer)
+            else:
+                QMessageBox.information(self, "Информация", "Производитель не указан для этой сигнатуры")
+        elif action == 'edit':
+            self.edit_signature(signature)
+        elif action == 'delete':
+            self.delete_signature(signature)
+
+    def show_malware_detail(self, malware):
+        try:
+            malware_page = MalwareDetailPage(malware, self)
+            self.stacked_widget.addWidget(malware_page)
+            self.stacked_widget.setCurrentWidget(malware_page)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть страницу ВП: {str(e)}")
+
+    def edit_signature(self, signature):
+        try:
+            dialog = EditSignatureDialog(signature, self)
+            dialog.exec()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть диалог редактирования: {str(e)}")
+
+    def delete_signature(self, signature):
+        reply = QMessageBox.question(self, "Удаление",
+                                   f"Вы точно хотите удалить сигнатуру '{signature.name}'?",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            try:
+                signature.delete_instance()
+                QMessageBox.information(self, "Успех", "Сигнатура успешно удалена")
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить сигнатуру: {str(e)}")
 
     def create_new_manufacturer_page(self):
         page = QWidget()
@@ -4402,7 +5331,8 @@ class MainWindow(QMainWindow):
                 font-size: 14px;
             }
         """)
-        self.manufacturer_search_input.textChanged.connect(self.filter_manufacturers)
+        self.manufacturer_search_debouncer = SearchDebouncer(self.filter_manufacturers, self.search_debounce_ms, self)
+        self.manufacturer_search_input.textChanged.connect(self.manufacturer_search_debouncer.trigger)
         filters_layout.addWidget(self.manufacturer_search_input)
         
         # Фильтр по стране
@@ -4455,6 +5385,10 @@ class MainWindow(QMainWindow):
         
         self.manufacturers_container = QWidget()
         self.manufacturers_grid = QVBoxLayout(self.manufacturers_container)
+        # Загруженные производители: manufacturer_id -> (запись, виджет, текст для поиска)
+        self.manufacturer_index = {}
+        # Последний фильтр: (строка поиска, остальные фильтры, id совпавших производителей)
+        self.manufacturer_last_filter = ("", None, None)
         
         self.manufacturers_layout.addWidget(self.manufacturers_container)
         self.manufacturers_layout.addStretch()
@@ -4708,7 +5642,8 @@ class MainWindow(QMainWindow):
                 font-size: 14px;
             }
         """)
-        self.product_search_input.textChanged.connect(self.filter_products)
+        self.product_search_debouncer = SearchDebouncer(self.filter_products, self.search_debounce_ms, self)
+        self.product_search_input.textChanged.connect(self.product_search_debouncer.trigger)
         filters_layout.addWidget(self.product_search_input)
         
         # Фильтр по производителю
@@ -4755,32 +5690,15 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(filters_widget)
         
-        scroll_area = QScrollArea()
-
-        scroll_widget = QWidget()
-        self.products_layout = QVBoxLayout(scroll_widget)
-        
-        self.products_container = QWidget()
-        self.products_grid = QHBoxLayout(self.products_container)
-        self.products_grid.addStretch()
-        
-        self.products_layout.addWidget(self.products_container)
-        self.products_layout.addStretch()
-        
-        scroll_area.setWidget(scroll_widget)
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background-color: transparent;
-            }
-        """)
-        
-        layout.addWidget(scroll_area)
+        self.products_model = RecordListModel(self)
+        self.products_view = self.create_card_list_view(self.products_model, ProductCardDelegate, self.on_product_card_action)
+        layout.addWidget(self.products_view)
         
         return page
     
     def create_dashboard_page(self):
+        self.dashboard_stats = self.load_dashboard_stats()
+        
         page = QWidget()
         layout = QVBoxLayout(page)
         
@@ -4873,68 +5791,16 @@ class MainWindow(QMainWindow):
         layout.setContentsMargins(10, 10, 10, 20)
         layout.setSpacing(15)
         
-        # Получаем актуальные данные из базы
-        try:
-            total_manufacturers = Manufacturer.select().count()
-            total_products = Product.select().count()
-            total_malware = Malware.select().count()
-            total_signatures = Signature.select().count()
-            
-            # Страны производителей
-            countries_count = len(set(m.country for m in Manufacturer.select()))
-            
-            # Уровни опасности
-            critical_threats = Malware.select().where(Malware.threat_level == 'Критический').count()
-            
-            # Типы вредоносных программ
-            malware_types = len(set(m.malware_type for m in Malware.select()))
-            
-        except Exception as e:
-            print(f"Ошибка загрузки данных для дашборда: {e}")
-            # Значения по умолчанию
-            total_manufacturers = 3
-            total_products = 0
-            total_malware = 2
-            total_signatures = 1
-            countries_count = 3
-            critical_threats = 1
-            malware_types = 2
-        
-        # Карточка 1: Производители
-        card1 = self.create_stat_card(
-            "ПРОИЗВОДИТЕЛИ", 
-            f"{total_manufacturers}", 
-            f"из {countries_count} стран", 
-            "#4CAF50"
-        )
-        layout.addWidget(card1)
-        
-        # Карточка 2: Антивирусы
-        card2 = self.create_stat_card(
-            "АНТИВИРУСЫ", 
-            f"{total_products}", 
-            "в каталоге", 
-            "#2196F3"
-        )
-        layout.addWidget(card2)
-        
-        # Карточка 3: Вредоносные программы
-        card3 = self.create_stat_card(
-            "ВРЕДОНОСНЫЕ ПРОГРАММЫ", 
-            f"{total_malware}", 
-            f"{critical_threats} критических", 
-            "#FF9800"
-        )
-        layout.addWidget(card3)
-        
-        # Карточка 4: Сигнатуры
-        card4 = self.create_stat_card(
-            "СИГНАТУРЫ", 
-            f"{total_signatures}", 
-            f"{malware_types} типов угроз", 
-            "#9C27B0"
-        )
-        layout.addWidget(card4)
+        # Значения карточек заполняет update_stats_cards из self.dashboard_stats
+        self.stat_cards = {
+            'manufacturers': self.create_stat_card("ПРОИЗВОДИТЕЛИ", "", "", "#4CAF50"),
+            'products': self.create_stat_card("АНТИВИРУСЫ", "", "в каталоге", "#2196F3"),
+            'malware': self.create_stat_card("ВРЕДОНОСНЫЕ ПРОГРАММЫ", "", "", "#FF9800"),
+            'signatures': self.create_stat_card("СИГНАТУРЫ", "", "", "#9C27B0"),
+        }
+        for card in self.stat_cards.values():
+            layout.addWidget(card)
+        self.update_stats_cards()
         
         return widget
 
@@ -5003,44 +5869,54 @@ class MainWindow(QMainWindow):
         
         layout.addStretch()
         
+        card.value_label = value_label
+        card.description_label = desc_label
         return card
 
+    def load_dashboard_stats(self):
+        """Показатели для всех виджетов дашборда или None, если их не удалось получить"""
+        try:
+            return DashboardStats.load()
+        except Exception as e:
+            print(f"Ошибка загрузки данных для дашборда: {e}")
+            return None
+
     def update_dashboard(self):
+        # Показатели загружаются один раз и используются всеми виджетами
+        self.dashboard_stats = self.load_dashboard_stats()
         self.update_pie_chart()
         self.update_bar_chart()
         self.update_stats_cards()
+        self.update_stats_widget()
 
     def update_stats_cards(self):
         """Обновляет данные в информационных карточках"""
-        try:
-            # Эта функция будет вызываться при изменении данных
-            # В реальном приложении здесь можно обновлять карточки
-            pass
-        except Exception as e:
-            print(f"Ошибка обновления карточек: {e}")
+        stats = self.dashboard_stats or DashboardStats()
+        values = {
+            'manufacturers': (stats.manufacturers, f"из {stats.countries} стран"),
+            'products': (stats.products, "в каталоге"),
+            'malware': (stats.malware, f"{stats.critical_malware} критических"),
+            'signatures': (stats.signatures, f"{stats.malware_types} типов угроз"),
+        }
+        for key, (value, description) in values.items():
+            self.stat_cards[key].value_label.setText(f"{value}")
+            self.stat_cards[key].description_label.setText(description)
 
     def update_pie_chart(self):
         """Обновляет круговую диаграмму распределения по производителям"""
         self.pie_canvas.axes.clear()
         
         try:
-            # Получаем данные о производителях и количестве их продуктов
-            manufacturers = Manufacturer.select()
-            manufacturer_data = []
-            
-            for manufacturer in manufacturers:
-                products_count = Product.select().where(Product.manufacturer == manufacturer).count()
-                manufacturer_data.append({
-                    'name': manufacturer.name,
-                    'count': products_count
-                })
+            if self.dashboard_stats is None:
+                raise RuntimeError("статистика не загружена")
             
             # Сортируем по количеству продуктов (по убыванию)
-            manufacturer_data.sort(key=lambda x: x['count'], reverse=True)
+            manufacturer_data = sorted(self.dashboard_stats.products_by_manufacturer,
+                                       key=lambda item: item[1], reverse=True)
             
             # Подготавливаем данные для диаграммы
-            labels = [data['name'] for data in manufacturer_data]
-            sizes = [data['count'] for data in manufacturer_data]
+            labels = [name for name, _ in manufacturer_data]
+            sizes = [count for _, count in manufacturer_data]
             
             # Цвета для диаграммы
             colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc', '#c2c2f0']
@@ -5084,15 +5960,12 @@ class MainWindow(QMainWindow):
         self.bar_canvas.axes.clear()
         
         try:
-            # Получаем данные о производителях и количестве их продуктов
-            manufacturers = Manufacturer.select()
-            manufacturer_names = []
-            product_counts = []
+            if self.dashboard_stats is None:
+                raise RuntimeError("статистика не загружена")
             
-            for manufacturer in manufacturers:
-                products_count = Product.select().where(Product.manufacturer == manufacturer).count()
-                manufacturer_names.append(manufacturer.name)
-                product_counts.append(products_count)
+            # Те же данные, что и у круговой диаграммы, в порядке производителей
+            manufacturer_names = [name for name, _ in self.dashboard_stats.products_by_manufacturer]
+            product_counts = [count for _, count in self.dashboard_stats.products_by_manufacturer]
             
             # Создаем столбчатую диаграмму
             bars = self.bar_canvas.axes.bar(manufacturer_names, product_counts, 
@@ -5134,16 +6007,6 @@ class MainWindow(QMainWindow):
         stats_widget = QWidget()
         stats_layout = QHBoxLayout(stats_widget)
         
-        # Получаем актуальные данные
-        try:
-            total_products = Product.select().count()
-            total_manufacturers = Manufacturer.select().count()
-            avg_products = total_products / total_manufacturers if total_manufacturers > 0 else 0
-        except:
-            total_products = 0
-            total_manufacturers = 0
-            avg_products = 0
-        
         total_products_widget = QWidget()
         total_products_layout = QVBoxLayout(total_products_widget)
         
@@ -5151,7 +6014,7 @@ class MainWindow(QMainWindow):
         total_products_label.setStyleSheet("font-size: 16px; font-weight: 700; color: #f4f4bd; text-transform: uppercase; margin: 0 auto 0;")
         total_products_layout.addWidget(total_products_label)
         
-        self.total_products_value = QLabel(f"{total_products}")
+        self.total_products_value = QLabel()
         self.total_products_value.setStyleSheet("""
             QLabel {
                 font-size: 24px;
@@ -5172,7 +6035,7 @@ class MainWindow(QMainWindow):
         total_manufacturers_label.setStyleSheet("font-size: 16px; font-weight: 700; color: #f4f4bd; text-transform: uppercase; margin: 0 auto 0;")
         total_manufacturers_layout.addWidget(total_manufacturers_label)
         
-        self.total_manufacturers_value = QLabel(f"{total_manufacturers}")
+        self.total_manufacturers_value = QLabel()
         self.total_manufacturers_value.setStyleSheet("""
             QLabel {
                 font-size: 24px;
@@ -5193,7 +6056,7 @@ class MainWindow(QMainWindow):
         avg_label.setStyleSheet("font-size: 16px; font-weight: 700; color: #f4f4bd; text-transform: uppercase; margin: 0 auto 0;")
         avg_layout.addWidget(avg_label)
         
-        self.avg_value = QLabel(f"{avg_products:.1f}")
+        self.avg_value = QLabel()
         self.avg_value.setStyleSheet("""
             QLabel {
                 font-size: 24px;
@@ -5210,148 +6073,78 @@ class MainWindow(QMainWindow):
         stats_layout.addWidget(total_products_widget)
         stats_layout.addWidget(total_manufacturers_widget)
         stats_layout.addWidget(avg_widget)
+        self.update_stats_widget()
         
         return stats_widget
 
-    # Методы для загрузки фильтров
+    def update_stats_widget(self):
+        stats = self.dashboard_stats or DashboardStats()
+        self.total_products_value.setText(f"{stats.products}")
+        self.total_manufacturers_value.setText(f"{stats.manufacturers}")
+        self.avg_value.setText(f"{stats.average_products:.1f}")
+
+    # Методы для загрузки фильтров: значения берутся из общего справочника reference_data
     def load_product_filters(self):
         """Загрузка данных для фильтров продуктов"""
         try:
-            # Загрузка производителей
-            self.product_manufacturer_filter.clear()
-            self.product_manufacturer_filter.addItem("Все производители")
-            manufacturers = Manufacturer.select().order_by(Manufacturer.name)
-            for manufacturer in manufacturers:
-                self.product_manufacturer_filter.addItem(manufacturer.name)
-            
-            # Загрузка годов
-            self.product_year_filter.clear()
-            self.product_year_filter.addItem("Все годы")
-            years = Product.select(Product.release_date).distinct().order_by(Product.release_date.desc())
-            year_set = set()
-            for product in years:
-                if product.release_date:
-                    year = product.release_date.year
-                    year_set.add(year)
-            
-            for year in sorted(year_set, reverse=True):
-                self.product_year_filter.addItem(str(year))
-                
+            fill_combo(self.product_manufacturer_filter,
+                       [name for _, name in reference_data.manufacturers()], "Все производители")
+            fill_combo(self.product_year_filter, reference_data.years(Product), "Все годы")
         except Exception as e:
             print(f"Ошибка загрузки фильтров продуктов: {e}")
 
     def load_manufacturer_filters(self):
         """Загрузка данных для фильтров производителей"""
         try:
-            # Загрузка стран
-            self.manufacturer_country_filter.clear()
-            self.manufacturer_country_filter.addItem("Все страны")
-            countries = Manufacturer.select(Manufacturer.country).distinct().order_by(Manufacturer.country)
-            country_set = set()
-            for manufacturer in countries:
-                if manufacturer.country:
-                    country_set.add(manufacturer.country)
-            
-            for country in sorted(country_set):
-                self.manufacturer_country_filter.addItem(country)
-            
-            # Загрузка годов
-            self.manufacturer_year_filter.clear()
-            self.manufacturer_year_filter.addItem("Все годы")
-            years = Manufacturer.select(Manufacturer.creation_date).distinct().order_by(Manufacturer.creation_date.desc())
-            year_set = set()
-            for manufacturer in years:
-                if manufacturer.creation_date:
-                    year = manufacturer.creation_date.year
-                    year_set.add(year)
-            
-            for year in sorted(year_set, reverse=True):
-                self.manufacturer_year_filter.addItem(str(year))
-                
+            fill_combo(self.manufacturer_country_filter, reference_data.countries(), "Все страны")
+            fill_combo(self.manufacturer_year_filter, reference_data.years(Manufacturer), "Все годы")
         except Exception as e:
             print(f"Ошибка загрузки фильтров производителей: {e}")
 
     def load_signature_filters(self):
         """Загрузка данных для фильтров сигнатур"""
         try:
-            # Загрузка вредоносных программ
-            self.signature_malware_filter.clear()
-            self.signature_malware_filter.addItem("Все ВП")
-            malware_list = Malware.select().order_by(Malware.name)
-            for malware in malware_list:
-                self.signature_malware_filter.addItem(f"{malware.malware_id} - {malware.name}")
-            
-            # Загрузка производителей
-            self.signature_manufacturer_filter.clear()
-            self.signature_manufacturer_filter.addItem("Все производители")
-            manufacturers = Manufacturer.select().order_by(Manufacturer.name)
-            for manufacturer in manufacturers:
-                self.signature_manufacturer_filter.addItem(manufacturer.name)
-            
-            # Загрузка годов
-            self.signature_year_filter.clear()
-            self.signature_year_filter.addItem("Все годы")
-            years = Signature.select(Signature.creation_date).distinct().order_by(Signature.creation_date.desc())
-            year_set = set()
-            for signature in years:
-                if signature.creation_date:
-                    year = signature.creation_date.year
-                    year_set.add(year)
-            
-            for year in sorted(year_set, reverse=True):
-                self.signature_year_filter.addItem(str(year))
-                
+            fill_combo(self.signature_malware_filter, reference_data.malware(), "Все ВП")
+            fill_combo(self.signature_manufacturer_filter,
+                       [name for _, name in reference_data.manufacturers()], "Все производители")
+            fill_combo(self.signature_year_filter, reference_data.years(Signature), "Все годы")
         except Exception as e:
             print(f"Ошибка загрузки фильтров сигнатур: {e}")
 
     def load_malware_filters(self):
         """Загрузка данных для фильтров вредоносных программ"""
         try:
-            # Загрузка типов
-            self.malware_type_filter.clear()
-            self.malware_type_filter.addItem("Все типы")
-            types = Malware.select(Malware.malware_type).distinct().order_by(Malware.malware_type)
-            type_set = set()
-            for malware in types:
-                if malware.malware_type:
-                    type_set.add(malware.malware_type)
-            
-            for malware_type in sorted(type_set):
-                self.malware_type_filter.addItem(malware_type)
-            
-            # Загрузка годов
-            self.malware_year_filter.clear()
-            self.malware_year_filter.addItem("Все годы")
-            years = Malware.select(Malware.discovery_date).distinct().order_by(Malware.discovery_date.desc())
-            year_set = set()
-            for malware in years:
-                if malware.discovery_date:
-                    year = malware.discovery_date.year
-                    year_set.add(year)
-            
-            for year in sorted(year_set, reverse=True):
-                self.malware_year_filter.addItem(str(year))
-                
+            fill_combo(self.malware_type_filter, reference_data.malware_types(), "Все типы")
+            fill_combo(self.malware_year_filter, reference_data.years(Malware), "Все годы")
         except Exception as e:
             print(f"Ошибка загрузки фильтров ВП: {e}")
 
+    def on_reference_data_changed(self, models):
+        """Перезаполняет списки, которые зависят от устаревших разделов справочника"""
+        loaders = []
+        if Manufacturer in models:
+            loaders += [self.load_manufacturer_filters, self.load_product_filters, self.load_signature_filters,
+                        self.load_manufacturers_combo, self.load_manufacturers_combo_signature]
+        if Malware in models:
+            loaders += [self.load_malware_filters, self.load_signature_filters, self.load_malware_combo]
+        if Product in models:
+            loaders.append(self.load_product_filters)
+        if Signature in models:
+            loaders.append(self.load_signature_filters)
+        for loader in dict.fromkeys(loaders):
+            loader()
+
     # Модифицированные методы загрузки данных
     def load_products(self):
-        if hasattr(self, 'products_grid'):
-            for i in reversed(range(self.products_grid.count())):
-                widget = self.products_grid.itemAt(i).widget()
-                if widget is not None:
-                    widget.setParent(None)
-        
         try:
-            products = Product.select().order_by(Product.product_id)
-            for product in products:
-                card = ProductCard(product, self)
-                self.products_grid.insertWidget(self.products_grid.count() - 1, card)
-            
+            products = (Product
+                       .select(Product, Manufacturer)
+                       .join(Manufacturer))
+            self.products_model.set_query(products, Product.product_id)
+
             # Загружаем фильтры после загрузки данных
             self.load_product_filters()
-            
+
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить товары: {str(e)}")
 
@@ -5362,11 +6155,15 @@ class MainWindow(QMainWindow):
                 if widget is not None:
                     widget.setParent(None)
         
+        self.manufacturer_index = {}
+        self.manufacturer_last_filter = ("", None, None)
         try:
             manufacturers = Manufacturer.select().order_by(Manufacturer.manufacturer_id)
             for manufacturer in manufacturers:
                 manufacturer_widget = self.create_manufacturer_widget(manufacturer)
                 self.manufacturers_grid.addWidget(manufacturer_widget)
+                self.manufacturer_index[manufacturer.manufacturer_id] = (manufacturer, manufacturer_widget,
+                                                                         self.manufacturer_search_text(manufacturer))
             
             # Загружаем фильтры после загрузки данных
             self.load_manufacturer_filters()
@@ -5375,132 +6172,178 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить производителей: {str(e)}")
 
     def load_signatures(self):
-        if hasattr(self, 'signatures_grid'):
-            for i in reversed(range(self.signatures_grid.count())):
-                widget = self.signatures_grid.itemAt(i).widget()
-                if widget is not None:
-                    widget.setParent(None)
-        
         try:
             # Используем правильный запрос с JOIN
             signatures = (Signature
                         .select(Signature, Manufacturer, Malware)
                         .join(Malware, on=(Signature.malware_id == Malware.id))
-                        .join(Manufacturer, JOIN.LEFT_OUTER, on=(Signature.manufacturer_id == Manufacturer.id))
-                        .order_by(Signature.signature_id))
-            
-            for signature in signatures:
-                card = SignatureCard(signature, self)
-                self.signatures_grid.insertWidget(self.signatures_grid.count() - 1, card)
-            
+                        .switch(Signature)
+                        .join(Manufacturer, JOIN.LEFT_OUTER, on=(Signature.manufacturer_id == Manufacturer.id)))
+
+            self.signatures_model.set_query(signatures, Signature.signature_id)
+
             # Загружаем фильтры после загрузки данных
             self.load_signature_filters()
-            
+
         except Exception as e:
             print(f"Ошибка загрузки сигнатур: {e}")
             # Пробуем альтернативный способ загрузки
             try:
                 print("Пробуем альтернативный способ загрузки...")
-                signatures = Signature.select().order_by(Signature.signature_id)
-                for signature in signatures:
-                    # Вручную загружаем связанные объекты
-                    try:
-                        signature.malware = Malware.get_by_id(signature.malware_id)
-                    except:
-                        signature.malware = None
-                    
-                    try:
-                        if signature.manufacturer_id:
-                            signature.manufacturer = Manufacturer.get_by_id(signature.manufacturer_id)
-                        else:
-                            signature.manufacturer = None
-                    except:
-                        signature.manufacturer = None
-                    
-                    card = SignatureCard(signature, self)
-                    self.signatures_grid.insertWidget(self.signatures_grid.count() - 1, card)
-                
+                # Связанные объекты загружаются по обращению к ним
+                self.signatures_model.set_query(Signature.select(), Signature.signature_id)
                 self.load_signature_filters()
-                
+
             except Exception as e2:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить сигнатуры: {str(e2)}")
 
+    def manufacturer_search_text(self, manufacturer):
+        # Поля для поиска приводим к нижнему регистру один раз при загрузке
+        return "\n".join(field.lower() for field in (manufacturer.name, manufacturer.country,
+                                                     manufacturer.description, manufacturer.manufacturer_id))
+
+    # Точечное обновление списков после создания, изменения и удаления записей
+    def on_record_changed(self, change):
+        """Обновляет только затронутую запись в списках, без перезагрузки страниц.
+        
+        Фильтры и выпадающие списки перезаполняются из справочника (on_reference_data_changed).
+        """
+        try:
+            record = change.record
+            if change.model is Malware:
+                self.malware_model.apply_change(change)
+                if change.action == RecordChange.UPDATED:
+                    self.signatures_model.refresh_related(Signature.malware, record)
+            elif change.model is Signature:
+                self.signatures_model.apply_change(change)
+            elif change.model is Product:
+                self.products_model.apply_change(change)
+            elif change.model is Manufacturer:
+                self.apply_manufacturer_change(change)
+                if change.action == RecordChange.DELETED:
+                    # Сигнатуры производителя удалены каскадом на стороне БД
+                    self.signatures_model.reload()
+                elif change.action == RecordChange.UPDATED:
+                    self.products_model.refresh_related(Product.manufacturer, record)
+                    self.signatures_model.refresh_related(Signature.manufacturer, record)
+        except Exception as e:
+            print(f"Ошибка обновления списка после изменения записи: {e}")
+
+    def apply_manufacturer_change(self, change):
+        """Заменяет, добавляет или убирает виджет одного производителя"""
+        manufacturer = change.record
+        key = manufacturer.manufacturer_id
+        last_text, last_params, last_matches = self.manufacturer_last_filter
+        
+        entry = self.manufacturer_index.pop(key, None)
+        position = None
+        if entry is not None:
+            widget = entry[1]
+            position = self.manufacturers_grid.indexOf(widget)
+            self.manufacturers_grid.removeWidget(widget)
+            widget.setParent(None)
+        if last_matches is not None:
+            last_matches.discard(key)
+        if change.action == RecordChange.DELETED:
+            return
+        
+        if position is None or position < 0:
+            # Виджеты идут в порядке manufacturer_id
+            position = sum(1 for other in self.manufacturer_index if other < key)
+        widget = self.create_manufacturer_widget(manufacturer)
+        self.manufacturers_grid.insertWidget(position, widget)
+        search_text = self.manufacturer_search_text(manufacturer)
+        self.manufacturer_index[key] = (manufacturer, widget, search_text)
+        
+        visible = self.manufacturer_matches(manufacturer, search_text,
+                                            self.manufacturer_search_input.text().lower(),
+                                            self.manufacturer_country_filter.currentText(),
+                                            self.manufacturer_year_filter.currentText())
+        widget.setVisible(visible)
+        if visible and last_matches is not None:
+            last_matches.add(key)
+
     def filter_products(self):
-        search_text = self.product_search_input.text().lower()
         manufacturer_filter = self.product_manufacturer_filter.currentText()
-        year_filter = self.product_year_filter.currentText()
-        
-        for i in range(self.products_grid.count()):
-            widget = self.products_grid.itemAt(i).widget()
-            if widget and isinstance(widget, ProductCard):
-                product = widget.product
-                
-                # Проверка текстового поиска
-                text_match = (search_text in product.name.lower() or 
-                             search_text in product.version.lower() or 
-                             search_text in product.update_size.lower() or
-                             search_text in product.description.lower() or
-                             search_text in product.product_id.lower())
-                
-                # Проверка фильтра по производителю
-                manufacturer_match = (manufacturer_filter == "Все производители" or 
-                                     manufacturer_filter == product.manufacturer.name)
-                
-                # Проверка фильтра по году
-                year_match = True
-                if year_filter != "Все годы" and product.release_date:
-                    year_match = str(product.release_date.year) == year_filter
-                
-                if text_match and manufacturer_match and year_match:
-                    widget.show()
-                else:
-                    widget.hide()
+
+        list_filter = (ListFilter()
+                       .search(self.product_search_input.text(),
+                               Product.name, Product.version, Product.update_size,
+                               Product.description, Product.product_id)
+                       .year(Product.release_date, self.selected_year(self.product_year_filter)))
+        if manufacturer_filter != "Все производители":
+            manufacturer_ids = Manufacturer.select(Manufacturer.id).where(Manufacturer.name == manufacturer_filter)
+            list_filter.where(Product.manufacturer.in_(manufacturer_ids), ('manufacturer', manufacturer_filter))
+        try:
+            self.products_model.set_filter(list_filter)
+        except Exception as e:
+            print(f"Ошибка фильтрации товаров: {e}")
+
+    def on_product_card_action(self, action, product):
+        if action == 'show_manufacturer':
+            self.show_manufacturer_detail(product.manufacturer)
+        elif action == 'edit':
+            self.edit_product(product)
+        elif action == 'delete':
+            self.delete_product(product)
+
+    def edit_product(self, product):
+        try:
+            dialog = EditProductDialog(product, self)
+            dialog.exec()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть диалог редактирования: {str(e)}")
+
+    def delete_product(self, product):
+        reply = QMessageBox.question(self, "Удаление",
+                                   f"Вы точно хотите удалить товар '{product.name}'?",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            try:
+                product.delete_instance()
+                QMessageBox.information(self, "Успех", "Товар успешно удален")
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить товар: {str(e)}")
 
     def filter_manufacturers(self):
         search_text = self.manufacturer_search_input.text().lower()
         country_filter = self.manufacturer_country_filter.currentText()
         year_filter = self.manufacturer_year_filter.currentText()
         
-        for i in range(self.manufacturers_grid.count()):
-            widget = self.manufacturers_grid.itemAt(i).widget()
-            if widget:
-                manufacturer = None
-                # Находим производителя в виджете
-                for child in widget.findChildren(QLabel):
-                    if child.text().startswith("ID:"):
-                        manufacturer_id = child.text().split(": ")[1]
-                        manufacturer = Manufacturer.get_or_none(Manufacturer.manufacturer_id == manufacturer_id)
-                        break
-                
-                if manufacturer:
-                    # Проверка текстового поиска
-                    text_match = (search_text in manufacturer.name.lower() or 
-                                 search_text in manufacturer.country.lower() or 
-                                 search_text in manufacturer.description.lower() or
-                                 search_text in manufacturer.manufacturer_id.lower())
-                    
-                    # Проверка фильтра по стране
-                    country_match = (country_filter == "Все страны" or 
-                                    country_filter == manufacturer.country)
-                    
-                    # Проверка фильтра по году
-                    year_match = True
-                    if year_filter != "Все годы" and manufacturer.creation_date:
-                        year_match = str(manufacturer.creation_date.year) == year_filter
-                    
-                    if text_match and country_match and year_match:
-                        widget.show()
-                    else:
-                        widget.hide()
-                else:
-                    widget.hide()
+        # Фильтруем по индексу загруженных производителей, без запросов к БД
+        candidates = self.manufacturer_index.keys()
+        last_text, last_params, last_matches = self.manufacturer_last_filter
+        if last_matches is not None and last_params == (country_filter, year_filter) and last_text in search_text:
+            # Строка поиска дополнена: остальные производители уже скрыты, проверяем только прошлые совпадения
+            candidates = last_matches
+        
+        matches = set()
+        for manufacturer_id in candidates:
+            manufacturer, widget, manufacturer_text = self.manufacturer_index[manufacturer_id]
+            if self.manufacturer_matches(manufacturer, manufacturer_text, search_text, country_filter, year_filter):
+                matches.add(manufacturer_id)
+            widget.setVisible(manufacturer_id in matches)
+        
+        self.manufacturer_last_filter = (search_text, (country_filter, year_filter), matches)
+    
+    def manufacturer_matches(self, manufacturer, manufacturer_text, search_text, country_filter, year_filter):
+        # Проверка текстового поиска
+        text_match = search_text in manufacturer_text
+        
+        # Проверка фильтра по стране
+        country_match = (country_filter == "Все страны" or 
+                        country_filter == manufacturer.country)
+        
+        # Проверка фильтра по году
+        year_match = True
+        if year_filter != "Все годы" and manufacturer.creation_date:
+            year_match = str(manufacturer.creation_date.year) == year_filter
+        
+        return text_match and country_match and year_match
 
     def load_manufacturers_combo(self):
-        self.manufacturer_combo.clear()
         try:
-            manufacturers = Manufacturer.select()
-            for manufacturer in manufacturers:
-                self.manufacturer_combo.addItem(manufacturer.name, manufacturer.id)
+            fill_combo(self.manufacturer_combo, reference_data.manufacturers())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить производителей: {str(e)}")
     
@@ -5539,7 +6382,6 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Успех", "Производитель успешно создан")
             self.clear_manufacturer_form()
             self.stacked_widget.setCurrentIndex(4)
-            self.load_manufacturers()
             
         except IntegrityError as e:
             QMessageBox.critical(self, "Ошибка", f"Производитель с таким ID уже существует. Сгенерирован новый ID.")
@@ -5713,7 +6555,6 @@ class MainWindow(QMainWindow):
             
             try:
                 manufacturer.delete_instance()
-                self.load_manufacturers()
                 QMessageBox.information(self, "Успех", "Производитель успешно удален")
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось удалить производителя: {str(e)}")
@@ -5754,7 +6595,6 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Успех", "Товар успешно создан")
             self.clear_form()
             self.stacked_widget.setCurrentIndex(7)
-            self.load_products()
             
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось создать товар: {str(e)}")
@@ -5825,8 +6665,13 @@ class PDFReporter:
     def __init__(self, filename):
         self.filename = filename
         self.styles = getSampleStyleSheet()
+        self.progress = ExportProgress()
         self.setup_custom_styles()
     
+    def count_progress_rows(self):
+        """Сколько шагов progress.advance() сделает генерация отчета"""
+        return 0
+    
     def setup_custom_styles(self):
         """Настройка пользовательских стилей с поддержкой кириллицы"""
         # Определяем шрифты для использования
@@ -5913,6 +6758,10 @@ class StatisticalPDFReporter(PDFReporter):
     def __init__(self, filename="statistical_report.pdf"):
         super().__init__(filename)
     
+    def count_progress_rows(self):
+        # Отчет строится из агрегатов: шаги - общая статистика и анализ
+        return 2
+    
     def generate_report(self):
         """Генерация статистического отчета"""
         try:
@@ -5942,6 +6791,7 @@ class StatisticalPDFReporter(PDFReporter):
             # Получаем статистические данные
             stats_data = self.get_statistical_data()
             story.extend(self.create_statistics_section(stats_data))
+            self.progress.advance()
             
             # Анализ данных
             story.append(Paragraph("АНАЛИЗ ДАННЫХ", self.styles['RussianHeading2']))
@@ -5949,6 +6799,7 @@ class StatisticalPDFReporter(PDFReporter):
             
             analysis_data = self.get_analysis_data()
             story.extend(self.create_analysis_section(analysis_data))
+            self.progress.advance()
             
             doc.build(story, onFirstPage=self.add_page_number, onLaterPages=self.add_page_number)
             logger.info(f"Статистический отчет создан: {self.filename}")
@@ -5972,14 +6823,16 @@ class StatisticalPDFReporter(PDFReporter):
     def get_statistical_data(self):
         """Получение статистических данных из БД"""
         try:
+            summary = read_statistics()
             data = {
-                'total_manufacturers': Manufacturer.select().count(),
-                'total_products': Product.select().count(),
-                'total_malware': Malware.select().count(),
-                'total_signatures': Signature.select().count(),
-                'countries_count': len(set(m.country for m in Manufacturer.select())),
-                'critical_threats': Malware.select().where(Malware.threat_level == 'Критический').count(),
-                'malware_types': len(set(m.malware_type for m in Malware.select())),
+                'total_manufacturers': summary.manufacturers,
+                'total_products': summary.products,
+                'total_malware': summary.malware,
+                'total_signatures': summary.signatures,
+                'countries_count': summary.countries,
+                'critical_threats': summary.critical_malware,
+                'malware_types': summary.malware_types,
+                # Зависит от текущей даты, поэтому не материализуется; идет по индексу release_date
                 'recent_products': Product.select().where(
                     Product.release_date >= datetime.now().date() - timedelta(days=30)
                 ).count()
@@ -5995,24 +6848,13 @@ class StatisticalPDFReporter(PDFReporter):
         """Получение данных для анализа"""
         try:
             # Распределение продуктов по производителям
-            manufacturer_stats = []
-            manufacturers = Manufacturer.select()
-            for manufacturer in manufacturers:
-                products_count = Product.select().where(Product.manufacturer == manufacturer).count()
-                manufacturer_stats.append({
-                    'name': manufacturer.name,
-                    'products_count': products_count
-                })
+            manufacturer_stats = [{'name': manufacturer.name, 'products_count': manufacturer.products_count}
+                                  for manufacturer in manufacturers_with_product_counts()]
             
             # Распределение ВП по уровням опасности
-            threat_stats = []
+            threat_counts = statistics_group('threat_level')
             threat_levels = ['Критический', 'Высокий', 'Средний', 'Низкий']
-            for level in threat_levels:
-                count = Malware.select().where(Malware.threat_level == level).count()
-                threat_stats.append({
-                    'level': level,
-                    'count': count
-                })
+            threat_stats = [{'level': level, 'count': threat_counts.get(level, 0)} for level in threat_levels]
             
             # Топ производителей по количеству продуктов
             manufacturer_stats.sort(key=lambda x: x['products_count'], reverse=True)
@@ -6149,6 +6991,9 @@ class DetailedPDFReporter(PDFReporter):
     def __init__(self, filename="detailed_report.pdf"):
         super().__init__(filename)
     
+    def count_progress_rows(self):
+        return count_export_rows()
+    
     def generate_report(self):
         """Генерация детального отчета"""
         try:
@@ -6243,6 +7088,7 @@ class DetailedPDFReporter(PDFReporter):
                     Paragraph(manufacturer.website, self.styles['RussianTableCell']),
                     Paragraph(creation_date, self.styles['RussianTableCell'])
                 ])
+                self.progress.advance()
             
             # Создаем таблицу с автоматическим определением ширины колонок
             table = Table(table_data, colWidths=[1*inch, 2*inch, 1*inch, 1.5*inch, 1*inch])
@@ -6312,6 +7158,7 @@ class DetailedPDFReporter(PDFReporter):
                     Paragraph(product.update_size, self.styles['RussianTableCell']),
                     Paragraph(release_date, self.styles['RussianTableCell'])
                 ])
+                self.progress.advance()
             
             table = Table(table_data, colWidths=[0.8*inch, 1.5*inch, 1.2*inch, 0.8*inch, 0.8*inch, 1*inch])
             table.setStyle(TableStyle([
@@ -6370,6 +7217,7 @@ class DetailedPDFReporter(PDFReporter):
                     Paragraph(malware.threat_level, self.styles['RussianTableCell']),
                     Paragraph(discovery_date, self.styles['RussianTableCell'])
                 ])
+                self.progress.advance()
             
             table = Table(table_data, colWidths=[0.8*inch, 2*inch, 1.2*inch, 1.2*inch, 1*inch])
             
@@ -6431,6 +7279,7 @@ class DetailedPDFReporter(PDFReporter):
             ]]
             
             for signature in signatures:
+                self.progress.advance()
                 try:
                     # Загружаем связанные объекты вручную
                     malware_name = "Неизвестно"
@@ -6491,6 +7340,111 @@ class DetailedPDFReporter(PDFReporter):
         
         return elements
 
+# МОДУЛЬ ФОНОВОГО ЭКСПОРТА
+class ExportJobSignals(QObject):
+    """Сигналы задачи экспорта; из рабочего потока доставляются в поток GUI через очередь событий"""
+    progress = pyqtSignal(int, int, int)    # id задачи, обработано строк, всего строк
+    finished = pyqtSignal(int, bool, str)   # id задачи, успех, имя файла или текст ошибки
+    cancelled = pyqtSignal(int)             # id задачи
+
+class ExportJob(QRunnable):
+    """Задача экспорта для QThreadPool.
+    
+    Генератор отчета создается и работает в рабочем потоке. peewee хранит подключения
+    отдельно для каждого потока, поэтому у задачи собственное подключение к БД,
+    которое закрывается по ее завершении.
+    """
+    
+    REPORTERS = {
+        'excel': ExcelExporter,
+        'statistical_pdf': StatisticalPDFReporter,
+        'detailed_pdf': DetailedPDFReporter,
+    }
+    
+    def __init__(self, job_id, kind, filename):
+        super().__init__()
+        self.job_id = job_id
+        self.kind = kind
+        self.filename = filename
+        self.signals = ExportJobSignals()
+        self.cancel_event = threading.Event()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def run(self):
+        try:
+            if self.cancel_event.is_set():
+                raise ExportCancelled()
+            
+            with db.connection_context():
+                reporter = self.REPORTERS[self.kind](self.filename)
+                reporter.progress = ExportProgress(callback=self._emit_progress,
+                                                   cancel_event=self.cancel_event)
+                reporter.progress.total = reporter.count_progress_rows()
+                success, result = self._generate(reporter)
+        except ExportCancelled:
+            self.signals.cancelled.emit(self.job_id)
+            return
+        except Exception as e:
+            logger.error(f"Ошибка фонового экспорта {self.filename}: {e}")
+            success, result = False, str(e)
+        
+        self.signals.finished.emit(self.job_id, success, result)
+    
+    def _emit_progress(self, done, total):
+        self.signals.progress.emit(self.job_id, done, total)
+    
+    def _generate(self, reporter):
+        if isinstance(reporter, ExcelExporter):
+            # Для больших баз включаем потоковый режим с постоянным расходом памяти
+            reporter.streaming = reporter.progress.total >= STREAMING_EXPORT_THRESHOLD
+            return reporter.export_all_data()
+        
+        if reporter.generate_report():
+            return True, self.filename
+        return False, "Не удалось создать отчет"
+
+class ExportJobRunner(QObject):
+    """Запускает экспорты в пуле потоков, несколько экспортов могут выполняться одновременно"""
+    
+    progress = pyqtSignal(int, int, int)
+    finished = pyqtSignal(int, bool, str)
+    cancelled = pyqtSignal(int)
+    
+    def __init__(self, parent=None, max_jobs=4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_jobs)
+        self.jobs = {}
+        self._next_job_id = 1
+    
+    def start(self, kind, filename):
+        job = ExportJob(self._next_job_id, kind, filename)
+        self._next_job_id += 1
+        
+        # Объект задачи живет, пока она в self.jobs, а не удаляется пулом
+        job.setAutoDelete(False)
+        job.signals.progress.connect(self.progress)
+        job.signals.finished.connect(self.finished)
+        job.signals.cancelled.connect(self.cancelled)
+        job.signals.finished.connect(lambda job_id, success, result: self.jobs.pop(job_id, None))
+        job.signals.cancelled.connect(lambda job_id: self.jobs.pop(job_id, None))
+        
+        self.jobs[job.job_id] = job
+        self.pool.start(job)
+        return job
+    
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job:
+            job.cancel()
+    
+    def cancel_all(self, wait_msecs=-1):
+        for job in list(self.jobs.values()):
+            job.cancel()
+        self.pool.waitForDone(wait_msecs)
+
 # Интеграция с главным окном приложения
 def add_pdf_export_to_main_window(main_window_class):
     """Добавляет функциональность PDF-экспорта в главное окно"""
@@ -6511,20 +7465,7 @@ def add_pdf_export_to_main_window(main_window_class):
             )
             
             if filename:
-                reporter = StatisticalPDFReporter(filename)
-                success = reporter.generate_report()
-                
-                if success:
-                    QMessageBox.information(self, "Успех", 
-                                          f"Статистический отчет успешно сохранен:\n{filename}")
-                    # Открываем файл
-                    try:
-                        os.startfile(filename)
-                    except:
-                        QMessageBox.information(self, "Успех", f"Файл сохранен: {filename}")
-                else:
-                    QMessageBox.critical(self, "Ошибка", 
-                                       "Не удалось создать статистический отчет")
+                self.start_export_job('statistical_pdf', filename, "Создание статистического отчета...")
                     
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", 
@@ -6540,20 +7481,7 @@ def add_pdf_export_to_main_window(main_window_class):
             )
             
             if filename:
-                reporter = DetailedPDFReporter(filename)
-                success = reporter.generate_report()
-                
-                if success:
-                    QMessageBox.information(self, "Успех", 
-                                          f"Детальный отчет успешно сохранен:\n{filename}")
-                    # Открываем файл
-                    try:
-                        os.startfile(filename)
-                    except:
-                        QMessageBox.information(self, "Успех", f"Файл сохранен: {filename}")
-                else:
-                    QMessageBox.critical(self, "Ошибка", 
-                                       "Не удалось создать детальный отчет")
+                self.start_export_job('detailed_pdf', filename, "Создание детального отчета...")
                     
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", 
@@ -6636,14 +7564,1493 @@ def new_create_menu_buttons(self, layout):
 
 MainWindow.create_menu_buttons = new_create_menu_buttons
 
+# МОДУЛЬ СКАНИРОВАНИЯ
+
+def parse_signature_pattern(data):
+    """Байтовый шаблон из Signature.data (hex, пробелы допускаются) или None, если это не hex"""
+    try:
+        pattern = bytes.fromhex(data)
+    except (TypeError, ValueError):
+        return None
+    return pattern or None
+
+class SignatureMatcher:
+    """Поиск байтовых шаблонов: автомат Ахо-Корасик и векторный предфильтр по первым байтам.
+    
+    Данные просматриваются numpy-операциями блоками по SCAN_BLOCK_SIZE байт:
+    четыре байта с каждой позиции читаются как uint32 (четыре представления блока
+    со сдвигом 0..3, без копирования). Шаблоны короче LONG_PREFIX_LENGTH
+    проверяются по хэшу этих четырех байт, длинные - по хэшу восьми (два
+    соседних uint32 того же представления): сначала по первой битовой таблице
+    хэшей, затем прошедшие - по второй с другими множителями и точно по
+    отсортированным массивам prefixes и long_prefixes. Каждая таблица не больше
+    2^FILTER_MAX_BITS бит, чтобы оставаться в кэше процессора.
+    Шаблоны короче PREFIX_LENGTH проверяются по плотным таблицам всех значений
+    своей длины.
+    
+    Автомат читает данные с позиции, прошедшей фильтр, и дальше, пока у него
+    есть незавершенное совпадение, начатое с такой позиции; остальные
+    совпадения отбрасываются по суффиксным ссылкам, и автомат переходит к
+    следующей позиции фильтра. Каждый байт данных автомат читает не больше
+    одного раза, поэтому время сканирования линейно по объему данных и числу
+    находок при любых шаблонах, а на данных, где префиксы шаблонов редки
+    (в том числе на заполнении нулями), почти не зависит от числа шаблонов.
+    
+    Автомат хранится плоскими массивами: ребра состояния s - позиции
+    edge_start[s]..edge_start[s + 1] в labels (байт, по возрастанию) и targets
+    (состояние); fail[s] - суффиксная ссылка; out_link[s] - ближайшее по
+    суффиксным ссылкам состояние, в котором заканчиваются шаблоны (0 - нет);
+    depths[s] - глубина состояния; out_ids[out_start[s]:out_start[s + 1]] -
+    номера шаблонов, которые заканчиваются в самом s.
+    """
+    
+    ARRAYS = ('edge_start', 'labels', 'targets', 'fail', 'out_link', 'depths', 'out_start', 'out_ids',
+              'prefixes', 'long_prefixes', 'pattern_lengths')
+    
+    # Длина префикса совпадает с размером uint32, которым он читается из данных
+    PREFIX_LENGTH = 4
+    # Шаблоны не короче этого проверяются по двум соседним uint32 (uint64 в long_prefixes)
+    LONG_PREFIX_LENGTH = 8
+    
+    # Сколько байт данных предфильтр обрабатывает за один проход (память - около 20 байт на байт блока)
+    SCAN_BLOCK_SIZE = 1 << 20
+    
+    # Размер битовой таблицы хэшей префиксов: около 64 бит на префикс, от 2^16 до 2^22 (512 КБ)
+    FILTER_MIN_BITS = 16
+    FILTER_MAX_BITS = 22
+    # Множители хэшей первой и второй таблиц (для восьми байт - пара: младшая и старшая половины)
+    FILTER_MULTIPLIERS = ((0x9E3779B1, 0x85EBCA77), (0xC2B2AE3D, 0x27D4EB2F))
+    
+    def __init__(self, edge_start, labels, targets, fail, out_link, depths, out_start, out_ids,
+                 prefixes, long_prefixes, pattern_lengths):
+        self.edge_start = edge_start
+        self.labels = labels
+        self.targets = targets
+        self.fail = fail
+        self.out_link = out_link
+        self.depths = depths
+        self.out_start = out_start
+        self.out_ids = out_ids
+        self.prefixes = np.asarray(prefixes, dtype=np.uint32)
+        # uint64 хранятся парами uint32 (младшая половина первой)
+        self.long_prefixes = np.asarray(long_prefixes, dtype=np.uint32).view(np.uint64)
+        self.pattern_lengths = pattern_lengths
+        self.state_count = len(edge_start) - 1
+        self.max_length = int(np.max(np.asarray(pattern_lengths, dtype=np.uint32), initial=0))
+        self._children = [None] * self.state_count
+        
+        long_low = (self.long_prefixes & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        long_high = (self.long_prefixes >> np.uint64(32)).astype(np.uint32)
+        self._filter_shift = np.uint32(32 - min(max(int(max(len(self.prefixes), len(long_low)) * 64).bit_length(),
+                                                    self.FILTER_MIN_BITS), self.FILTER_MAX_BITS))
+        self._short_filters = [self._bit_table(self._prefix_hash(self.prefixes, multiplier))
+                               for multiplier, _ in self.FILTER_MULTIPLIERS] if len(self.prefixes) else None
+        self._long_filters = [self._bit_table(self._pair_hash(long_low, long_high, multipliers))
+                              for multipliers in self.FILTER_MULTIPLIERS] if len(self.long_prefixes) else None
+        self._short_tables = self._build_short_tables()
+    
+    @classmethod
+    def build(cls, patterns):
+        """Строит автомат по списку шаблонов bytes; номер шаблона - его индекс в списке"""
+        goto = [{}]
+        outputs = [[]]
+        prefixes, long_prefixes = set(), set()
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for byte in pattern:
+                next_state = goto[state].get(byte)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][byte] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(index)
+            if len(pattern) >= cls.LONG_PREFIX_LENGTH:
+                long_prefixes.add(int.from_bytes(pattern[:cls.LONG_PREFIX_LENGTH], 'little'))
+            elif len(pattern) >= cls.PREFIX_LENGTH:
+                prefixes.add(int.from_bytes(pattern[:cls.PREFIX_LENGTH], 'little'))
+        
+        # Суффиксные ссылки - обходом в ширину: у более мелких состояний они уже посчитаны
+        fail, out_link, depths = (array('I', [0]) * len(goto) for _ in range(3))
+        queue = deque(goto[0].values())
+        for child in queue:
+            depths[child] = 1
+        while queue:
+            state = queue.popleft()
+            for byte, child in goto[state].items():
+                queue.append(child)
+                depths[child] = depths[state] + 1
+                link = fail[state]
+                while link and byte not in goto[link]:
+                    link = fail[link]
+                fail[child] = goto[link].get(byte, 0)
+                out_link[child] = fail[child] if outputs[fail[child]] else out_link[fail[child]]
+        
+        edge_start, labels, targets = array('I', [0]), bytearray(), array('I')
+        out_start, out_ids = array('I', [0]), array('I')
+        for state in range(len(goto)):
+            for byte in sorted(goto[state]):
+                labels.append(byte)
+                targets.append(goto[state][byte])
+            edge_start.append(len(targets))
+            out_ids.extend(outputs[state])
+            out_start.append(len(out_ids))
+        
+        long_halves = array('I')
+        for value in sorted(long_prefixes):
+            long_halves.extend((value & 0xFFFFFFFF, value >> 32))
+        return cls(edge_start, bytes(labels), targets, fail, out_link, depths, out_start, out_ids,
+                   array('I', sorted(prefixes)), long_halves, array('I', (len(pattern) for pattern in patterns)))
+    
+    def _prefix_hash(self, values, multiplier):
+        # Мультипликативный хэш: старшие биты произведения по модулю 2^32
+        return (values * np.uint32(multiplier)) >> self._filter_shift
+    
+    def _pair_hash(self, low, high, multipliers):
+        """Хэш восьми байт по двум половинам uint32"""
+        low_multiplier, high_multiplier = multipliers
+        return ((low * np.uint32(low_multiplier)) ^ (high * np.uint32(high_multiplier))) >> self._filter_shift
+    
+    def _bit_table(self, hashes):
+        bits = np.zeros(1 << (32 - int(self._filter_shift)), dtype=bool)
+        bits[hashes] = True
+        return np.packbits(bits, bitorder='little')
+    
+    @staticmethod
+    def _filter_hits(hashes, table):
+        """Номера хэшей, бит которых установлен в таблице"""
+        return np.flatnonzero((table[hashes >> np.uint32(3)] >> (hashes & np.uint32(7)).astype(np.uint8))
+                              & np.uint8(1))
+    
+    @staticmethod
+    def _contains(sorted_values, values):
+        """Флаги: есть ли значение в отсортированном массиве"""
+        if not len(sorted_values):
+            return np.zeros(len(values), dtype=bool)
+        slots = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+        return sorted_values[slots] == values
+    
+    def _build_short_tables(self):
+        """Плотные таблицы шаблонов короче PREFIX_LENGTH: длина -> массив флагов по значению байт"""
+        tables = {}
+        level = [(0, 0)]   # (состояние, значение пройденных байт little-endian)
+        for length in range(1, self.PREFIX_LENGTH):
+            next_level = []
+            for state, value in level:
+                for byte, child in self._state_children(state).items():
+                    child_value = value | (byte << (8 * (length - 1)))
+                    next_level.append((child, child_value))
+                    if self.out_start[child] != self.out_start[child + 1]:
+                        tables.setdefault(length, np.zeros(1 << (8 * length), dtype=bool))[child_value] = True
+            level = next_level
+        return tables
+    
+    def _state_children(self, state):
+        children = self._children[state]
+        if children is None:
+            start, end = self.edge_start[state], self.edge_start[state + 1]
+            children = self._children[state] = dict(zip(self.labels[start:end], self.targets[start:end]))
+        return children
+    
+    def _candidates(self, data, start, end):
+        """Позиции start..end-1, с которых может начинаться шаблон: массив numpy по возрастанию"""
+        window = data[start:min(end + self.LONG_PREFIX_LENGTH - 1, len(data))]
+        count = end - start
+        found = []
+        first_pair, second_pair = self.FILTER_MULTIPLIERS
+        first, second = first_pair[0], second_pair[0]
+        for phase in range(max(min(self.PREFIX_LENGTH, len(window) - self.PREFIX_LENGTH + 1), 0)):
+            # Префиксы позиций phase, phase + 4, ... - одно представление uint32 без копирования
+            grams = np.frombuffer(window, dtype='<u4', count=(len(window) - phase) // self.PREFIX_LENGTH,
+                                  offset=phase)
+            if self._short_filters is not None:
+                first_table, second_table = self._short_filters
+                hits = self._filter_hits(self._prefix_hash(grams, first), first_table)
+                hits = hits[self._filter_hits(self._prefix_hash(grams[hits], second), second_table)]
+                found.append(hits[self._contains(self.prefixes, grams[hits])] * self.PREFIX_LENGTH + phase)
+            if self._long_filters is not None and len(grams) > 1:
+                # Следующие четыре байта позиции - соседний элемент того же представления
+                low, high = grams[:-1], grams[1:]
+                first_table, second_table = self._long_filters
+                hits = self._filter_hits(self._pair_hash(low, high, first_pair), first_table)
+                hits = hits[self._filter_hits(self._pair_hash(low[hits], high[hits], second_pair), second_table)]
+                pairs = low[hits].astype(np.uint64) | (high[hits].astype(np.uint64) << np.uint64(32))
+                found.append(hits[self._contains(self.long_prefixes, pairs)] * self.PREFIX_LENGTH + phase)
+        for length, table in self._short_tables.items():
+            if len(window) < length:
+                continue
+            grams = window[:len(window) - length + 1].astype(np.uint32)
+            for shift in range(1, length):
+                grams |= window[shift:len(window) - length + 1 + shift].astype(np.uint32) << np.uint32(8 * shift)
+            found.append(np.flatnonzero(table[grams]))
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        positions = np.unique(np.concatenate(found))
+        return positions[positions < count] + start
+    
+    def iter_matches(self, data):
+        """Находит вхождения шаблонов в data (bytes, mmap, memoryview); выдает (смещение начала, номер шаблона)
+        по возрастанию смещения конца"""
+        fail, out_link, depths = self.fail, self.out_link, self.depths
+        out_start, out_ids, pattern_lengths = self.out_start, self.out_ids, self.pattern_lengths
+        state_children = self._state_children
+        
+        # Представления освобождаются по окончании обхода, после чего mmap можно закрыть
+        with memoryview(data) as raw_view, raw_view.cast('B') as view:
+            array_view = np.frombuffer(view, dtype=np.uint8)
+            try:
+                size = len(view)
+                state = position = 0
+                for block_start in range(0, size, self.SCAN_BLOCK_SIZE):
+                    block_end = min(block_start + self.SCAN_BLOCK_SIZE, size)
+                    # Позиции фильтра с запасом перед блоком: там могли начаться незавершенные совпадения
+                    base = max(block_start - self.max_length, 0)
+                    positions = self._candidates(array_view, base, block_end)
+                    flags = np.zeros(block_end - base, dtype=np.uint8)
+                    flags[positions - base] = 1
+                    is_candidate = flags.tobytes()
+                    candidates = positions[positions >= block_start].tolist()
+                    index = 0
+                    while True:
+                        if not state:
+                            # Незавершенных совпадений нет: следующее может начаться только с позиции фильтра
+                            index = bisect.bisect_left(candidates, position, index)
+                            if index == len(candidates):
+                                break
+                            position = candidates[index]
+                        elif position >= block_end:
+                            # Совпадение продолжается в следующем блоке: состояние переходит в него
+                            break
+                        byte = view[position]
+                        next_state = state_children(state).get(byte)
+                        while next_state is None and state:
+                            state = fail[state]
+                            next_state = state_children(state).get(byte)
+                        state = next_state or 0
+                        # Совпадение, начатое не с позиции фильтра, шаблоном не закончится
+                        while state and not is_candidate[position - depths[state] + 1 - base]:
+                            state = fail[state]
+                        match = state if out_start[state] != out_start[state + 1] else out_link[state]
+                        while match:
+                            for pattern in out_ids[out_start[match]:out_start[match + 1]]:
+                                yield position - pattern_lengths[pattern] + 1, pattern
+                            match = out_link[match]
+                        position += 1
+            finally:
+                # Массив numpy держит буфер представления: без этого его нельзя освободить
+                del array_view
+
+# Файл скомпилированных сигнатур: сканеры открывают его без обращения к базе данных
+SIGNATURE_DB_PATH = os.getenv('SIGNATURE_DB_PATH',
+                              os.path.join(os.path.expanduser('~'), '.antivirus', 'signatures.avdb'))
+
+SIGNATURE_DB_MAGIC = b'AVSIGDB\0'
+SIGNATURE_DB_VERSION = 3
+
+# Заголовок: сигнатура файла, версия формата, порядок байт массивов (1 - little-endian),
+# число сигнатур, счетчик изменений сигнатур, максимальная дата создания (ordinal), число секций
+SIGNATURE_DB_HEADER = struct.Struct('<8sHBxIqqI')
+# Секция: имя, смещение от начала файла, длина в байтах
+SIGNATURE_DB_SECTION = struct.Struct('<32sQQ')
+
+# Секции с байтами; остальные - массивы беззнаковых 32-битных чисел
+SIGNATURE_DB_BYTE_SECTIONS = ('labels', 'signature_ids', 'signature_names', 'meta')
+
+class SignatureDbError(Exception):
+    """Файл скомпилированных сигнатур поврежден или собран другой версией приложения"""
+
+class PackedStrings:
+    """Строки, упакованные в один блок UTF-8 со смещениями; декодируются при обращении"""
+    
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+    
+    @classmethod
+    def pack(cls, strings):
+        offsets, blob = array('I', [0]), bytearray()
+        for string in strings:
+            blob += string.encode('utf-8')
+            offsets.append(len(blob))
+        return cls(offsets, bytes(blob))
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+class PackedSignatures:
+    """Сведения о сигнатурах из файла: тот же доступ по номеру шаблона, что и у списка кортежей"""
+    
+    def __init__(self, ids, names, malware, manufacturers):
+        self.ids = ids
+        self.names = names
+        self.malware = malware
+        self.manufacturers = manufacturers
+    
+    def __len__(self):
+        return len(self.malware)
+    
+    def __getitem__(self, index):
+        return self.ids[index], self.names[index], self.malware[index], self.manufacturers[index]
+
+def signature_db_state():
+    """Состояние сигнатур в базе данных (счетчик изменений, максимальная дата создания) одним запросом"""
+    counter, last_date = db.execute_sql(
+        "SELECT (SELECT value FROM change_counters WHERE name = 'signatures'), "
+        "(SELECT MAX(creation_date) FROM signatures)").fetchone()
+    if isinstance(last_date, str):
+        last_date = date.fromisoformat(last_date[:10])
+    return counter or 0, last_date.toordinal() if last_date else 0
+
+def build_signature_db(path=None, force=False):
+    """Пересобирает файл сигнатур, если сигнатуры в базе изменились после его сборки.
+    
+    Возвращает (набор сигнатур, был ли файл пересобран).
+    """
+    path = path or SIGNATURE_DB_PATH
+    # Состояние читается до загрузки сигнатур: изменения, сделанные во время сборки,
+    # вызовут еще одну пересборку при следующей проверке
+    state = signature_db_state()
+    if not force:
+        try:
+            signature_set = SignatureSet.open(path)
+            if signature_set.state == state:
+                return signature_set, False
+        except (OSError, SignatureDbError):
+            pass
+    signature_set = SignatureSet.from_database()
+    signature_set.save(path, state)
+    return signature_set, True
+
+def open_signature_db(path=None):
+    """Набор сигнатур из файла; база данных нужна, только если файла еще нет или он устарел по формату"""
+    try:
+        return SignatureSet.open(path or SIGNATURE_DB_PATH)
+    except (FileNotFoundError, SignatureDbError) as e:
+        print(f"Файл сигнатур недоступен ({e}), собирается из базы данных", file=sys.stderr)
+    db.connect(reuse_if_open=True)
+    try:
+        return build_signature_db(path, force=True)[0]
+    finally:
+        db.close()
+
+class SignatureSet:
+    """Скомпилированные сигнатуры: автомат шаблонов и сведения о ВП и производителях для отчета о находках"""
+    
+    def __init__(self, matcher, signatures, malware, manufacturers):
+        self.matcher = matcher
+        # Номер шаблона -> (signature_id, name, id ВП, id производителя или 0)
+        self.signatures = signatures
+        self.malware = malware              # id ВП -> (malware_id, name, threat_level)
+        self.manufacturers = manufacturers  # id производителя -> name
+        # signature_db_state() базы, из которой собран набор (для файла сигнатур)
+        self.state = None
+    
+    @classmethod
+    def from_records(cls, records):
+        """Компилирует сигнатуры из строк (signature_id, name, data, pattern, id ВП, malware_id, имя ВП,
+        уровень опасности, id производителя, имя производителя); текстовые сигнатуры не из hex пропускаются"""
+        patterns, signatures, malware, manufacturers = [], [], {}, {}
+        for (signature_id, name, data, pattern, malware_pk, malware_id, malware_name, threat_level,
+             manufacturer_pk, manufacturer_name) in records:
+            pattern = bytes(pattern) if pattern is not None else parse_signature_pattern(data)
+            if pattern is None:
+                continue
+            patterns.append(pattern)
+            signatures.append((signature_id, name, malware_pk, manufacturer_pk or 0))
+            malware[malware_pk] = (malware_id, malware_name, threat_level)
+            if manufacturer_pk:
+                manufacturers[manufacturer_pk] = manufacturer_name
+        return cls(SignatureMatcher.build(patterns), signatures, malware, manufacturers)
+    
+    @classmethod
+    def from_database(cls):
+        """Загружает все сигнатуры одним запросом и компилирует их"""
+        query = (Signature
+                 .select(Signature.signature_id, Signature.name, Signature.data, Signature.pattern,
+                         Malware.id, Malware.malware_id,
+                         Malware.name, Malware.threat_level, Manufacturer.id, Manufacturer.name)
+                 .join(Malware)
+                 .switch(Signature)
+                 .join(Manufacturer, JOIN.LEFT_OUTER)
+                 .order_by(Signature.id)
+                 .tuples())
+        return cls.from_records(query.iterator())
+    
+    def save(self, path, state):
+        """Записывает набор в файл; state - signature_db_state() на момент загрузки сигнатур.
+        
+        Файл пишется рядом и подменяется целиком, поэтому сканеры, открывшие
+        прежнюю версию, дочитывают ее без ошибок.
+        """
+        matcher = self.matcher
+        sections = {name: getattr(matcher, name) for name in SignatureMatcher.ARRAYS}
+        ids = PackedStrings.pack(signature[0] for signature in self.signatures)
+        names = PackedStrings.pack(signature[1] for signature in self.signatures)
+        sections.update({
+            'signature_id_offsets': ids.offsets,
+            'signature_ids': ids.blob,
+            'signature_name_offsets': names.offsets,
+            'signature_names': names.blob,
+            'signature_malware': array('I', (signature[2] for signature in self.signatures)),
+            'signature_manufacturers': array('I', (signature[3] for signature in self.signatures)),
+            'meta': json.dumps({
+                'malware': [[pk, *info] for pk, info in self.malware.items()],
+                'manufacturers': [[pk, name] for pk, name in self.manufacturers.items()],
+                'built_at': datetime.now().isoformat(timespec='seconds'),
+            }, ensure_ascii=False).encode('utf-8'),
+        })
+        
+        offset = SIGNATURE_DB_HEADER.size + SIGNATURE_DB_SECTION.size * len(sections)
+        table, payload = [], []
+        for name, data in sections.items():
+            data = bytes(data)
+            offset += -offset % 8   # массивы выравниваются для отображения в память
+            table.append(SIGNATURE_DB_SECTION.pack(name.encode('ascii'), offset, len(data)))
+            payload.append((offset, data))
+            offset += len(data)
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(SIGNATURE_DB_HEADER.pack(SIGNATURE_DB_MAGIC, SIGNATURE_DB_VERSION,
+                                                sys.byteorder == 'little', len(self.signatures),
+                                                state[0], state[1], len(sections)))
+            file.write(b''.join(table))
+            for section_offset, data in payload:
+                file.write(b'\0' * (section_offset - file.tell()))
+                file.write(data)
+        os.replace(temp_path, path)
+        self.state = tuple(state)
+    
+    @classmethod
+    def open(cls, path):
+        """Открывает файл сигнатур через отображение в память; массивы автомата шаблонов не копируются"""
+        with open(path, 'rb') as file:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл, например оставшийся от прерванной сборки
+                raise SignatureDbError(f"{path}: файл пуст")
+        try:
+            signature_set = cls._from_mapping(path, mapped)
+        except SignatureDbError as e:
+            # Трассировка держит кадры с представлениями секций, а пока они живы, отображение не закрыть
+            error = e.with_traceback(None)
+        else:
+            # Отображение живет, пока жив набор: массивы автомата шаблонов ссылаются на него
+            signature_set._mapped = mapped
+            return signature_set
+        error.__context__ = None
+        mapped.close()
+        raise error
+    
+    @classmethod
+    def _from_mapping(cls, path, mapped):
+        """Набор сигнатур по отображенному в память файлу; SignatureDbError, если файл не подходит"""
+        try:
+            (magic, version, little_endian, signature_count, counter, last_date,
+             section_count) = SIGNATURE_DB_HEADER.unpack_from(mapped, 0)
+        except struct.error:
+            raise SignatureDbError(f"{path}: файл поврежден")
+        if magic != SIGNATURE_DB_MAGIC or version != SIGNATURE_DB_VERSION:
+            raise SignatureDbError(f"{path}: неподдерживаемая версия файла сигнатур")
+        if bool(little_endian) != (sys.byteorder == 'little'):
+            raise SignatureDbError(f"{path}: файл собран на платформе с другим порядком байт")
+        
+        view = memoryview(mapped)
+        sections = {}
+        try:
+            for index in range(section_count):
+                name, offset, length = SIGNATURE_DB_SECTION.unpack_from(
+                    mapped, SIGNATURE_DB_HEADER.size + index * SIGNATURE_DB_SECTION.size)
+                name = name.rstrip(b'\0').decode('ascii')
+                if offset + length > len(mapped):
+                    raise SignatureDbError(f"{path}: файл обрезан (секция {name})")
+                data = view[offset:offset + length]
+                sections[name] = data if name in SIGNATURE_DB_BYTE_SECTIONS else data.cast('I')
+            
+            meta = json.loads(bytes(sections['meta']))
+            signatures = PackedSignatures(
+                PackedStrings(sections['signature_id_offsets'], sections['signature_ids']),
+                PackedStrings(sections['signature_name_offsets'], sections['signature_names']),
+                sections['signature_malware'], sections['signature_manufacturers'])
+            matcher = SignatureMatcher(*(sections[name] for name in SignatureMatcher.ARRAYS))
+        except (KeyError, IndexError, ValueError, TypeError, struct.error):
+            raise SignatureDbError(f"{path}: файл поврежден")
+        if len(signatures) != signature_count:
+            raise SignatureDbError(f"{path}: файл поврежден")
+        signature_set = cls(matcher, signatures,
+                            {pk: tuple(info) for pk, *info in meta['malware']},
+                            dict(meta['manufacturers']))
+        signature_set.state = (counter, last_date)
+        return signature_set
+    
+    def scan(self, data):
+        """Список находок (смещение, номер сигнатуры) в буфере"""
+        return list(self.matcher.iter_matches(data))
+    
+    def scan_file(self, path):
+        """Сканирует файл через отображение в память; возвращает ScanResult"""
+        started = time.perf_counter()
+        size = os.path.getsize(path)
+        matches = []
+        if size:
+            with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                matches = self.scan(mapped)
+        return ScanResult(self, path, size, matches, time.perf_counter() - started)
+
+class ScanResult:
+    """Находки в одном файле"""
+    
+    def __init__(self, signature_set, path, size, matches, elapsed):
+        self.signature_set = signature_set
+        self.path = path
+        self.size = size
+        self.matches = matches
+        self.elapsed = elapsed
+    
+    @property
+    def megabytes_per_second(self):
+        return self.size / (1024 * 1024) / self.elapsed if self.elapsed else 0.0
+    
+    def malware(self):
+        """Найденные ВП: (malware_id, name, threat_level) -> список signature_id"""
+        found = {}
+        for offset, index in self.matches:
+            signature_id, name, malware_pk, manufacturer_pk = self.signature_set.signatures[index]
+            found.setdefault(self.signature_set.malware[malware_pk], []).append(signature_id)
+        return found
+
+def iter_scan_paths(paths):
+    """Файлы из списка путей; каталоги обходятся рекурсивно"""
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, filenames in os.walk(path):
+                for filename in filenames:
+                    yield os.path.join(directory, filename)
+        else:
+            yield path
+
+# Локальный кэш результатов сканирования каталогов (SQLite, не рабочая база)
+SCAN_CACHE_PATH = os.getenv('SCAN_CACHE_PATH',
+                            os.path.join(os.path.expanduser('~'), '.antivirus', 'scan_cache.db'))
+
+scan_cache_db = SqliteDatabase(None, pragmas={'journal_mode': 'wal', 'synchronous': 'normal'})
+
+class ScanCacheModel(Model):
+    class Meta:
+        database = scan_cache_db
+
+class CachedFile(ScanCacheModel):
+    """Последнее состояние файла, для которого известен хэш содержимого"""
+    path = TextField(primary_key=True)
+    size = BigIntegerField()
+    mtime_ns = BigIntegerField()
+    content_hash = CharField()
+    
+    class Meta:
+        table_name = 'files'
+
+class CachedContent(ScanCacheModel):
+    """Находки в содержимом с данным хэшем при проверке данной версией набора сигнатур"""
+    content_hash = CharField(primary_key=True)
+    signature_version = CharField()
+    findings = TextField()   # JSON: [[malware_id, name, threat_level, [signature_id, ...]], ...]
+    
+    class Meta:
+        table_name = 'contents'
+
+# Сколько строк кэша записывается одним INSERT
+SCAN_CACHE_BATCH_SIZE = 500
+
+def hash_file(path):
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Набор сигнатур рабочего процесса пула; открывается один раз при запуске процесса
+_worker_signature_set = None
+
+def _init_scan_worker(signature_path):
+    global _worker_signature_set
+    _worker_signature_set = SignatureSet.open(signature_path)
+
+def _hash_worker(path):
+    try:
+        return path, hash_file(path), None
+    except OSError as e:
+        return path, None, str(e)
+
+def _scan_worker(path):
+    try:
+        result = _worker_signature_set.scan_file(path)
+    except OSError as e:
+        return path, None, str(e)
+    findings = [[*malware, signature_ids] for malware, signature_ids in result.malware().items()]
+    return path, findings, None
+
+class DirectoryScanReport:
+    """Итоги сканирования каталога"""
+    
+    def __init__(self):
+        self.files = 0
+        self.unchanged = 0     # пропущены по пути, размеру и времени изменения
+        self.known = 0         # содержимое с тем же хэшем уже проверено
+        self.scanned = 0
+        self.errors = []       # (путь, текст ошибки)
+        self.infected = {}     # путь -> находки
+        self.elapsed = 0.0
+    
+    def summary(self):
+        return (f"Файлов {self.files}: без изменений {self.unchanged}, по хэшу {self.known}, "
+                f"проверено {self.scanned}, ошибок {len(self.errors)}, заражено {len(self.infected)} "
+                f"за {self.elapsed:.2f} с")
+
+class DirectoryScanner:
+    """Сканирование дерева каталогов с кэшем результатов.
+    
+    Результат файла берется из кэша, если с прошлого сканирования не изменились
+    путь, размер и время изменения, или если содержимое с тем же SHA-256 уже
+    проверялось той же версией набора сигнатур. Остальные файлы хэшируются
+    и сканируются в пуле процессов; каждый процесс отображает в память один и
+    тот же файл сигнатур.
+    """
+    
+    def __init__(self, signature_path=None, cache_path=None, workers=None):
+        self.signature_path = signature_path or SIGNATURE_DB_PATH
+        self.cache_path = cache_path or SCAN_CACHE_PATH
+        self.workers = workers or os.cpu_count() or 1
+        signature_set = open_signature_db(self.signature_path)
+        # Версия набора: формат файла и состояние сигнатур в базе на момент сборки
+        self.signature_version = f"{SIGNATURE_DB_VERSION}:{signature_set.state[0]}:{signature_set.state[1]}"
+    
+    def scan(self, root):
+        """Сканирует каталог root; возвращает DirectoryScanReport"""
+        started = time.perf_counter()
+        report = DirectoryScanReport()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        scan_cache_db.init(self.cache_path)
+        with scan_cache_db.connection_context():
+            scan_cache_db.create_tables([CachedFile, CachedContent], safe=True)
+            prefix = os.path.join(os.path.abspath(root), '')
+            walked = {}
+            for path in iter_scan_paths([prefix]):
+                try:
+                    stat = os.stat(path)
+                except OSError as e:
+                    report.errors.append((path, str(e)))
+                    continue
+                walked[path] = (stat.st_size, stat.st_mtime_ns)
+            report.files = len(walked)
+            
+            # Из кэша читаются только записи обходимых файлов и их содержимого
+            files = {path: (size, mtime_ns, content_hash) for path, size, mtime_ns, content_hash in
+                     self._cached_rows(CachedFile, CachedFile.path, walked)}
+            contents = {}
+            self._load_contents(contents, {cached[2] for cached in files.values()})
+            
+            new_files, new_contents = [], []
+            to_hash, to_scan = {}, {}
+            for path, state in walked.items():
+                cached = files.get(path)
+                if cached and cached[:2] == state:
+                    version, findings = contents.get(cached[2], (None, None))
+                    if version == self.signature_version:
+                        report.unchanged += 1
+                        self._record(report, path, findings)
+                    else:
+                        # Файл не менялся, но сигнатуры обновились: хэш известен, нужно только сканирование
+                        to_scan[path] = cached[2]
+                    continue
+                to_hash[path] = state
+            
+            if to_hash or to_scan:
+                with ProcessPoolExecutor(self.workers, initializer=_init_scan_worker,
+                                         initargs=(self.signature_path,)) as pool:
+                    hashed = []
+                    for path, content_hash, error in pool.map(_hash_worker, to_hash, chunksize=16):
+                        if error:
+                            report.errors.append((path, error))
+                            continue
+                        new_files.append((path, *to_hash[path], content_hash))
+                        hashed.append((path, content_hash))
+                    self._load_contents(contents, {content_hash for _, content_hash in hashed})
+                    for path, content_hash in hashed:
+                        version, findings = contents.get(content_hash, (None, None))
+                        if version == self.signature_version:
+                            report.known += 1
+                            self._record(report, path, findings)
+                        else:
+                            to_scan[path] = content_hash
+                    
+                    # Файлы с одинаковым содержимым сканируются один раз
+                    unique_paths = {}
+                    for path, content_hash in to_scan.items():
+                        unique_paths.setdefault(content_hash, path)
+                    results = {}
+                    for path, findings, error in pool.map(_scan_worker, unique_paths.values(), chunksize=4):
+                        if error:
+                            report.errors.append((path, error))
+                            continue
+                        report.scanned += 1
+                        findings = json.dumps(findings, ensure_ascii=False)
+                        results[to_scan[path]] = findings
+                        new_contents.append((to_scan[path], self.signature_version, findings))
+                    for path, content_hash in to_scan.items():
+                        if content_hash in results:
+                            self._record(report, path, results[content_hash])
+            
+            with scan_cache_db.atomic():
+                for start in range(0, len(new_files), SCAN_CACHE_BATCH_SIZE):
+                    CachedFile.insert_many(new_files[start:start + SCAN_CACHE_BATCH_SIZE],
+                                           fields=[CachedFile.path, CachedFile.size, CachedFile.mtime_ns,
+                                                   CachedFile.content_hash]).on_conflict_replace().execute()
+                for start in range(0, len(new_contents), SCAN_CACHE_BATCH_SIZE):
+                    CachedContent.insert_many(new_contents[start:start + SCAN_CACHE_BATCH_SIZE],
+                                              fields=[CachedContent.content_hash, CachedContent.signature_version,
+                                                      CachedContent.findings]).on_conflict_replace().execute()
+                self._prune(prefix, walked, bool(new_files))
+        
+        report.elapsed = time.perf_counter() - started
+        return report
+    
+    def _cached_rows(self, model, key_field, keys):
+        """Строки кэша с ключами из keys: запросы IN (...) по SCAN_CACHE_BATCH_SIZE ключей"""
+        keys = list(keys)
+        for start in range(0, len(keys), SCAN_CACHE_BATCH_SIZE):
+            yield from model.select().where(key_field.in_(keys[start:start + SCAN_CACHE_BATCH_SIZE])).tuples()
+    
+    def _load_contents(self, contents, content_hashes):
+        """Дочитывает в contents находки для хэшей, которых там еще нет"""
+        missing = [content_hash for content_hash in content_hashes if content_hash not in contents]
+        for content_hash, version, findings in self._cached_rows(CachedContent, CachedContent.content_hash,
+                                                                 missing):
+            contents[content_hash] = (version, findings)
+    
+    def _prune(self, prefix, walked, hashes_changed):
+        """Удаляет из кэша файлы каталога, которых обход не нашел, и содержимое, на которое не ссылается ни один файл"""
+        stale = [path for path, in CachedFile.select(CachedFile.path).where(
+                 CachedFile.path.startswith(prefix)).tuples().iterator() if path not in walked]
+        for start in range(0, len(stale), SCAN_CACHE_BATCH_SIZE):
+            CachedFile.delete().where(CachedFile.path.in_(stale[start:start + SCAN_CACHE_BATCH_SIZE])).execute()
+        if stale or hashes_changed:
+            CachedContent.delete().where(CachedContent.content_hash.not_in(
+                CachedFile.select(CachedFile.content_hash))).execute()
+    
+    def _record(self, report, path, findings):
+        findings = json.loads(findings)
+        if findings:
+            report.infected[path] = findings
+
+# Образ исполняемого файла для замера сканирования: заголовок, код, выравнивание нулями
+BENCHMARK_IMAGE_SIZE = 64 * 1024
+BENCHMARK_HEADER_SIZE = 1024
+BENCHMARK_CODE_SIZE = 32 * 1024
+BENCHMARK_MZ_STUB = bytes.fromhex('4D5A90000300000004000000FFFF0000')
+
+def benchmark_data(size, rng, kind):
+    """Данные замера: 'random' - случайные байты, 'pe' - образы PE с заголовком MZ, случайным кодом
+    и заполнением нулями (как у секций исполняемых файлов)"""
+    if kind == 'random':
+        return rng.randbytes(size)
+    data = bytearray(size)
+    for offset in range(0, size, BENCHMARK_IMAGE_SIZE):
+        image = bytearray(BENCHMARK_MZ_STUB.ljust(BENCHMARK_HEADER_SIZE, b'\0'))
+        image += rng.randbytes(BENCHMARK_CODE_SIZE)
+        image = image.ljust(BENCHMARK_IMAGE_SIZE, b'\0')
+        data[offset:offset + BENCHMARK_IMAGE_SIZE] = image[:size - offset]
+    return bytes(data)
+
+def benchmark_scan(signature_counts, size_mb=8, pattern_length=16, data_kind='random'):
+    """Замеряет скорость сканирования (МБ/с) в зависимости от количества сигнатур.
+    
+    Шаблоны случайные; для данных 'pe' каждый десятый шаблон начинается с
+    четырех нулевых байт, а один совпадает с заголовком MZ каждого образа.
+    Рабочая база не используется.
+    """
+    rng = random.Random(42)
+    data = benchmark_data(size_mb * 1024 * 1024, rng, data_kind)
+    results = []
+    
+    print(f"{'Сигнатур':>10} {'Состояний':>10} {'Сборка, с':>10} {'МБ/с':>8} {'Находок':>8}")
+    for signature_count in signature_counts:
+        patterns = [rng.randbytes(pattern_length) for _ in range(signature_count)]
+        if data_kind == 'pe':
+            for index in range(0, signature_count, 10):
+                patterns[index] = bytes(4) + patterns[index][4:]
+            patterns[-1] = BENCHMARK_MZ_STUB
+        # Часть шаблонов вставляется в данные, чтобы замер включал обработку находок
+        planted = bytearray(data)
+        for pattern in patterns[:100]:
+            offset = rng.randrange(len(planted) - pattern_length)
+            planted[offset:offset + pattern_length] = pattern
+        
+        started = time.perf_counter()
+        matcher = SignatureMatcher.build(patterns)
+        build_time = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        found = sum(1 for _ in matcher.iter_matches(planted))
+        speed = size_mb / (time.perf_counter() - started)
+        results.append((signature_count, build_time, speed, found))
+        print(f"{signature_count:>10} {matcher.state_count:>10} {build_time:>10.2f} {speed:>8.2f} {found:>8}")
+    
+    return results
+
+# МОДУЛЬ ДУБЛИКАТОВ СИГНАТУР
+
+# Длина n-граммы байтов (шингла), по которым считается сходство шаблонов
+DEDUP_SHINGLE_LENGTH = 4
+
+# LSH: подпись MinHash из DEDUP_BANDS * DEDUP_ROWS значений режется на полосы; шаблоны,
+# совпавшие хотя бы в одной полосе, сравниваются. При 8 x 8 порог срабатывания около 0.77
+DEDUP_BANDS = 8
+DEDUP_ROWS = 8
+
+# Оценка сходства Жаккара, начиная с которой шаблоны считаются почти одинаковыми
+DEDUP_THRESHOLD = 0.8
+
+# Сколько шаблонов за один проход numpy (память - около 8 байт на шингл)
+DEDUP_CHUNK_SIZE = 50000
+
+# Сколько сигнатур удаляется за одну транзакцию при слиянии
+DEDUP_DELETE_BATCH_SIZE = 1000
+
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_SEED = 42
+
+def minhash_signatures(patterns):
+    """MinHash-подписи байтовых шаблонов не короче DEDUP_SHINGLE_LENGTH.
+    
+    Возвращает массив (len(patterns), DEDUP_BANDS * DEDUP_ROWS). Шинглы всех шаблонов
+    порции считаются одним массивом, минимум по каждому шаблону - np.minimum.reduceat,
+    поэтому время линейно по суммарной длине шаблонов.
+    """
+    length = DEDUP_SHINGLE_LENGTH
+    hash_count = DEDUP_BANDS * DEDUP_ROWS
+    rng = np.random.default_rng(MINHASH_SEED)
+    multipliers = rng.integers(1, MINHASH_PRIME, hash_count, dtype=np.uint64)
+    increments = rng.integers(0, MINHASH_PRIME, hash_count, dtype=np.uint64)
+    result = np.empty((len(patterns), hash_count), dtype=np.uint32)
+    
+    for start in range(0, len(patterns), DEDUP_CHUNK_SIZE):
+        chunk = patterns[start:start + DEDUP_CHUNK_SIZE]
+        data = np.frombuffer(b''.join(chunk), dtype=np.uint8).astype(np.uint64)
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        # Значение шингла в каждой позиции общего буфера
+        position_count = len(data) - length + 1
+        values = np.zeros(position_count, dtype=np.uint64)
+        for offset in range(length):
+            values = (values << np.uint64(8) | data[offset:offset + position_count]) % np.uint64(MINHASH_PRIME)
+        # Берутся только шинглы, не выходящие за конец своего шаблона
+        counts = lengths - length + 1
+        shingle_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        pattern_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        values = values[np.arange(counts.sum()) + np.repeat(pattern_starts - shingle_starts, counts)]
+        
+        for column in range(hash_count):
+            hashes = (values * multipliers[column] + increments[column]) % np.uint64(MINHASH_PRIME)
+            result[start:start + len(chunk), column] = np.minimum.reduceat(hashes, shingle_starts)
+    return result
+
+def near_duplicate_clusters(minhashes, threshold=DEDUP_THRESHOLD):
+    """Группы почти одинаковых шаблонов по MinHash-подписям (списки номеров строк).
+    
+    В каждой полосе LSH строки с одинаковым ключом попадают в одну корзину, и участники
+    корзины сравниваются только с ее первым участником. Пары всех шаблонов не перебираются:
+    время - O(n log n) на сортировку корзин плюс размер корзин.
+    """
+    parent = list(range(len(minhashes)))
+    
+    def find(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+    
+    for band in range(DEDUP_BANDS):
+        # Ключ корзины - хэш значений полосы; случайные совпадения ключей отсеет проверка сходства
+        keys = np.zeros(len(minhashes), dtype=np.uint64)
+        for column in range(band * DEDUP_ROWS, (band + 1) * DEDUP_ROWS):
+            keys = keys * np.uint64(0x100000001B3) + minhashes[:, column]
+        _, buckets, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+        # Номера корзин идут подряд с нуля, после сортировки корзина b занимает bounds[b]:bounds[b + 1]
+        order = np.argsort(buckets.ravel(), kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(sizes)))
+        for bucket in np.flatnonzero(sizes > 1):
+            members = order[bounds[bucket]:bounds[bucket + 1]]
+            anchor = members[0]
+            similarity = (minhashes[members[1:]] == minhashes[anchor]).mean(axis=1)
+            root = find(anchor)
+            for member in members[1:][similarity >= threshold]:
+                parent[find(member)] = root
+    
+    clusters = {}
+    for item in range(len(parent)):
+        clusters.setdefault(find(item), []).append(item)
+    return [members for members in clusters.values() if len(members) > 1]
+
+class DuplicateGroup:
+    """Сигнатуры с одинаковыми ('exact') или почти одинаковыми ('near') шаблонами.
+    
+    members - строки (id, signature_id, id ВП, шаблон) в порядке id.
+    """
+    
+    def __init__(self, kind, members):
+        self.kind = kind
+        self.members = members
+    
+    def redundant(self):
+        """Сигнатуры, удаление которых не меняет, что и как обнаруживается.
+        
+        Лишней считается сигнатура той же ВП, шаблон которой содержит шаблон другой
+        оставляемой сигнатуры: каждое ее срабатывание дает и та, более короткая.
+        Для одинаковых шаблонов остается сигнатура с меньшим id. Сигнатуры разных ВП
+        и пересекающиеся, но не вложенные шаблоны не сливаются - только попадают в отчет.
+        """
+        kept, removed = [], []
+        for member in sorted(self.members, key=lambda member: (len(member[3]), member[0])):
+            if any(keeper[2] == member[2] and keeper[3] in member[3] for keeper in kept):
+                removed.append(member)
+            else:
+                kept.append(member)
+        return removed
+
+class DuplicateReport:
+    """Итоги поиска дубликатов"""
+    
+    def __init__(self, exact, near, total, elapsed):
+        self.exact = exact
+        self.near = near
+        self.total = total
+        self.elapsed = elapsed
+    
+    @property
+    def groups(self):
+        return self.exact + self.near
+    
+    def redundant(self):
+        removed = {}
+        for group in self.groups:
+            for member in group.redundant():
+                removed[member[0]] = member
+        return list(removed.values())
+    
+    def summary(self):
+        return (f"Сигнатур с двоичным шаблоном {self.total}: групп одинаковых {len(self.exact)}, "
+                f"почти одинаковых {len(self.near)}, можно удалить {len(self.redundant())} "
+                f"за {self.elapsed:.2f} с")
+
+def find_duplicate_signatures(threshold=DEDUP_THRESHOLD):
+    """Ищет одинаковые шаблоны по pattern_hash и почти одинаковые по MinHash/LSH.
+    
+    Почти одинаковые ищутся среди уникальных шаблонов: у группы одинаковых
+    шаблонов одна MinHash-подпись. Текстовые сигнатуры (не hex) не проверяются.
+    """
+    started = time.perf_counter()
+    by_hash = {}
+    rows = (Signature
+            .select(Signature.id, Signature.signature_id, Signature.malware, Signature.pattern_hash, Signature.pattern)
+            .where(Signature.pattern.is_null(False))
+            .order_by(Signature.id)
+            .tuples()
+            .iterator())
+    total = 0
+    for signature_pk, signature_id, malware_pk, pattern_hash, pattern in rows:
+        total += 1
+        by_hash.setdefault(pattern_hash, []).append((signature_pk, signature_id, malware_pk, bytes(pattern)))
+    
+    exact = [DuplicateGroup('exact', members) for members in by_hash.values() if len(members) > 1]
+    
+    unique = [members for members in by_hash.values() if len(members[0][3]) >= DEDUP_SHINGLE_LENGTH]
+    near = []
+    if unique:
+        minhashes = minhash_signatures([members[0][3] for members in unique])
+        for cluster in near_duplicate_clusters(minhashes, threshold):
+            members = sorted(member for index in cluster for member in unique[index])
+            near.append(DuplicateGroup('near', members))
+    return DuplicateReport(exact, near, total, time.perf_counter() - started)
+
+def merge_duplicate_signatures(report):
+    """Удаляет лишние сигнатуры из отчета порциями и возвращает их число"""
+    removed = [member[0] for member in report.redundant()]
+    for batch in chunked(removed, DEDUP_DELETE_BATCH_SIZE):
+        with db.atomic():
+            Signature.delete().where(Signature.id.in_(batch)).execute()
+    return len(removed)
+
+# МОДУЛЬ ИМПОРТА ФИДОВ
+
+# Сколько строк вставляется одним INSERT в одной транзакции
+IMPORT_BATCH_SIZE = 1000
+
+# Сколько ошибок проверки строк сохраняется для отчета (остальные только считаются)
+IMPORT_MAX_ERRORS = 100
+
+THREAT_LEVELS = ('Низкий', 'Средний', 'Высокий', 'Критический')
+
+class ImportStats:
+    """Итоги импорта фида"""
+    
+    def __init__(self):
+        self.read = 0
+        self.written = 0
+        self.rejected = 0
+        self.errors = []   # (номер строки, текст ошибки)
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+    
+    def reject(self, line_number, message):
+        self.rejected += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append((line_number, message))
+    
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+    
+    def summary(self):
+        return (f"Прочитано {self.read}, записано {self.written}, отклонено {self.rejected} "
+                f"за {self.elapsed:.2f} с ({self.rows_per_second:.0f} строк/с)")
+
+def read_feed(path, feed_format=None):
+    """Построчно читает фид CSV (с заголовком) или JSON Lines; выдает (номер строки, словарь).
+    
+    Формат определяется по расширению файла, если не указан явно; '-' - стандартный ввод.
+    """
+    if feed_format is None:
+        feed_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+    
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+    try:
+        if feed_format == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(stream, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as e:
+                        yield line_number, ValueError(f"Некорректный JSON: {e}")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def parse_feed_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+class FeedImporter:
+    """Импорт фида ВП или сигнатур пакетами insert_many с обновлением существующих записей.
+    
+    Строки проверяются и дополняются в памяти: ссылки на ВП (по коду или
+    названию) и производителей разрешаются по словарям, загруженным одним
+    запросом до начала импорта. Строка без идентификатора получает идентификатор
+    уже существующей записи с тем же естественным ключом (ВП - название и тип,
+    сигнатура - хэш шаблона и ВП), который ищется одним запросом на пакет;
+    новым записям номера выдает общий id_allocator. Перед выдачей счетчик
+    сдвигается за идентификаторы, пришедшие в пакете, а запись, номер которой
+    позже пришел в фиде явно, получает новый номер, чтобы строка фида ее не
+    перезаписала.
+    """
+    
+    # Модель, поле с бизнес-идентификатором, префикс, обязательные поля,
+    # поля строки insert_many (в порядке значений clean_row)
+    KINDS = {
+        'malware': (Malware, Malware.malware_id, 'MAL',
+                    ('name', 'threat_level', 'discovery_date', 'malware_type'),
+                    ('malware_id', 'name', 'description', 'threat_level', 'discovery_date', 'malware_type')),
+        'signatures': (Signature, Signature.signature_id, 'SIG',
+                       ('name', 'data', 'creation_date', 'malware'),
+                       ('signature_id', 'name', 'data', 'pattern', 'pattern_length', 'pattern_hash',
+                        'creation_date', 'malware', 'manufacturer')),
+    }
+    
+    def __init__(self, kind, batch_size=IMPORT_BATCH_SIZE, progress=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Неизвестный тип фида: {kind}")
+        self.kind = kind
+        self.model, self.id_field, self.prefix, self.required, field_names = self.KINDS[kind]
+        self.field_names = field_names
+        self.fields = [getattr(self.model, name) for name in field_names]
+        self.batch_size = batch_size
+        self.progress = progress
+        self.malware_ids = {}
+        self.manufacturer_ids = {}
+        self.known_ids = {}   # естественный ключ -> идентификатор, уже назначенный в этом импорте
+        self.allocated_ids = set()   # идентификаторы, выданные в этом импорте новым записям
+    
+    def load_lookups(self):
+        if self.kind == 'signatures':
+            self.malware_ids = {}
+            for malware_id, name, pk in Malware.select(Malware.malware_id, Malware.name, Malware.id).tuples():
+                self.malware_ids[malware_id] = pk
+                self.malware_ids.setdefault(name, pk)
+            self.manufacturer_ids = {}
+            for manufacturer_id, name, pk in Manufacturer.select(
+                    Manufacturer.manufacturer_id, Manufacturer.name, Manufacturer.id).tuples():
+                self.manufacturer_ids[manufacturer_id] = pk
+                self.manufacturer_ids.setdefault(name, pk)
+    
+    def clean_row(self, row):
+        """Проверяет строку фида и возвращает кортеж значений self.fields; ValueError - строка отклоняется"""
+        if not isinstance(row, dict):
+            raise ValueError(str(row) if isinstance(row, Exception) else "Строка должна быть объектом")
+        row = {key: value.strip() if isinstance(value, str) else value for key, value in row.items()}
+        missing = [field for field in self.required if not row.get(field)]
+        if missing:
+            raise ValueError(f"Не заполнены поля: {', '.join(missing)}")
+        
+        business_id = row.get(self.id_field.name)
+        if business_id and not str(business_id).startswith(f"{self.prefix}-"):
+            raise ValueError(f"Идентификатор должен начинаться с {self.prefix}-: {business_id}")
+        
+        if self.kind == 'malware':
+            if row['threat_level'] not in THREAT_LEVELS:
+                raise ValueError(f"Неизвестный уровень опасности: {row['threat_level']}")
+            values = (row['name'], row.get('description') or '', row['threat_level'],
+                      parse_feed_date(row['discovery_date']), row['malware_type'])
+        else:
+            malware = self.malware_ids.get(row['malware'])
+            if malware is None:
+                raise ValueError(f"Неизвестная ВП: {row['malware']}")
+            manufacturer = None
+            if row.get('manufacturer'):
+                manufacturer = self.manufacturer_ids.get(row['manufacturer'])
+                if manufacturer is None:
+                    raise ValueError(f"Неизвестный производитель: {row['manufacturer']}")
+            # Hex-шаблоны записываются байтами, как при сохранении через модель
+            pattern = parse_signature_pattern(row['data'])
+            pattern_values = pattern_columns(pattern) if pattern is not None else (None, None, None)
+            values = (row['name'], None if pattern is not None else row['data'], *pattern_values,
+                      parse_feed_date(row['creation_date']), malware, manufacturer)
+        
+        # Идентификатор строки без него назначается для всего пакета в assign_ids()
+        return (str(business_id) if business_id else None,) + values
+    
+    def natural_key(self, record):
+        """Ключ, по которому строка без идентификатора совпадает с существующей записью"""
+        values = dict(zip(self.field_names, record))
+        if self.kind == 'malware':
+            return (values['name'], values['malware_type'])
+        if values['pattern_hash'] is not None:
+            return (values['pattern_hash'], values['malware'])
+        # Текстовая сигнатура без хэша шаблона
+        return (values['name'], values['data'], values['malware'])
+    
+    def existing_ids(self, keys):
+        """{естественный ключ: идентификатор} уже записанных в БД строк - один запрос по индексам"""
+        if not keys:
+            return {}
+        if self.kind == 'malware':
+            query = (Malware
+                     .select(Malware.name, Malware.malware_type, Malware.malware_id)
+                     .where(Malware.name.in_(list({name for name, _ in keys}))))
+        else:
+            hashes = list({key[0] for key in keys if len(key) == 2})
+            names = list({key[0] for key in keys if len(key) == 3})
+            condition = Signature.pattern_hash.in_(hashes) if hashes else None
+            if names:
+                by_name = Signature.pattern_hash.is_null() & Signature.name.in_(names)
+                condition = by_name if condition is None else condition | by_name
+            query = (Signature
+                     .select(Signature.pattern_hash, Signature.name, Signature.data,
+                             Signature.malware, Signature.signature_id)
+                     .where(condition))
+        
+        existing = {}
+        for row in query.tuples():
+            if self.kind == 'malware':
+                key = row[:2]
+            elif row[0] is not None:
+                key = (row[0], row[3])
+            else:
+                key = row[1:4]
+            existing.setdefault(key, row[-1])
+        return existing
+    
+    def assign_ids(self, batch):
+        """Назначает идентификаторы строкам пакета, пришедшим без них"""
+        missing = [index for index, record in enumerate(batch) if record[0] is None]
+        if not missing:
+            return
+        keys = [self.natural_key(batch[index]) for index in missing]
+        existing = self.existing_ids({key for key in keys if key not in self.known_ids})
+        for key in keys:
+            if key not in self.known_ids and key in existing:
+                self.known_ids[key] = existing[key]
+        # Новые номера - ровно по числу новых записей
+        new_keys = list(dict.fromkeys(key for key in keys if key not in self.known_ids))
+        new_ids = id_allocator.next_ids(self.prefix, len(new_keys))
+        self.known_ids.update(zip(new_keys, new_ids))
+        self.allocated_ids.update(new_ids)
+        for index, key in zip(missing, keys):
+            batch[index] = (self.known_ids[key],) + batch[index][1:]
+    
+    def release_explicit_ids(self, batch):
+        """Сдвигает счетчик за явные идентификаторы пакета; записи этого импорта с такими номерами
+        получают новые, чтобы строки пакета их не перезаписали"""
+        explicit = [record[0] for record in batch if record[0] is not None]
+        numbers = [number for number in map(parse_business_id, explicit) if number is not None]
+        if not numbers:
+            return
+        id_allocator.advance_past(format_business_id(self.prefix, max(numbers)))
+        taken = [business_id for business_id in dict.fromkeys(explicit) if business_id in self.allocated_ids]
+        if not taken:
+            return
+        renamed = dict(zip(taken, id_allocator.next_ids(self.prefix, len(taken))))
+        with db.atomic():
+            for old_id, new_id in renamed.items():
+                self.model.update({self.id_field: new_id}).where(self.id_field == old_id).execute()
+        self.allocated_ids.difference_update(taken)
+        self.allocated_ids.update(renamed.values())
+        self.known_ids = {key: renamed.get(business_id, business_id) for key, business_id in self.known_ids.items()}
+    
+    def write_batch(self, batch):
+        """Одна транзакция: INSERT ... ON DUPLICATE KEY UPDATE по бизнес-идентификатору"""
+        preserve = [field for field in self.fields if field is not self.id_field]
+        query = self.model.insert_many(batch, fields=self.fields)
+        if isinstance(db, MySQLDatabase):
+            query = query.on_conflict(preserve=preserve)
+        else:
+            query = query.on_conflict(conflict_target=[self.id_field], preserve=preserve)
+        with db.atomic():
+            query.execute()
+    
+    def run(self, rows):
+        """Импортирует строки (номер строки, словарь) и возвращает ImportStats"""
+        stats = ImportStats()
+        self.load_lookups()
+        batch = []
+        
+        def flush():
+            self.release_explicit_ids(batch)
+            self.assign_ids(batch)
+            self.write_batch(batch)
+            stats.written += len(batch)
+            batch.clear()
+            stats.elapsed = time.perf_counter() - stats.started
+            if self.progress:
+                self.progress(stats)
+        
+        for line_number, row in rows:
+            stats.read += 1
+            try:
+                record = self.clean_row(row)
+            except (ValueError, TypeError) as e:
+                stats.reject(line_number, str(e))
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                flush()
+        if batch:
+            flush()
+        
+        stats.elapsed = time.perf_counter() - stats.started
+        return stats
+
+def import_feed(path, kind, feed_format=None, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Импортирует файл фида ВП ('malware') или сигнатур ('signatures')"""
+    return FeedImporter(kind, batch_size=batch_size, progress=progress).run(read_feed(path, feed_format))
+
+def run_cli(argv):
+    """Консольные команды. Возвращает код завершения или None, если команда не указана"""
+    parser = argparse.ArgumentParser(description="Антивирусная база данных")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    benchmark_parser = subparsers.add_parser(
+        'benchmark-export', help="Замер времени экспорта в Excel и размера файла")
+    benchmark_parser.add_argument('rows', nargs='*', type=int, default=[1000, 10000, 50000],
+                                  help="Количество ВП и сигнатур для каждого замера")
+    benchmark_parser.add_argument('--streaming', action='store_true',
+                                  help="Использовать потоковый режим экспорта")
+    
+    migrate_parser = subparsers.add_parser('migrate', help="Применить миграции схемы базы данных")
+    migrate_parser.add_argument('--target', type=int, default=None,
+                                help="Номер версии, до которой применить миграции (по умолчанию последняя)")
+    migrate_parser.add_argument('--status', action='store_true',
+                                help="Только показать текущую и последнюю версию схемы")
+    
+    import_parser = subparsers.add_parser('import-feed', help="Импорт фида ВП или сигнатур (CSV или JSON Lines)")
+    import_parser.add_argument('kind', choices=sorted(FeedImporter.KINDS), help="Тип записей в фиде")
+    import_parser.add_argument('path', help="Файл фида; '-' - стандартный ввод")
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                               help="Формат фида (по умолчанию по расширению файла)")
+    import_parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                               help="Строк в одной транзакции")
+    
+    scan_parser = subparsers.add_parser('scan', help="Проверить файлы по скомпилированным сигнатурам")
+    scan_parser.add_argument('paths', nargs='+', help="Файлы и каталоги")
+    scan_parser.add_argument('--signatures', default=None,
+                             help="Файл сигнатур (по умолчанию SIGNATURE_DB_PATH)")
+    
+    scan_dir_parser = subparsers.add_parser(
+        'scan-dir', help="Проверить каталог в несколько процессов, пропуская неизмененные файлы")
+    scan_dir_parser.add_argument('root', help="Каталог")
+    scan_dir_parser.add_argument('--workers', type=int, default=None, help="Число процессов (по умолчанию по числу ядер)")
+    scan_dir_parser.add_argument('--signatures', default=None, help="Файл сигнатур (по умолчанию SIGNATURE_DB_PATH)")
+    scan_dir_parser.add_argument('--cache', default=None, help="Файл кэша результатов (по умолчанию SCAN_CACHE_PATH)")
+    
+    build_parser = subparsers.add_parser(
+        'build-signatures', help="Собрать файл сигнатур, если сигнатуры в базе изменились")
+    build_parser.add_argument('--path', default=None, help="Файл сигнатур (по умолчанию SIGNATURE_DB_PATH)")
+    build_parser.add_argument('--force', action='store_true', help="Пересобрать без проверки изменений")
+    
+    benchmark_scan_parser = subparsers.add_parser(
+        'benchmark-scan', help="Замер скорости сканирования в зависимости от числа сигнатур")
+    benchmark_scan_parser.add_argument('signatures', nargs='*', type=int, default=[100, 1000, 10000],
+                                       help="Количество сигнатур для каждого замера")
+    benchmark_scan_parser.add_argument('--size-mb', type=int, default=8, help="Объем сканируемых данных, МБ")
+    benchmark_scan_parser.add_argument('--data', choices=['random', 'pe'], default='random',
+                                       help="Сканируемые данные: случайные или образы PE с заполнением нулями")
+    
+    dedup_parser = subparsers.add_parser(
+        'dedup-signatures', help="Найти одинаковые и почти одинаковые шаблоны сигнатур")
+    dedup_parser.add_argument('--threshold', type=float, default=DEDUP_THRESHOLD,
+                              help="Порог сходства шаблонов по Жаккару для почти одинаковых")
+    dedup_parser.add_argument('--merge', action='store_true',
+                              help="Удалить сигнатуры, которые полностью перекрываются другими той же ВП")
+    
+    subparsers.add_parser('reconcile-stats',
+                          help="Пересчитать материализованную статистику по таблицам (для планировщика)")
+    
+    subparsers.add_parser('check-indexes',
+                          help="Проверить по EXPLAIN, что частые запросы не читают таблицы целиком")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'benchmark-export':
+        benchmark_export(args.rows, streaming=args.streaming)
+        return 0
+    
+    if args.command == 'migrate':
+        db.connect(reuse_if_open=True)
+        try:
+            if args.status:
+                print(f"Версия схемы: {schema_version() or 0}, последняя: {latest_schema_version()}")
+            else:
+                applied = migrate(args.target)
+                print(f"Применены миграции: {applied}" if applied else "Схема БД актуальна")
+        finally:
+            db.close()
+        return 0
+    
+    if args.command == 'import-feed':
+        db.connect(reuse_if_open=True)
+        try:
+            stats = import_feed(args.path, args.kind, args.format, args.batch_size,
+                                progress=lambda stats: print(stats.summary(), file=sys.stderr))
+        finally:
+            db.close()
+        for line_number, message in stats.errors:
+            print(f"Строка {line_number}: {message}", file=sys.stderr)
+        print(stats.summary())
+        return 0 if stats.written or not stats.read else 1
+    
+    if args.command == 'build-signatures':
+        db.connect(reuse_if_open=True)
+        try:
+            started = time.perf_counter()
+            signature_set, rebuilt = build_signature_db(args.path, force=args.force)
+        finally:
+            db.close()
+        status = "собран" if rebuilt else "актуален"
+        print(f"Файл сигнатур {status}: {len(signature_set.signatures)} сигнатур, "
+              f"{signature_set.matcher.state_count} состояний, {time.perf_counter() - started:.2f} с")
+        return 0
+    
+    if args.command == 'scan':
+        signature_set = open_signature_db(args.signatures)
+        infected = 0
+        for path in iter_scan_paths(args.paths):
+            try:
+                result = signature_set.scan_file(path)
+            except OSError as e:
+                print(f"{path}: ошибка чтения: {e}", file=sys.stderr)
+                continue
+            for (malware_id, name, threat_level), signature_ids in result.malware().items():
+                infected += 1
+                print(f"{path}: {malware_id} {name} ({threat_level}), сигнатуры: {', '.join(signature_ids)}")
+            print(f"{path}: {result.size / (1024 * 1024):.1f} МБ, {result.megabytes_per_second:.1f} МБ/с",
+                  file=sys.stderr)
+        return 1 if infected else 0
+    
+    if args.command == 'scan-dir':
+        report = DirectoryScanner(args.signatures, args.cache, args.workers).scan(args.root)
+        for path, error in report.errors:
+            print(f"{path}: ошибка чтения: {error}", file=sys.stderr)
+        for path, findings in sorted(report.infected.items()):
+            for malware_id, name, threat_level, signature_ids in findings:
+                print(f"{path}: {malware_id} {name} ({threat_level}), сигнатуры: {', '.join(signature_ids)}")
+        print(report.summary(), file=sys.stderr)
+        return 1 if report.infected else 0
+    
+    if args.command == 'benchmark-scan':
+        benchmark_scan(args.signatures, size_mb=args.size_mb, data_kind=args.data)
+        return 0
+    
+    if args.command == 'dedup-signatures':
+        db.connect(reuse_if_open=True)
+        try:
+            report = find_duplicate_signatures(args.threshold)
+            removed = merge_duplicate_signatures(report) if args.merge else 0
+        finally:
+            db.close()
+        titles = {'exact': "Одинаковые", 'near': "Почти одинаковые"}
+        for group in report.groups:
+            redundant = {member[0] for member in group.redundant()}
+            members = ', '.join(member[1] + (" (лишняя)" if member[0] in redundant else "")
+                                for member in group.members)
+            print(f"{titles[group.kind]}: {members}")
+        print(report.summary())
+        if args.merge:
+            print(f"Удалено сигнатур: {removed}")
+        return 0
+    
+    if args.command == 'reconcile-stats':
+        db.connect(reuse_if_open=True)
+        try:
+            drift = reconcile_statistics()
+        finally:
+            db.close()
+        for column, stored, actual in drift:
+            print(f"{column}: было {stored}, по таблицам {actual}")
+        print(f"Статистика пересчитана, расхождений: {len(drift)}")
+        return 0
+    
+    if args.command == 'check-indexes':
+        db.connect(reuse_if_open=True)
+        try:
+            problems = check_hot_queries()
+        finally:
+            db.close()
+        for description, scans in problems:
+            print(f"Полное сканирование: {description} - {', '.join(scans)}")
+        if not problems:
+            print(f"Все частые запросы ({len(HOT_QUERIES)}) выполняются по индексам")
+        return 1 if problems else 0
+    
+    return None
+
 # Запуск приложения
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     
-    # Проверяем подключение к базе данных перед запуском
-    if not db_initialized:
-        print("Предупреждение: База данных не инициализирована. Приложение будет работать в ограниченном режиме.")
+    app = QApplication(sys.argv)
     
+    # База данных подключается в фоне, окно показывается сразу
     window = MainWindow()
     window.show()
     
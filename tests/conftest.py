@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import main
+from peewee import SqliteDatabase
+
+SCHEMA_MODELS = [main.SchemaMigration, main.Manufacturer, main.Product, main.Malware, main.Signature,
+                 main.IdSequence, main.ChangeCounter, main.StatsSummary, main.StatsGroup]
+
+
+@pytest.fixture
+def empty_database(monkeypatch):
+    """База SQLite в памяти без таблиц, к которой привязаны модели схемы"""
+    database = SqliteDatabase(':memory:', pragmas={'foreign_keys': 1})
+    database.func('YEAR')(lambda value: int(str(value)[:4]) if value else None)
+    monkeypatch.setattr(main, 'db', database)
+    monkeypatch.setattr(main, 'id_allocator', main.IdAllocator())
+    with database.bind_ctx(SCHEMA_MODELS):
+        yield database
+    database.close()
+
+
+@pytest.fixture
+def database(empty_database):
+    """База со схемой, созданной миграциями, как при первом запуске приложения"""
+    main.migrate()
+    return empty_database
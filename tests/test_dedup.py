@@ -0,0 +1,80 @@
+import random
+from datetime import date
+
+import pytest
+
+import main
+
+
+def group(*members):
+    return main.DuplicateGroup('near', [(pk, f'SIG-{pk:04d}', malware, pattern)
+                                        for pk, malware, pattern in members])
+
+
+def removed_ids(duplicate_group):
+    return sorted(member[0] for member in duplicate_group.redundant())
+
+
+def test_equal_patterns_keep_lowest_id():
+    assert removed_ids(group((3, 1, b'ABCD'), (1, 1, b'ABCD'), (2, 1, b'ABCD'))) == [2, 3]
+
+
+def test_pattern_containing_kept_pattern_of_same_malware_is_removed():
+    assert removed_ids(group((1, 1, b'xxABCDyy'), (2, 1, b'ABCD'), (3, 1, b'ABCDyy'))) == [1, 3]
+
+
+def test_other_malware_and_overlapping_patterns_are_kept():
+    assert removed_ids(group((1, 1, b'ABCD'), (2, 2, b'ABCDEF'), (3, 1, b'CDEFGH'), (4, 2, b'ABCD'))) == [2]
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_every_removed_signature_is_covered_by_kept_one(seed):
+    rng = random.Random(seed)
+    base = bytes(rng.choice(b'AB') for _ in range(6))
+    members = []
+    for pk in range(1, 12):
+        suffix = bytes(rng.choice(b'AB') for _ in range(rng.randint(0, 2)))
+        members.append((pk, rng.randint(1, 2), base[rng.randint(0, 2):rng.randint(3, 6)] + suffix))
+
+    removed = group(*members).redundant()
+    removed_pks = {member[0] for member in removed}
+    kept = [member for member in group(*members).members if member[0] not in removed_pks]
+
+    for member in removed:
+        assert any(keeper[2] == member[2] and keeper[3] in member[3] for keeper in kept)
+
+
+def create_signature(pk, malware, pattern):
+    main.Signature.create(id=pk, signature_id=f'SIG-{pk:04d}', name=f'sig {pk}', data=pattern.hex(),
+                          creation_date=date(2024, 1, 1), malware=malware)
+
+
+def detected_malware(signature_set, data):
+    return {signature_set.signatures[index][2] for _, index in signature_set.scan(data)}
+
+
+def test_merge_does_not_change_detection(database):
+    rng = random.Random(7)
+    first, second = (main.Malware.create(malware_id=f'MAL-{pk:04d}', name=f'ВП {pk}', description='',
+                                         threat_level='Высокий', discovery_date=date(2024, 1, 1),
+                                         malware_type='Троян') for pk in (1, 2))
+    base, other = rng.randbytes(40), rng.randbytes(40)
+    patterns = [
+        (1, first, base), (2, first, base), (3, second, base),           # одинаковые
+        (4, first, base + b'tail'), (5, second, b'head' + base),         # почти одинаковые, вложенные
+        (6, first, base[4:] + b'tail'),                                  # почти одинаковый, не вложен
+        (7, second, other), (8, second, other[:-2] + b'!!'),
+    ]
+    for pk, malware, pattern in patterns:
+        create_signature(pk, malware, pattern)
+    before = main.SignatureSet.from_database()
+
+    report = main.find_duplicate_signatures()
+    merged = main.merge_duplicate_signatures(report)
+
+    assert merged == 3
+    assert sorted(pk for pk, in main.Signature.select(main.Signature.id).tuples()) == [1, 3, 6, 7, 8]
+    after = main.SignatureSet.from_database()
+    samples = [pattern for _, _, pattern in patterns] + [b''.join(pattern for _, _, pattern in patterns)]
+    for data in samples:
+        assert detected_malware(after, data) == detected_malware(before, data)
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import main
+
+INFECTED = b'\x00' * 50 + bytes.fromhex('4D5A9000DEADBEEF') + b'\x00' * 50
+
+
+@pytest.fixture
+def scanner(database, tmp_path):
+    main.FeedImporter('malware', batch_size=100).run(enumerate([
+        {'malware_id': 'MAL-0001', 'name': 'Emotet', 'threat_level': 'Высокий', 'discovery_date': '2024-01-01',
+         'malware_type': 'Троян'}], 1))
+    main.FeedImporter('signatures', batch_size=100).run(enumerate([
+        {'name': 'Emotet MZ', 'data': '4D5A9000DEADBEEF', 'creation_date': '2024-01-01', 'malware': 'MAL-0001'}], 1))
+    signature_path = str(tmp_path / 'signatures.db')
+    main.build_signature_db(signature_path, force=True)
+    return main.DirectoryScanner(signature_path, str(tmp_path / 'cache' / 'scan_cache.db'), workers=2)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'tree'
+    for index in range(6):
+        write(root / f'dir{index % 2}' / f'file{index}', INFECTED if index == 3 else f'чистый {index}'.encode())
+    return root
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def cached(model, field):
+    with main.scan_cache_db.connection_context():
+        return sorted(value for value, in model.select(field).tuples())
+
+
+def test_unchanged_files_are_taken_from_cache(scanner, tree):
+    first = scanner.scan(str(tree))
+    second = scanner.scan(str(tree))
+
+    assert (first.files, first.scanned, first.unchanged) == (6, 6, 0)
+    assert (second.files, second.scanned, second.unchanged) == (6, 0, 6)
+    assert list(first.infected) == list(second.infected) == [str(tree / 'dir1' / 'file3')]
+    assert second.infected == first.infected
+
+
+def test_changed_file_is_rescanned_and_copy_is_found_by_hash(scanner, tree):
+    scanner.scan(str(tree))
+    write(tree / 'dir0' / 'file0', INFECTED)
+    write(tree / 'dir0' / 'copy', b'\x00' * 50 + b'\x01')
+    os.utime(tree / 'dir0' / 'copy', ns=(1, 1))
+    write(tree / 'dir0' / 'file2', b'\xff' * len('чистый 2'.encode()))
+    for name in ('dir0/file2', 'dir1/file1'):
+        stat = os.stat(tree / name)
+        os.utime(tree / name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    report = scanner.scan(str(tree))
+
+    # file0 получил уже проверенное содержимое, file1 только «тронут»; copy и file2 новые
+    assert (report.files, report.unchanged, report.known, report.scanned) == (7, 3, 2, 2)
+    assert sorted(report.infected) == [str(tree / 'dir0' / 'file0'), str(tree / 'dir1' / 'file3')]
+
+
+def test_deleted_files_and_orphaned_contents_are_pruned(scanner, tree, tmp_path):
+    other = tmp_path / 'other'
+    write(other / 'kept', 'другой каталог'.encode())
+    scanner.scan(str(other))
+    scanner.scan(str(tree))
+    content_count = len(cached(main.CachedContent, main.CachedContent.content_hash))
+
+    (tree / 'dir1' / 'file3').unlink()
+    (tree / 'dir0' / 'file0').unlink()
+    report = scanner.scan(str(tree))
+
+    assert report.infected == {}
+    assert cached(main.CachedFile, main.CachedFile.path) == sorted(
+        [str(other / 'kept')] + [str(tree / f'dir{index % 2}' / f'file{index}') for index in (1, 2, 4, 5)])
+    assert len(cached(main.CachedContent, main.CachedContent.content_hash)) == content_count - 2
+
+
+def test_files_are_rescanned_after_signature_update(scanner, tree):
+    scanner.scan(str(tree))
+    main.Signature.update(name='Emotet MZ 2').execute()
+    main.build_signature_db(scanner.signature_path)
+
+    report = main.DirectoryScanner(scanner.signature_path, scanner.cache_path, workers=2).scan(str(tree))
+
+    assert (report.unchanged, report.known, report.scanned) == (0, 0, 6)
+    assert list(report.infected) == [str(tree / 'dir1' / 'file3')]
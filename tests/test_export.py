@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import main
+from peewee import SqliteDatabase
+
+MODELS = [main.Manufacturer, main.Product, main.Malware, main.Signature, main.StatsSummary, main.StatsGroup]
+
+
+def export_query_count(tmp_path, row_count, streaming):
+    """Число SQL-запросов экспорта в Excel базы из row_count ВП и сигнатур"""
+    database = SqliteDatabase(':memory:')
+    database.func('YEAR')(lambda value: int(str(value)[:4]) if value else None)
+    with database.bind_ctx(MODELS):
+        database.create_tables(MODELS)
+        with database.atomic():
+            main._populate_benchmark_data(row_count)
+        main.reconcile_statistics()
+        
+        exporter = main.ExcelExporter(str(tmp_path / f'export_{row_count}.xlsx'), streaming=streaming)
+        with main.QueryCounter(database) as counter:
+            success, result = exporter.export_all_data()
+    database.close()
+    
+    assert success, result
+    assert exporter.query_count == counter.count
+    return counter.count
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_export_query_count_does_not_depend_on_row_count(tmp_path, streaming):
+    small = export_query_count(tmp_path, 20, streaming)
+    large = export_query_count(tmp_path, 600, streaming)
+    assert small == large
@@ -0,0 +1,59 @@
+import pytest
+
+import main
+
+
+def sequence_value(prefix):
+    return main.IdSequence.get(main.IdSequence.name == prefix).next_value
+
+
+def test_next_id_reserves_a_block_and_hands_it_out_from_memory(database):
+    allocator = main.IdAllocator(block_size=3)
+
+    with main.QueryCounter(database) as counter:
+        ids = [allocator.next_id('MAL') for _ in range(4)]
+
+    assert ids == ['MAL-0001', 'MAL-0002', 'MAL-0003', 'MAL-0004']
+    assert counter.count == 2
+    assert sequence_value('MAL') == 7
+
+
+def test_next_ids_uses_rest_of_block_and_reserves_only_missing_numbers(database):
+    allocator = main.IdAllocator(block_size=5)
+    assert allocator.next_id('SIG') == 'SIG-0001'
+
+    assert allocator.next_ids('SIG', 3) == ['SIG-0002', 'SIG-0003', 'SIG-0004']
+    assert sequence_value('SIG') == 6
+
+    assert allocator.next_ids('SIG', 4) == ['SIG-0005', 'SIG-0006', 'SIG-0007', 'SIG-0008']
+    assert sequence_value('SIG') == 9
+    # Блок исчерпан: следующий номер берется из нового блока
+    assert allocator.next_id('SIG') == 'SIG-0009'
+    assert sequence_value('SIG') == 14
+
+
+def test_allocators_of_different_clients_do_not_overlap(database):
+    first, second = main.IdAllocator(block_size=4), main.IdAllocator(block_size=4)
+
+    ids = [allocator.next_id('MAN') for _ in range(6) for allocator in (first, second)]
+    ids += first.next_ids('MAN', 5) + second.next_ids('MAN', 7)
+
+    assert len(set(ids)) == len(ids)
+
+
+def test_advance_past_skips_taken_numbers_in_cached_block(database):
+    allocator = main.IdAllocator(block_size=10)
+    assert allocator.next_id('PROD') == 'PROD-0001'
+
+    allocator.advance_past('PROD-0004')
+
+    assert allocator.next_id('PROD') == 'PROD-0005'
+    assert sequence_value('PROD') == 11
+    allocator.advance_past('PROD-0030')
+    assert sequence_value('PROD') == 31
+    assert allocator.next_ids('PROD', 2) == ['PROD-0031', 'PROD-0032']
+
+
+def test_unknown_prefix_raises_key_error(database):
+    with pytest.raises(KeyError):
+        main.IdAllocator().next_id('XYZ')
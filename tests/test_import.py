@@ -0,0 +1,55 @@
+import main
+
+
+def malware_row(name, malware_id=None, malware_type='Троян', threat_level='Высокий'):
+    row = {'name': name, 'threat_level': threat_level, 'discovery_date': '2024-01-01', 'malware_type': malware_type}
+    if malware_id:
+        row['malware_id'] = malware_id
+    return row
+
+
+def import_rows(kind, rows, batch_size=100):
+    return main.FeedImporter(kind, batch_size=batch_size).run(enumerate(rows, 1))
+
+
+def malware_records():
+    return sorted(main.Malware.select(main.Malware.malware_id, main.Malware.name).tuples())
+
+
+def test_explicit_id_in_later_batch_does_not_overwrite_new_record(database):
+    stats = import_rows('malware', [malware_row('A'), malware_row('B', 'MAL-0001')], batch_size=1)
+
+    assert stats.written == 2
+    assert malware_records() == [('MAL-0001', 'B'), ('MAL-0002', 'A')]
+
+
+def test_new_record_after_explicit_id_gets_next_number(database):
+    import_rows('malware', [malware_row('A', 'MAL-0005'), malware_row('B')], batch_size=1)
+    import_rows('malware', [malware_row('C')])
+
+    assert malware_records() == [('MAL-0005', 'A'), ('MAL-0006', 'B'), ('MAL-0007', 'C')]
+
+
+def test_row_without_id_updates_record_with_same_natural_key(database):
+    import_rows('malware', [malware_row('A'), malware_row('A', malware_type='Червь')])
+    stats = import_rows('malware', [malware_row('A', threat_level='Критический'), malware_row('A')])
+
+    assert stats.written == 2
+    assert main.Malware.select().count() == 2
+    assert main.Malware.get(main.Malware.malware_type == 'Троян').threat_level == 'Высокий'
+
+
+def test_signature_feed_resolves_malware_by_name_and_dedupes_patterns(database):
+    import_rows('malware', [malware_row('Emotet', 'MAL-0001')])
+    rows = [{'name': 'a', 'data': '4D5A90', 'creation_date': '2024-01-01', 'malware': 'MAL-0001'},
+            {'name': 'b', 'data': '4d 5a 90', 'creation_date': '2024-01-01', 'malware': 'Emotet'},
+            {'name': 'c', 'data': 'plain text', 'creation_date': '2024-01-01', 'malware': 'Emotet'}]
+    import_rows('signatures', rows)
+    stats = import_rows('signatures', rows + [{'name': 'd', 'data': '00', 'creation_date': '2024-01-01',
+                                               'malware': 'Unknown'}])
+
+    assert stats.rejected == 1
+    signatures = list(main.Signature.select().order_by(main.Signature.signature_id))
+    assert [signature.signature_id for signature in signatures] == ['SIG-0001', 'SIG-0002']
+    assert bytes(signatures[0].pattern) == b'MZ\x90'
+    assert signatures[1].data == 'plain text'
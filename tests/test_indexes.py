@@ -0,0 +1,10 @@
+import main
+
+
+def test_hot_queries_do_not_scan_tables(database):
+    assert main.check_hot_queries() == []
+
+
+def test_full_scan_is_reported(database):
+    query = main.Malware.select().where(main.Malware.description == 'Описание')
+    assert main.explain_full_scans(query)
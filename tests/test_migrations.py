@@ -0,0 +1,42 @@
+import pytest
+
+import main
+
+
+def test_fresh_database_gets_every_migration_in_order(empty_database):
+    applied = main.migrate()
+
+    assert applied == [version for version, *_ in main.MIGRATIONS]
+    assert main.schema_version() == main.latest_schema_version()
+    assert [row.version for row in main.SchemaMigration.select().order_by(main.SchemaMigration.version)] == applied
+
+
+def test_current_schema_is_checked_with_one_query(database):
+    with main.QueryCounter(database) as counter:
+        assert main.migrate() == []
+    assert counter.count == 1
+
+
+def test_migrate_to_target_then_to_latest(empty_database):
+    assert main.migrate(target=5) == [1, 2, 3, 4, 5]
+    assert main.schema_version() == 5
+    assert main.migrate() == list(range(6, main.latest_schema_version() + 1))
+
+
+def test_failed_atomic_migration_is_rolled_back(database, monkeypatch):
+    def broken_migration():
+        main.db.execute_sql("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("сбой миграции")
+
+    version = main.latest_schema_version() + 1
+    monkeypatch.setattr(main, 'MIGRATIONS', main.MIGRATIONS + [(version, "Сбой", broken_migration, True)])
+
+    with pytest.raises(RuntimeError):
+        main.migrate()
+    assert main.schema_version() == version - 1
+    assert 'half_done' not in database.get_tables()
+
+
+def test_duplicate_migration_version_is_rejected():
+    with pytest.raises(ValueError):
+        main.migration(1, "Повтор")(lambda: None)
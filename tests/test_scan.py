@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+import main
+
+
+def brute_force_matches(patterns, data):
+    return sorted((offset, index) for index, pattern in enumerate(patterns)
+                  for offset in range(len(data)) if data.startswith(pattern, offset))
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('block_size', [5, 64, 1 << 20])
+def test_matcher_finds_same_matches_as_brute_force(monkeypatch, seed, block_size):
+    rng = random.Random(seed)
+    alphabet = bytes(rng.sample(range(256), rng.choice([2, 4, 256])))
+    patterns = [bytes(rng.choice(alphabet) for _ in range(rng.randint(1, 12))) for _ in range(rng.randint(1, 40))]
+    data = bytes(rng.choice(alphabet) for _ in range(rng.randint(0, 2000)))
+    monkeypatch.setattr(main.SignatureMatcher, 'SCAN_BLOCK_SIZE', block_size)
+
+    matcher = main.SignatureMatcher.build(patterns)
+
+    assert sorted(matcher.iter_matches(data)) == brute_force_matches(patterns, data)
+
+
+def test_matcher_on_zero_padding_with_zero_prefixed_patterns(monkeypatch):
+    monkeypatch.setattr(main.SignatureMatcher, 'SCAN_BLOCK_SIZE', 256)
+    patterns = [bytes(4) + b'\x01\x02\x03\x04', bytes(8) + b'MZ', b'\x00\x00\x01', bytes(3)]
+    data = bytes(1000) + b'\x01\x02\x03\x04' + bytes(700) + b'MZ' + bytes(2)
+
+    matcher = main.SignatureMatcher.build(patterns)
+
+    assert sorted(matcher.iter_matches(data)) == brute_force_matches(patterns, data)
@@ -0,0 +1,106 @@
+import mmap
+import sys
+
+import pytest
+
+import main
+
+RECORDS = [
+    ('SIG-0001', 'MZ', '4D5A', None, 1, 'MAL-0001', 'Emotet', 'Высокий', 1, 'Acme'),
+    ('SIG-0002', 'Заглушка', None, b'\x00\x00\x01\x02', 2, 'MAL-0002', 'Zeus', 'Критический', None, None),
+    ('SIG-0003', 'Текст', 'not hex', None, 2, 'MAL-0002', 'Zeus', 'Критический', None, None),
+]
+
+
+@pytest.fixture
+def signature_file(tmp_path):
+    path = str(tmp_path / 'signatures.db')
+    main.SignatureSet.from_records(RECORDS).save(path, (7, 738000))
+    with open(path, 'rb') as file:
+        return path, file.read()
+
+
+@pytest.fixture
+def mappings(monkeypatch):
+    """Все отображения в память, созданные при открытии файла сигнатур"""
+    created = []
+
+    class RecordedMmap(mmap.mmap):
+        def __new__(cls, *args, **kwargs):
+            mapped = super().__new__(cls, *args, **kwargs)
+            created.append(mapped)
+            return mapped
+
+    monkeypatch.setattr(main.mmap, 'mmap', RecordedMmap)
+    return created
+
+
+def write(path, content):
+    with open(path, 'wb') as file:
+        file.write(content)
+
+
+def patch_header(content, **fields):
+    names = ['magic', 'version', 'little_endian', 'signature_count', 'counter', 'last_date', 'section_count']
+    values = dict(zip(names, main.SIGNATURE_DB_HEADER.unpack_from(content, 0)))
+    values.update(fields)
+    return main.SIGNATURE_DB_HEADER.pack(*(values[name] for name in names)) + content[main.SIGNATURE_DB_HEADER.size:]
+
+
+def patch_section(content, section, offset=None, length=None):
+    header = main.SIGNATURE_DB_HEADER
+    section_count = header.unpack_from(content, 0)[-1]
+    content = bytearray(content)
+    for index in range(section_count):
+        position = header.size + index * main.SIGNATURE_DB_SECTION.size
+        name, old_offset, old_length = main.SIGNATURE_DB_SECTION.unpack_from(content, position)
+        if name.rstrip(b'\0').decode('ascii') == section:
+            main.SIGNATURE_DB_SECTION.pack_into(content, position, name, old_offset if offset is None else offset,
+                                                old_length if length is None else length)
+    return bytes(content)
+
+
+def test_saved_file_scans_like_compiled_set(signature_file):
+    path, _ = signature_file
+    compiled = main.SignatureSet.from_records(RECORDS)
+    data = b'\x00\x00\x01\x02MZ\x90\x00not hex' + b'\x00' * 100 + b'MZ'
+
+    opened = main.SignatureSet.open(path)
+
+    assert opened.state == (7, 738000)
+    assert opened.scan(data) == compiled.scan(data) == [(0, 1), (4, 0), (115, 0)]
+    assert [opened.signatures[index][:2] for index in range(len(opened.signatures))] == \
+        [('SIG-0001', 'MZ'), ('SIG-0002', 'Заглушка')]
+    assert opened.malware == {1: ('MAL-0001', 'Emotet', 'Высокий'), 2: ('MAL-0002', 'Zeus', 'Критический')}
+    assert opened.manufacturers == {1: 'Acme'}
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda content: content[:10],
+    lambda content: b'NOTSIGDB' + content[8:],
+    lambda content: patch_header(content, version=main.SIGNATURE_DB_VERSION + 1),
+    lambda content: patch_header(content, little_endian=sys.byteorder != 'little'),
+    lambda content: patch_header(content, signature_count=5),
+    lambda content: patch_header(content, section_count=200),
+    lambda content: content[:len(content) // 2],
+    lambda content: patch_section(content, 'meta', length=1 << 40),
+    lambda content: patch_section(content, 'meta', length=3),
+    lambda content: patch_section(content, 'edge_start', length=6),
+    lambda content: patch_section(content, 'long_prefixes', length=4),
+], ids=['short-header', 'magic', 'version', 'byte-order', 'signature-count', 'section-count', 'truncated',
+        'section-bounds', 'meta', 'array-size', 'long-prefixes'])
+def test_damaged_file_is_rejected_and_unmapped(tmp_path, signature_file, mappings, corrupt):
+    path = str(tmp_path / 'damaged.db')
+    write(path, corrupt(signature_file[1]))
+
+    with pytest.raises(main.SignatureDbError):
+        main.SignatureSet.open(path)
+    assert mappings and all(mapped.closed for mapped in mappings)
+
+
+def test_empty_file_is_rejected(tmp_path):
+    path = str(tmp_path / 'empty.db')
+    write(path, b'')
+
+    with pytest.raises(main.SignatureDbError):
+        main.SignatureSet.open(path)
@@ -0,0 +1,59 @@
+import hashlib
+from datetime import date
+
+import main
+
+
+def create_malware():
+    return main.Malware.create(malware_id='MAL-0001', name='Emotet', description='', threat_level='Высокий',
+                               discovery_date=date(2024, 1, 1), malware_type='Троян')
+
+
+def stored(signature_id):
+    return main.Signature.select(main.Signature.data, main.Signature.pattern, main.Signature.pattern_length,
+                                 main.Signature.pattern_hash).where(
+        main.Signature.signature_id == signature_id).tuples().get()
+
+
+def test_hex_data_is_saved_as_pattern_bytes(database):
+    malware = create_malware()
+    signature = main.Signature.create(signature_id='SIG-0001', name='MZ', data='4d 5a 90 00',
+                                      creation_date=date(2024, 1, 2), malware=malware)
+
+    data, pattern, length, pattern_hash = stored('SIG-0001')
+    assert data is None
+    assert bytes(pattern) == b'MZ\x90\x00'
+    assert length == 4
+    assert pattern_hash == hashlib.sha256(b'MZ\x90\x00').hexdigest()
+    assert signature.hex_data == '4D5A9000'
+    assert main.Signature.get(main.Signature.signature_id == 'SIG-0001').hex_data == '4D5A9000'
+
+
+def test_text_data_stays_text_and_clears_pattern(database):
+    malware = create_malware()
+    signature = main.Signature.create(signature_id='SIG-0001', name='MZ', data='4D5A',
+                                      creation_date=date(2024, 1, 2), malware=malware)
+
+    signature.data = 'eval(base64_decode('
+    signature.save()
+
+    assert stored('SIG-0001') == ('eval(base64_decode(', None, None, None)
+    assert signature.hex_data == 'eval(base64_decode('
+
+
+def test_migration_converts_hex_rows_in_batches(empty_database, monkeypatch):
+    main.migrate(target=6)
+    malware = create_malware()
+    rows = [(1, '4D5A'), (2, 'not hex'), (3, 'de ad be ef'), (7, ''), (8, '00FF')]
+    for pk, data in rows:
+        main.db.execute_sql(
+            "INSERT INTO signatures (id, signature_id, name, data, creation_date, malware_id) "
+            "VALUES (?, ?, ?, ?, '2024-01-01', ?)", (pk, f'SIG-{pk:04d}', f'sig {pk}', data, malware.id))
+    monkeypatch.setattr(main, 'MIGRATION_BATCH_SIZE', 2)
+
+    main.migrate()
+
+    assert [stored(f'SIG-{pk:04d}')[:3] for pk, _ in rows] == [
+        (None, b'MZ', 2), ('not hex', None, None), (None, b'\xde\xad\xbe\xef', 4), ('', None, None),
+        (None, b'\x00\xff', 2)]
+    assert stored('SIG-0008')[3] == hashlib.sha256(b'\x00\xff').hexdigest()
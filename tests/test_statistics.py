@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+
+import main
+
+SUMMARY_COLUMNS = ('manufacturers', 'products', 'malware', 'signatures', 'countries', 'malware_types',
+                   'critical_malware')
+
+
+def table_statistics():
+    """Итоги и непустые группы, посчитанные прямо по таблицам"""
+    groups = {}
+    for _, _, dimensions in main.STATS_MODELS:
+        for dimension, field in dimensions:
+            for item, total in field.model.select(field, main.fn.COUNT(main.SQL('*'))).group_by(field).tuples():
+                groups[dimension, str(item)] = total
+    summary = {total_column: model.select().count() for model, total_column, _ in main.STATS_MODELS}
+    summary['countries'] = sum(1 for dimension, _ in groups if dimension == 'country')
+    summary['malware_types'] = sum(1 for dimension, _ in groups if dimension == 'malware_type')
+    summary['critical_malware'] = groups.get(('threat_level', 'Критический'), 0)
+    return summary, groups
+
+
+def stored_statistics():
+    """Итоги и непустые группы из stats_summary и stats_groups"""
+    summary = main.read_statistics()
+    groups = {(dimension, item): total for dimension, item, total in main.StatsGroup.select(
+        main.StatsGroup.dimension, main.StatsGroup.item, main.StatsGroup.total).tuples() if total}
+    return {column: getattr(summary, column) for column in SUMMARY_COLUMNS}, groups
+
+
+@pytest.fixture
+def populated(database):
+    with database.atomic():
+        main._populate_benchmark_data(40)
+    assert stored_statistics() == table_statistics()
+    return database
+
+
+def test_triggers_follow_inserts(populated):
+    manufacturer = main.Manufacturer.create(name='Новый', description='', country='Новая страна', website='',
+                                            creation_date=date(2024, 1, 1), manufacturer_id='MAN-0100')
+    main.Product.create(product_id='PROD-0100', name='Новый продукт', description='', version='1.0',
+                        release_date=date(2024, 1, 1), update_size='1 МБ', manufacturer=manufacturer)
+    malware = main.Malware.create(malware_id='MAL-0100', name='Новая', description='', threat_level='Критический',
+                                  discovery_date=date(2024, 1, 1), malware_type='Новый тип')
+    main.Signature.create(signature_id='SIG-0100', name='Новая', data='4D5A', creation_date=date(2024, 1, 1),
+                          malware=malware)
+
+    assert stored_statistics() == table_statistics()
+
+
+def test_triggers_follow_updates(populated):
+    main.Manufacturer.update(country='Страна 0').where(main.Manufacturer.country == 'Страна 1').execute()
+    main.Product.update(manufacturer=1).where(main.Product.manufacturer == 2).execute()
+    main.Malware.update(threat_level='Критический', malware_type='Тип 0').where(main.Malware.id <= 10).execute()
+
+    summary, groups = stored_statistics()
+    assert (summary, groups) == table_statistics()
+    assert ('country', 'Страна 1') not in groups
+
+
+def test_triggers_follow_deletes_with_cascades(populated):
+    main.Malware.delete().where(main.Malware.threat_level == 'Критический').execute()
+    main.Manufacturer.delete().where(main.Manufacturer.id.in_([3, 4])).execute()
+    main.Signature.delete().where(main.Signature.id % 5 == 0).execute()
+
+    assert stored_statistics() == table_statistics()
+    assert main.read_statistics().critical_malware == 0
+
+
+def test_reconcile_repairs_drift(populated):
+    expected = table_statistics()
+    main.StatsGroup.update(total=main.StatsGroup.total + 3).where(main.StatsGroup.dimension == 'threat_level').execute()
+    main.StatsGroup.delete().where(main.StatsGroup.dimension == 'country').execute()
+    main.StatsGroup.insert(dimension='country', item='Призрак', total=5).execute()
+    main.StatsSummary.update(signatures=7, products=1000, countries=99).execute()
+
+    changes = main.reconcile_statistics()
+
+    assert {column for column, _, _ in changes} == {'signatures', 'products', 'countries'}
+    assert stored_statistics() == expected
+    assert main.reconcile_statistics() == []
+    assert main.read_statistics().reconciled_at is not None
+
+
+def test_reconcile_rebuilds_empty_statistics(populated):
+    expected = table_statistics()
+    main.StatsSummary.delete().execute()
+    main.StatsGroup.delete().execute()
+
+    assert main.reconcile_statistics() == []
+    assert stored_statistics() == expected